@@ -5,11 +5,16 @@ This module integrates IPFS and XRPL clients to provide a complete
 trace anchoring service.
 """
 
-from typing import Dict, Any, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Sequence, Tuple
 from datetime import datetime
 import json
 
-from .trace_schema import TraceJSON
+from .trace_schema import TraceJSON, TraceManifest
+from .payload import compress_payload, encode_trace, payload_version
+from .merkle import MANIFEST_VERSION
+from .pipeline import PIPELINE_STATS
 from .ipfs_client import IPFSClient
 from .xrpl_client import XRPLClient
 
@@ -36,12 +41,79 @@ class AnchorService:
         self.ipfs = ipfs_client
         self.xrpl = xrpl_client
 
-    def anchor_trace(self, trace: TraceJSON) -> Dict[str, Any]:
+    def upload_trace(
+        self,
+        trace: TraceJSON,
+        encoding: str = "json",
+        compression: Optional[str] = None,
+        level: Optional[int] = None
+    ) -> str:
+        """
+        Upload and pin a trace (or one segment of a trace) without anchoring it.
+
+        Args:
+            trace: TraceJSON object with its Merkle Root computed
+            encoding: IPFS payload encoding, "json" or "cbor"
+            compression: Payload compression, "zlib", "lzma" or None
+            level: Compression level 0-9
+
+        Returns:
+            CID of the uploaded payload
+
+        Raises:
+            ValueError: If the encoding or compression is invalid
+            Exception: If IPFS upload fails
+        """
+        cid, _ = self._upload(trace, encoding, compression, level)
+        return cid
+
+    def _upload(
+        self,
+        trace: TraceJSON,
+        encoding: str,
+        compression: Optional[str],
+        level: Optional[int]
+    ) -> Tuple[str, bytes]:
+        """Upload and pin a trace; returns the CID and the uploaded bytes"""
+        if encoding == "json":
+            # Upload the buffer the Merkle Root was computed over as-is,
+            # so it is neither serialized nor parsed again
+            payload = trace.payload()
+            data = payload
+            if compression:
+                started = time.perf_counter()
+                data = compress_payload(payload, compression, level)
+                PIPELINE_STATS.record_stage("compress", payload, started)
+        else:
+            data = encode_trace(trace, encoding, compression, level)
+
+        started = time.perf_counter()
+        cid = self.ipfs.add_bytes(data)
+        PIPELINE_STATS.record_stage("upload", data, started)
+
+        # Pin the content
+        self.ipfs.pin(cid)
+        return cid, data
+
+    def anchor_trace(
+        self,
+        trace: TraceJSON,
+        encoding: str = "json",
+        compression: Optional[str] = None,
+        level: Optional[int] = None
+    ) -> Dict[str, Any]:
         """
         Complete anchoring flow: IPFS upload + XRPL memo.
 
+        Encoding and compression are recorded in the memo "v" field; the
+        Merkle Root always covers the uncompressed trace.
+
         Args:
             trace: TraceJSON object to anchor
+            encoding: IPFS payload encoding, "json" or "cbor" (a2a-0.3 and
+                later)
+            compression: Payload compression, "zlib", "lzma" or None
+            level: Compression level 0-9
 
         Returns:
             Dictionary with anchoring result:
@@ -57,16 +129,12 @@ class AnchorService:
             }
 
         Raises:
+            ValueError: If the encoding cannot hold this trace version or
+                the compression is invalid
             Exception: If IPFS upload or XRPL anchoring fails
         """
         # Step 1: Upload to IPFS
-        # Use the cached JSON that was used for Merkle Root calculation
-        # This ensures the Merkle Root can be verified correctly
-        trace_json_str = trace.get_merkle_json()
-        cid = self.ipfs.add_json_str(trace_json_str)
-
-        # Pin the content
-        self.ipfs.pin(cid)
+        cid, data = self._upload(trace, encoding, compression, level)
 
         # Step 2: Anchor to XRPL
         xrpl_result = self.xrpl.anchor_memo(
@@ -74,10 +142,13 @@ class AnchorService:
             merkle_root=trace.hashing.chunkMerkleRoot,
             session_id=trace.session.id,
             model=trace.model.name,
-            timestamp=int(datetime.now().timestamp())
+            timestamp=int(datetime.now().timestamp()),
+            version=payload_version(trace.traceVersion, encoding, compression),
+            algorithm=trace.hashing.algorithm
         )
 
-        # Step 3: Return complete result
+        # Step 3: Return complete result (sizes are of the stored payload)
+        PIPELINE_STATS.record_stage("report", data)
         return {
             "session_id": trace.session.id,
             "cid": cid,
@@ -88,9 +159,130 @@ class AnchorService:
             "timestamp": xrpl_result["memo_data"]["ts"],
             "network": xrpl_result["network"],
             "model": trace.model.name,
-            "events_count": len(trace.events)
+            "events_count": len(trace.events),
+            "encoding": encoding,
+            "compression": compression,
+            "payload_bytes": len(data)
         }
 
+    def upload_segments(
+        self,
+        segments: Sequence[TraceJSON],
+        encoding: str = "json",
+        compression: Optional[str] = None,
+        level: Optional[int] = None,
+        workers: int = 4
+    ) -> Tuple[List[str], List[str]]:
+        """
+        Upload finalized segments of a segmented trace concurrently.
+
+        Args:
+            segments: Segments from SegmentedTraceBuilder
+            encoding: IPFS payload encoding, "json" or "cbor"
+            compression: Payload compression, "zlib", "lzma" or None
+            level: Compression level 0-9
+            workers: Number of concurrent uploads
+
+        Returns:
+            Tuple of (cids, payload_versions) in segment order
+
+        Raises:
+            Exception: If an upload fails
+        """
+        def upload(segment: TraceJSON) -> str:
+            return self.upload_trace(segment, encoding, compression, level)
+
+        if workers > 1 and len(segments) > 1:
+            with ThreadPoolExecutor(max_workers=min(workers, len(segments))) as executor:
+                cids = list(executor.map(upload, segments))
+        else:
+            cids = [upload(segment) for segment in segments]
+
+        versions = [
+            payload_version(segment.traceVersion, encoding, compression) for segment in segments
+        ]
+        return cids, versions
+
+    def anchor_manifest(self, manifest: TraceManifest) -> Dict[str, Any]:
+        """
+        Upload a segmented trace manifest and anchor its root-of-roots.
+
+        The segments must already be uploaded (see upload_segments()) and
+        listed with their CIDs. The memo "v" field is the manifest version.
+
+        Args:
+            manifest: TraceManifest listing uploaded segments
+
+        Returns:
+            Dictionary with anchoring result (as anchor_trace(), plus "segments")
+
+        Raises:
+            ValueError: If a segment has no CID
+            Exception: If IPFS upload or XRPL anchoring fails
+        """
+        for entry in manifest.segments:
+            if not entry.cid:
+                raise ValueError(f"Segment {entry.index} has not been uploaded")
+
+        cid = self.ipfs.add_json_str(manifest.to_json())
+        self.ipfs.pin(cid)
+
+        xrpl_result = self.xrpl.anchor_memo(
+            cid=cid,
+            merkle_root=manifest.rootOfRoots,
+            session_id=manifest.session.id,
+            model=manifest.model.name,
+            timestamp=int(datetime.now().timestamp()),
+            version=MANIFEST_VERSION,
+            algorithm=manifest.algorithm
+        )
+
+        return {
+            "session_id": manifest.session.id,
+            "cid": cid,
+            "ipfs_url": f"ipfs://{cid}",
+            "tx_hash": xrpl_result["tx_hash"],
+            "ledger_index": xrpl_result["ledger_index"],
+            "merkle_root": manifest.rootOfRoots,
+            "timestamp": xrpl_result["memo_data"]["ts"],
+            "network": xrpl_result["network"],
+            "model": manifest.model.name,
+            "events_count": sum(entry.events for entry in manifest.segments),
+            "segments": len(manifest.segments)
+        }
+
+    def anchor_segmented_trace(
+        self,
+        segments: Sequence[TraceJSON],
+        encoding: str = "json",
+        compression: Optional[str] = None,
+        level: Optional[int] = None,
+        workers: int = 4
+    ) -> Dict[str, Any]:
+        """
+        Complete anchoring flow for a segmented trace.
+
+        Uploads the segments concurrently, then uploads the manifest and
+        anchors its root-of-roots.
+
+        Args:
+            segments: Segments from SegmentedTraceBuilder (all finalized)
+            encoding: IPFS payload encoding of the segments
+            compression: Payload compression of the segments
+            level: Compression level 0-9
+            workers: Number of concurrent uploads
+
+        Returns:
+            Dictionary with anchoring result (see anchor_manifest())
+
+        Raises:
+            ValueError: If the segments do not form a manifest
+            Exception: If IPFS upload or XRPL anchoring fails
+        """
+        cids, versions = self.upload_segments(segments, encoding, compression, level, workers)
+        manifest = TraceManifest.from_segments(segments, cids, versions)
+        return self.anchor_manifest(manifest)
+
     def anchor_trace_from_dict(self, trace_dict: Dict[str, Any]) -> Dict[str, Any]:
         """
         Anchor trace from dictionary (without TraceJSON validation).
@@ -124,7 +316,9 @@ class AnchorService:
             merkle_root=merkle_root,
             session_id=session_id,
             model=model_name,
-            timestamp=int(datetime.now().timestamp())
+            timestamp=int(datetime.now().timestamp()),
+            version=trace_dict.get("traceVersion", "a2a-0.1"),
+            algorithm=trace_dict["hashing"].get("algorithm")
         )
 
         # Step 3: Return result
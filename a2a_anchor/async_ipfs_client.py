@@ -0,0 +1,400 @@
+"""
+Async IPFS Client for A2A Trace Anchoring
+
+This module talks to a Kubo (go-ipfs) node's HTTP RPC API (/api/v0/*)
+directly, through one pooled keep-alive httpx.AsyncClient, so asyncio
+services can upload and fetch traces without blocking the event loop or
+pushing calls into threads. It offers the same surface as IPFSClient.
+
+Every call has a deadline (per client, overridable per call) covering
+the whole request, so a node trickling its response cannot hold a call
+past it; cat_stream() applies the timeout to each read instead. Calls
+can be cancelled like any other coroutine; cancellation is never turned
+into a "Failed ..." exception.
+
+httpx is installed with the "async" extra.
+"""
+
+import asyncio
+import codecs
+import json
+import re
+from typing import Any, AsyncIterator, Dict, Optional
+
+try:
+    import httpx
+except ImportError:  # optional: the "async" extra, only needed for the async client
+    httpx = None
+
+from .payload import compress_payload, decompress_payload
+from .pipeline import PIPELINE_STATS
+
+
+DEFAULT_API_URL = '/ip4/127.0.0.1/tcp/5001/http'
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_MAX_CONNECTIONS = 20
+
+_MULTIADDR = re.compile(
+    r"^/(ip4|ip6|dns|dns4|dns6)/([^/]+)/tcp/(\d+)(?:/(http|https))?/?$"
+)
+
+
+def api_base_url(api_url: str) -> str:
+    """
+    Convert an IPFS API address to the base URL of its HTTP API.
+
+    Args:
+        api_url: Multiaddr (e.g. '/ip4/127.0.0.1/tcp/5001/http') or URL
+
+    Returns:
+        Base URL, e.g. 'http://127.0.0.1:5001/api/v0'
+
+    Raises:
+        ValueError: If the address cannot be parsed
+    """
+    if api_url.startswith(("http://", "https://")):
+        base = api_url.rstrip("/")
+    else:
+        match = _MULTIADDR.match(api_url)
+        if not match:
+            raise ValueError(f"Unsupported IPFS API address: {api_url}")
+        protocol, host, port, scheme = match.groups()
+        if protocol == "ip6":
+            host = f"[{host}]"
+        base = f"{scheme or 'http'}://{host}:{port}"
+    return base if base.endswith("/api/v0") else f"{base}/api/v0"
+
+
+def _check_cid(cid: str) -> None:
+    if not cid or not isinstance(cid, str):
+        raise ValueError("CID must be a non-empty string")
+
+
+class AsyncIPFSClient:
+    """
+    Async client for a Kubo node's HTTP RPC API.
+
+    Attributes:
+        api_url: IPFS API address as given
+        base_url: Base URL of the HTTP API
+        timeout: Default deadline of each call in seconds
+        http: Pooled httpx.AsyncClient shared by all calls
+    """
+
+    def __init__(
+        self,
+        api_url: str = DEFAULT_API_URL,
+        timeout: float = DEFAULT_TIMEOUT,
+        max_connections: int = DEFAULT_MAX_CONNECTIONS,
+        transport: Any = None
+    ):
+        """
+        Initialize the client. No connection is made until the first call.
+
+        Args:
+            api_url: IPFS API multiaddr or URL (default: local node at port 5001)
+            timeout: Default deadline of each call in seconds
+            max_connections: Size of the connection pool
+            transport: httpx transport to use instead of the network
+                (e.g. httpx.MockTransport in tests)
+
+        Raises:
+            ImportError: If httpx is not installed
+            ValueError: If api_url cannot be parsed
+        """
+        if httpx is None:
+            raise ImportError('AsyncIPFSClient requires httpx (pip install "a2a-xrpl[async]")')
+
+        self.api_url = api_url
+        self.base_url = api_base_url(api_url)
+        self.timeout = timeout
+        self.http = httpx.AsyncClient(
+            base_url=self.base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_connections
+            ),
+            transport=transport
+        )
+
+    async def _post(
+        self,
+        command: str,
+        params: Optional[Dict[str, Any]] = None,
+        timeout: Optional[float] = None,
+        **kwargs: Any
+    ) -> "httpx.Response":
+        """Call an API command (Kubo only accepts POST) and check the status"""
+        timeout = self.timeout if timeout is None else timeout
+        # httpx applies its timeout to each phase (connect, read, write);
+        # asyncio.timeout bounds the call as a whole
+        async with asyncio.timeout(timeout):
+            response = await self.http.post(f"/{command}", params=params, timeout=timeout, **kwargs)
+        if response.is_error:
+            try:
+                message = response.json().get("Message", response.text)
+            except ValueError:
+                message = response.text
+            raise Exception(f"IPFS API {command} returned {response.status_code}: {message}")
+        return response
+
+    async def add_bytes(self, data: bytes, timeout: Optional[float] = None) -> str:
+        """
+        Upload raw bytes to IPFS and return CID.
+
+        Args:
+            data: Payload bytes
+            timeout: Deadline of this call in seconds
+
+        Returns:
+            CID (Content Identifier) as string
+
+        Raises:
+            ValueError: If data is not bytes
+            Exception: If IPFS upload fails
+        """
+        if not isinstance(data, (bytes, bytearray)):
+            raise ValueError("data must be bytes")
+
+        try:
+            response = await self._post(
+                "add", timeout=timeout, files={"file": ("trace", bytes(data))}
+            )
+            # One JSON object per line; the last one is the added file
+            lines = [line for line in response.text.splitlines() if line.strip()]
+            return json.loads(lines[-1])["Hash"]
+        except Exception as e:
+            raise Exception(f"Failed to add bytes to IPFS: {e}")
+
+    async def add_json(self, trace_json: dict, timeout: Optional[float] = None) -> str:
+        """
+        Upload trace JSON to IPFS and return CID.
+
+        Args:
+            trace_json: Trace data as dictionary
+            timeout: Deadline of this call in seconds
+
+        Returns:
+            CID as string
+
+        Raises:
+            ValueError: If trace_json is invalid
+            Exception: If IPFS upload fails
+        """
+        if not isinstance(trace_json, dict):
+            raise ValueError("trace_json must be a dictionary")
+
+        json_str = json.dumps(trace_json, ensure_ascii=False, indent=2)
+        return await self.add_bytes(json_str.encode('utf-8'), timeout)
+
+    async def add_json_str(
+        self,
+        json_str: str,
+        compression: Optional[str] = None,
+        level: Optional[int] = None,
+        timeout: Optional[float] = None
+    ) -> str:
+        """
+        Upload trace JSON string to IPFS and return CID.
+
+        The string is stored exactly as given (or compressed; see
+        IPFSClient.add_json_str()).
+
+        Args:
+            json_str: Trace data as JSON string
+            compression: "zlib" or "lzma" to upload a compressed payload
+            level: Compression level 0-9
+            timeout: Deadline of this call in seconds
+
+        Returns:
+            CID as string
+
+        Raises:
+            ValueError: If json_str is not valid JSON or the compression is invalid
+            Exception: If IPFS upload fails
+        """
+        try:
+            PIPELINE_STATS.count_parse()
+            json.loads(json_str)
+        except json.JSONDecodeError as e:
+            raise ValueError(f"Invalid JSON string: {e}")
+
+        payload = json_str.encode('utf-8')
+        if compression:
+            payload = compress_payload(payload, compression, level)
+        return await self.add_bytes(payload, timeout)
+
+    async def get_bytes(self, cid: str, timeout: Optional[float] = None) -> bytes:
+        """
+        Retrieve raw content from IPFS by CID.
+
+        Args:
+            cid: Content Identifier
+            timeout: Deadline of this call in seconds
+
+        Returns:
+            Content bytes
+
+        Raises:
+            ValueError: If CID is invalid
+            Exception: If IPFS retrieval fails
+        """
+        _check_cid(cid)
+        try:
+            response = await self._post("cat", {"arg": cid}, timeout)
+            return response.content
+        except Exception as e:
+            raise Exception(f"Failed to get content from IPFS (CID: {cid}): {e}")
+
+    async def cat_stream(self, cid: str, timeout: Optional[float] = None) -> AsyncIterator[bytes]:
+        """
+        Retrieve content from IPFS by CID as a stream of byte blocks.
+
+        Args:
+            cid: Content Identifier
+            timeout: Timeout of each read in seconds
+
+        Returns:
+            Async iterator over byte blocks of the content
+
+        Raises:
+            ValueError: If CID is invalid
+            Exception: If IPFS retrieval fails
+        """
+        _check_cid(cid)
+        options = {} if timeout is None else {"timeout": timeout}
+        try:
+            async with self.http.stream("POST", "/cat", params={"arg": cid}, **options) as response:
+                if response.is_error:
+                    await response.aread()
+                    raise Exception(f"IPFS API cat returned {response.status_code}: {response.text}")
+                async for block in response.aiter_bytes():
+                    yield block
+        except Exception as e:
+            raise Exception(f"Failed to stream content from IPFS (CID: {cid}): {e}")
+
+    async def get_json_str(self, cid: str, timeout: Optional[float] = None) -> str:
+        """
+        Retrieve JSON string from IPFS by CID.
+
+        The exact stored formatting is preserved; compressed payloads are
+        decompressed.
+
+        Args:
+            cid: Content Identifier
+            timeout: Deadline of this call in seconds
+
+        Returns:
+            Trace data as JSON string
+
+        Raises:
+            ValueError: If CID is invalid
+            Exception: If IPFS retrieval fails
+        """
+        payload = await self.get_bytes(cid, timeout)
+        try:
+            _, data = decompress_payload(payload)
+            return codecs.decode(data, 'utf-8')
+        except Exception as e:
+            raise Exception(f"Failed to get JSON string from IPFS (CID: {cid}): {e}")
+
+    async def get_json(self, cid: str, timeout: Optional[float] = None) -> dict:
+        """
+        Retrieve JSON from IPFS by CID.
+
+        Args:
+            cid: Content Identifier
+            timeout: Deadline of this call in seconds
+
+        Returns:
+            Trace data as dictionary
+
+        Raises:
+            ValueError: If CID is invalid
+            Exception: If IPFS retrieval fails
+        """
+        json_str = await self.get_json_str(cid, timeout)
+        try:
+            return json.loads(json_str)
+        except Exception as e:
+            raise Exception(f"Failed to get JSON from IPFS (CID: {cid}): {e}")
+
+    async def pin(self, cid: str, timeout: Optional[float] = None) -> None:
+        """
+        Pin content to ensure it's not garbage collected.
+
+        Raises:
+            Exception: If pinning fails
+        """
+        try:
+            await self._post("pin/add", {"arg": cid}, timeout)
+        except Exception as e:
+            raise Exception(f"Failed to pin CID {cid}: {e}")
+
+    async def unpin(self, cid: str, timeout: Optional[float] = None) -> None:
+        """
+        Unpin content to allow garbage collection.
+
+        Raises:
+            Exception: If unpinning fails
+        """
+        try:
+            await self._post("pin/rm", {"arg": cid}, timeout)
+        except Exception as e:
+            raise Exception(f"Failed to unpin CID {cid}: {e}")
+
+    async def get_version(self, timeout: Optional[float] = None) -> dict:
+        """
+        Get IPFS node version information.
+
+        Returns:
+            Dictionary with version info
+        """
+        try:
+            response = await self._post("version", timeout=timeout)
+            return response.json()
+        except Exception as e:
+            raise Exception(f"Failed to get IPFS version: {e}")
+
+    async def is_online(self, timeout: Optional[float] = None) -> bool:
+        """
+        Check if IPFS node is online and accessible.
+
+        Returns:
+            True if node is accessible, False otherwise
+        """
+        try:
+            await self.get_version(timeout)
+            return True
+        except Exception:
+            return False
+
+    async def close(self) -> None:
+        """Close the pooled connections."""
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        """Async context manager entry."""
+        return self
+
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Async context manager exit."""
+        await self.close()
+
+
+def create_async_ipfs_client(
+    api_url: Optional[str] = None,
+    timeout: float = DEFAULT_TIMEOUT
+) -> AsyncIPFSClient:
+    """
+    Factory function to create an async IPFS client.
+
+    Args:
+        api_url: IPFS API endpoint (default: local node)
+        timeout: Default deadline of each call in seconds
+
+    Returns:
+        AsyncIPFSClient instance
+    """
+    return AsyncIPFSClient(api_url or DEFAULT_API_URL, timeout=timeout)
@@ -0,0 +1,257 @@
+"""
+Content-Addressed Attachments for Large Event Fields
+
+Tool results and arguments can be large (file contents, retrieved
+documents). When a builder has an attachment store, every event "content"
+or "args" value above a size threshold is stored as a separate blob and
+the event keeps null in its place. The trace lists the blobs in its
+"attachments" section (event index, field, CID, size and digest); that
+section is covered by the Merkle root, so each blob is committed to by
+its digest.
+
+The core trace stays small and fast to hash, upload and verify. Blobs
+are fetched and checked only on demand (load_attachment(),
+verify_attachments()), and expand_attachments() restores the full events.
+
+Any object with add_bytes(data) -> cid and get_bytes(cid) -> bytes can
+store blobs: an IPFSClient, or LocalBlobStore for a local directory.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .canonical import canonicalize
+from .merkle import HASH_FUNCTIONS, parse_algorithm, LEGACY_ALGORITHM
+from .trace_schema import Attachment, Event, EventRecord
+
+
+# Fields larger than this (UTF-8 or canonical JSON bytes) are offloaded
+DEFAULT_ATTACHMENT_THRESHOLD = 64 * 1024
+
+ATTACHABLE_FIELDS = ("content", "args")
+
+_LOCAL_ID = re.compile(r"^[0-9a-f]{64}$")
+
+
+class LocalBlobStore:
+    """
+    Content-addressed blob store in a local directory.
+
+    Blobs are named by their SHA-256 digest (which serves as their CID)
+    and written atomically, so a store can be shared between processes.
+    """
+
+    def __init__(self, directory: Union[str, Path]):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, cid: str) -> Path:
+        if not isinstance(cid, str) or not _LOCAL_ID.match(cid):
+            raise ValueError(f"Invalid local blob ID: {cid!r}")
+        return self.directory / cid[:2] / cid
+
+    def add_bytes(self, data: bytes) -> str:
+        """
+        Store a blob.
+
+        Args:
+            data: Blob bytes
+
+        Returns:
+            Blob ID (hex SHA-256 digest)
+        """
+        cid = hashlib.sha256(data).hexdigest()
+        path = self._path(cid)
+        if not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        return cid
+
+    def get_bytes(self, cid: str) -> bytes:
+        """
+        Read a blob.
+
+        Raises:
+            ValueError: If the ID is invalid or unknown
+        """
+        try:
+            return self._path(cid).read_bytes()
+        except FileNotFoundError:
+            raise ValueError(f"Unknown local blob: {cid}")
+
+
+def encode_field(field: str, value: Any) -> bytes:
+    """Serialize a field value as stored in its blob"""
+    if field == "content":
+        return value.encode("utf-8")
+    return canonicalize(value)
+
+
+def decode_field(field: str, data: bytes) -> Any:
+    """Parse a blob back into the field value"""
+    if field == "content":
+        return data.decode("utf-8")
+    return json.loads(data)
+
+
+def _digest(data: bytes, hash_name: str) -> str:
+    return HASH_FUNCTIONS[hash_name](data).hexdigest()
+
+
+def offload_event(
+    event: Union[Event, EventRecord],
+    index: int,
+    store: Any,
+    threshold: int = DEFAULT_ATTACHMENT_THRESHOLD,
+    hash_name: str = "sha256"
+) -> Tuple[Union[Event, EventRecord], List[Attachment]]:
+    """
+    Move the large fields of an event into blobs.
+
+    Args:
+        event: Event to check (it is not modified)
+        index: Position of the event in the trace
+        store: Blob store (add_bytes)
+        threshold: Fields larger than this many bytes are offloaded
+        hash_name: Hash function of the trace
+
+    Returns:
+        Tuple of (event, attachments); the event is a copy with the
+        offloaded fields set to None, or the event itself if nothing was
+        offloaded
+    """
+    attachments = []
+    for field in ATTACHABLE_FIELDS:
+        value = getattr(event, field)
+        # UTF-8 takes at most 4 bytes per character, so short strings
+        # need not be encoded to be measured
+        if value is None or (isinstance(value, str) and len(value) * 4 <= threshold):
+            continue
+        data = encode_field(field, value)
+        if len(data) <= threshold:
+            continue
+        attachments.append(Attachment(
+            event=index,
+            field=field,
+            cid=store.add_bytes(data),
+            size=len(data),
+            digest=_digest(data, hash_name)
+        ))
+
+    if not attachments:
+        return event, attachments
+
+    cleared = {attachment.field: None for attachment in attachments}
+    if isinstance(event, EventRecord):
+        event = EventRecord(**{**event.to_dict(), **cleared})
+    else:
+        event = event.model_copy(update=cleared)
+    return event, attachments
+
+
+def _hash_name(trace_data: Dict[str, Any]) -> str:
+    algorithm = (trace_data.get("hashing") or {}).get("algorithm") or LEGACY_ALGORITHM
+    return parse_algorithm(algorithm)[0]
+
+
+def load_attachment(
+    attachment: Union[Attachment, Dict[str, Any]],
+    store: Any,
+    hash_name: str = "sha256"
+) -> Any:
+    """
+    Fetch a blob, check it against its attachment entry and decode it.
+
+    Args:
+        attachment: Entry from the trace's "attachments" section
+        store: Blob store (get_bytes)
+        hash_name: Hash function of the trace
+
+    Returns:
+        The field value
+
+    Raises:
+        ValueError: If the blob does not match its size or digest
+    """
+    if isinstance(attachment, Attachment):
+        attachment = attachment.model_dump()
+
+    data = store.get_bytes(attachment["cid"])
+    if len(data) != attachment["size"]:
+        raise ValueError(
+            f"Attachment {attachment['cid']} has {len(data)} bytes, expected {attachment['size']}"
+        )
+    if _digest(data, hash_name) != attachment["digest"]:
+        raise ValueError(f"Attachment {attachment['cid']} does not match its digest")
+    return decode_field(attachment["field"], data)
+
+
+def verify_attachments(
+    trace_data: Dict[str, Any],
+    store: Any,
+    workers: int = 4
+) -> Dict[Tuple[int, str], Optional[str]]:
+    """
+    Check every blob of a trace against its attachment entry.
+
+    This only checks the blobs; the entries themselves are covered by
+    the trace's Merkle root (see verify.py).
+
+    Args:
+        trace_data: Parsed trace
+        store: Blob store (get_bytes)
+        workers: Blobs fetched in parallel
+
+    Returns:
+        Dictionary mapping (event, field) to None (valid) or an error message
+    """
+    hash_name = _hash_name(trace_data)
+    entries = trace_data.get("attachments") or []
+
+    def check(entry: Dict[str, Any]) -> Optional[str]:
+        try:
+            load_attachment(entry, store, hash_name)
+            return None
+        except Exception as e:
+            return str(e)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        errors = list(pool.map(check, entries))
+    return {(entry["event"], entry["field"]): error for entry, error in zip(entries, errors)}
+
+
+def expand_attachments(trace_data: Dict[str, Any], store: Any) -> Dict[str, Any]:
+    """
+    Restore the offloaded fields of a parsed trace.
+
+    The result is the trace as it was before offloading (without the
+    "attachments" section). It no longer matches the Merkle root, which
+    covers the compact form.
+
+    Args:
+        trace_data: Parsed trace
+        store: Blob store (get_bytes)
+
+    Returns:
+        New trace dictionary; trace_data is not modified
+
+    Raises:
+        ValueError: If a blob does not match its attachment entry
+    """
+    hash_name = _hash_name(trace_data)
+    expanded = {key: value for key, value in trace_data.items() if key != "attachments"}
+    events = list(trace_data.get("events", []))
+    for entry in trace_data.get("attachments") or []:
+        index = entry["event"]
+        events[index] = {**events[index], entry["field"]: load_attachment(entry, store, hash_name)}
+    expanded["events"] = events
+    return expanded
@@ -0,0 +1,205 @@
+"""
+Bulk Trace Building on a Process Pool
+
+Building a trace (validation, serialization and Merkle hashing) is CPU
+bound, so converting many agent runs one at a time in the calling thread
+limits how fast traces can be anchored. bulk_build() fans the builds out
+over a process pool and yields the finished traces either in input order
+or as they complete.
+
+Jobs are submitted lazily and at most max_in_flight are pending at once,
+so memory stays bounded however many jobs the input yields. With
+serialize=True the workers also produce the payload and send back only
+the bytes and the root (SerializedTrace), which is cheaper to transfer
+than a whole TraceJSON.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Union
+
+from .merkle import DEFAULT_ALGORITHM
+from .trace_builder import TraceBuilder
+from .trace_schema import TraceJSON
+
+
+# Pending jobs per worker unless max_in_flight is given
+DEFAULT_IN_FLIGHT_PER_WORKER = 2
+
+
+class SerializedTrace:
+    """A built trace reduced to its payload and the fields needed to anchor it"""
+
+    __slots__ = ("session_id", "model", "trace_version", "algorithm", "merkle_root",
+                 "events_count", "payload")
+
+    def __init__(
+        self,
+        session_id: str,
+        model: str,
+        trace_version: str,
+        algorithm: str,
+        merkle_root: str,
+        events_count: int,
+        payload: bytes
+    ):
+        self.session_id = session_id
+        self.model = model
+        self.trace_version = trace_version
+        self.algorithm = algorithm
+        self.merkle_root = merkle_root
+        self.events_count = events_count
+        self.payload = payload
+
+    @classmethod
+    def from_trace(cls, trace: TraceJSON) -> "SerializedTrace":
+        """Serialize a trace with its Merkle root computed"""
+        return cls(
+            session_id=trace.session.id,
+            model=trace.model.name,
+            trace_version=trace.traceVersion,
+            algorithm=trace.hashing.algorithm,
+            merkle_root=trace.hashing.chunkMerkleRoot,
+            events_count=len(trace.events),
+            payload=trace.payload()
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary (without the payload itself)."""
+        return {
+            "session_id": self.session_id,
+            "model": self.model,
+            "trace_version": self.trace_version,
+            "algorithm": self.algorithm,
+            "merkle_root": self.merkle_root,
+            "events_count": self.events_count,
+            "payload_bytes": len(self.payload)
+        }
+
+
+BulkResult = Union[TraceJSON, SerializedTrace]
+
+
+def _run_job(
+    builder: Callable[..., TraceJSON],
+    job: Dict[str, Any],
+    serialize: bool
+) -> BulkResult:
+    """Build one trace in a worker"""
+    trace = builder(**job)
+    return SerializedTrace.from_trace(trace) if serialize else trace
+
+
+def bulk_build(
+    builder: Callable[..., TraceJSON],
+    jobs: Iterable[Dict[str, Any]],
+    workers: Optional[int] = None,
+    max_in_flight: Optional[int] = None,
+    ordered: bool = True,
+    serialize: bool = False,
+    executor: Optional[Executor] = None
+) -> Iterator[BulkResult]:
+    """
+    Build many traces in parallel.
+
+    Args:
+        builder: Module-level function building a trace from keyword
+            arguments (e.g. TraceBuilder.from_langchain_result); it must be
+            picklable for a process pool
+        jobs: Keyword arguments for each call of builder
+        workers: Worker processes (default: os.cpu_count())
+        max_in_flight: Jobs pending at once (default:
+            DEFAULT_IN_FLIGHT_PER_WORKER per worker)
+        ordered: Yield in input order (True) or as completed (False)
+        serialize: Yield SerializedTrace instead of TraceJSON
+        executor: Executor to use instead of a new process pool (it is
+            not shut down)
+
+    Returns:
+        Iterator over the built traces
+
+    Raises:
+        ValueError: If workers or max_in_flight is not positive
+        Exception: Whatever a failed build raised, when its result is due
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if max_in_flight is None:
+        max_in_flight = workers * DEFAULT_IN_FLIGHT_PER_WORKER
+    if workers < 1 or max_in_flight < 1:
+        raise ValueError("workers and max_in_flight must be positive")
+
+    # Validated above, before the first result is requested
+    return _iter_results(builder, iter(jobs), workers, max_in_flight, ordered, serialize, executor)
+
+
+def _iter_results(
+    builder: Callable[..., TraceJSON],
+    jobs: Iterator[Dict[str, Any]],
+    workers: int,
+    max_in_flight: int,
+    ordered: bool,
+    serialize: bool,
+    executor: Optional[Executor]
+) -> Iterator[BulkResult]:
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers=workers)
+
+    pending: deque = deque()
+
+    def submit_next() -> bool:
+        job = next(jobs, None)
+        if job is None:
+            return False
+        pending.append(executor.submit(_run_job, builder, job, serialize))
+        return True
+
+    try:
+        while len(pending) < max_in_flight and submit_next():
+            pass
+
+        while pending:
+            if ordered:
+                future: Future = pending.popleft()
+            else:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                future = done.pop()
+                pending.remove(future)
+            result = future.result()
+            submit_next()
+            yield result
+    finally:
+        for future in pending:
+            future.cancel()
+        if own_executor:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+def build_langchain_traces(
+    results: Iterable[Dict[str, Any]],
+    session_ids: Optional[Iterable[str]] = None,
+    algorithm: str = DEFAULT_ALGORITHM,
+    **bulk_kwargs: Any
+) -> Iterator[BulkResult]:
+    """
+    Build traces from many LangChain agent results in parallel.
+
+    Args:
+        results: Result dicts from agent.invoke()
+        session_ids: Session IDs, one per result (default: generated)
+        algorithm: Hashing algorithm
+        **bulk_kwargs: Further bulk_build() arguments
+
+    Returns:
+        Iterator over the built traces
+    """
+    if session_ids is None:
+        jobs = ({"result": result, "algorithm": algorithm} for result in results)
+    else:
+        jobs = (
+            {"result": result, "session_id": session_id, "algorithm": algorithm}
+            for result, session_id in zip(results, session_ids)
+        )
+    return bulk_build(TraceBuilder.from_langchain_result, jobs, **bulk_kwargs)
@@ -0,0 +1,291 @@
+"""
+LangChain Callback Handler for Live A2A Traces
+
+TraceCallbackHandler is passed to an agent or model as a callback
+(config={"callbacks": [handler]}) and records events as they happen,
+instead of converting the finished message list afterwards:
+
+- human messages when they are first sent to the chat model
+- AI messages and tool calls when an LLM call ends
+- tool results when a tool call ends
+
+Events get the time they actually happened, and every LLM and tool call
+is timed (with time to first token and tokens per second for streaming
+models); with instrument=True the timings are added to the trace.
+Events are folded into the builder's Merkle accumulator as they arrive,
+so with an "events" algorithm the trace is ready as soon as the agent
+finishes; build() only hashes the metadata leaf.
+"""
+
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.messages import AIMessage, BaseMessage, HumanMessage, ToolMessage
+
+from .trace_builder import TraceBuilder
+from .trace_schema import TraceJSON, StepTiming
+
+
+# Live traces are hashed incrementally, one leaf per event
+LIVE_ALGORITHM = "sha256-events"
+
+
+def output_tokens(message: AIMessage) -> Optional[int]:
+    """Get the number of generated tokens reported with an AI message"""
+    usage = getattr(message, "usage_metadata", None) or {}
+    if usage.get("output_tokens"):
+        return usage["output_tokens"]
+    token_usage = (getattr(message, "response_metadata", None) or {}).get("token_usage") or {}
+    return token_usage.get("completion_tokens") or None
+
+
+def _run_name(serialized: Optional[Dict[str, Any]], kwargs: Dict[str, Any], default: str) -> str:
+    """Get the name of a model or tool from callback arguments"""
+    if kwargs.get("name"):
+        return kwargs["name"]
+    serialized = serialized or {}
+    if serialized.get("name"):
+        return serialized["name"]
+    ids = serialized.get("id") or []
+    return ids[-1] if ids else default
+
+
+class TraceCallbackHandler(BaseCallbackHandler):
+    """
+    Build an A2A trace live from LangChain callbacks.
+
+    Callbacks may arrive from several threads (e.g. tools run in
+    parallel), so events are added under a lock.
+
+    Attributes:
+        builder: TraceBuilder the events and timings are added to
+    """
+
+    def __init__(
+        self,
+        session_id: str = None,
+        algorithm: str = LIVE_ALGORITHM,
+        chunk_size: int = 4096,
+        instrument: bool = False,
+        hash_instrumentation: bool = False,
+        builder: Optional[TraceBuilder] = None
+    ):
+        """
+        Initialize the handler.
+
+        Args:
+            session_id: Session ID of the trace
+            algorithm: Hashing algorithm (an "events" algorithm keeps the
+                root up to date as events arrive)
+            chunk_size: Chunk size for byte-based algorithms
+            instrument: Add the call timings to the trace
+            hash_instrumentation: Cover the timings by the Merkle root
+            builder: Existing builder to add events to (overrides the
+                other arguments)
+        """
+        self.builder = builder or TraceBuilder(
+            session_id, algorithm=algorithm, chunk_size=chunk_size, trusted=True,
+            instrument=instrument, hash_instrumentation=hash_instrumentation
+        )
+        # run_id -> [kind, name, started, perf_counter at start, at first token]
+        self._runs: Dict[Any, list] = {}
+        self._humans_seen = 0
+        self._lock = threading.Lock()
+
+    @property
+    def session_id(self) -> str:
+        return self.builder.session_id
+
+    @property
+    def steps(self) -> List[StepTiming]:
+        """Timings of the finished LLM and tool calls, in end order"""
+        return self.builder.steps
+
+    def start_step(self, run_id: Any, kind: str, name: str) -> None:
+        """Start timing an LLM ("llm") or tool ("tool") call"""
+        started = datetime.now(timezone.utc).isoformat()
+        with self._lock:
+            self._runs[run_id] = [kind, name, started, time.perf_counter(), None]
+
+    def first_token(self, run_id: Any) -> None:
+        """Note the arrival of a streamed token (only the first one counts)"""
+        with self._lock:
+            run = self._runs.get(run_id)
+            if run is not None and run[4] is None:
+                run[4] = time.perf_counter()
+
+    def finish_step(
+        self,
+        run_id: Any,
+        error: Optional[BaseException] = None,
+        output_tokens: Optional[int] = None
+    ) -> Optional[str]:
+        """
+        Record the timing of a call.
+
+        Call this before recording the events the call produced, so the
+        timing points at the first of them.
+
+        Args:
+            run_id: Run ID passed to start_step()
+            error: Exception the call failed with
+            output_tokens: Tokens generated by an LLM call
+
+        Returns:
+            Name of the call (None if it was not started)
+        """
+        ended = time.perf_counter()
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return None
+            kind, name, started, perf_started, perf_first_token = run
+            seconds = ended - perf_started
+
+            first_token_seconds = tokens_per_second = None
+            if perf_first_token is not None:
+                first_token_seconds = perf_first_token - perf_started
+            if output_tokens:
+                # Throughput of the generation after the first token
+                generating = seconds - (first_token_seconds or 0.0)
+                tokens_per_second = output_tokens / (generating if generating > 0 else seconds)
+
+            self.builder.add_step(StepTiming(
+                kind=kind,
+                name=name,
+                started=started,
+                seconds=seconds,
+                event=None if error else len(self.builder.events),
+                error=f"{type(error).__name__}: {error}" if error else None,
+                first_token_seconds=first_token_seconds,
+                output_tokens=output_tokens,
+                tokens_per_second=tokens_per_second
+            ))
+            return name
+
+    def record_inputs(self, messages: List[BaseMessage]) -> None:
+        """Record the human messages of a model input not seen before"""
+        # Agents send the whole conversation on every call; only the
+        # human messages beyond those already recorded are new
+        humans = [m for m in messages if isinstance(m, HumanMessage)]
+        with self._lock:
+            for message in humans[self._humans_seen:]:
+                self.builder.add_message(message)
+            self._humans_seen = max(self._humans_seen, len(humans))
+
+    def record_output(self, message: AIMessage) -> None:
+        """Record a model output (AI message and its tool calls)"""
+        with self._lock:
+            self.builder.add_message(message)
+
+    def record_tool_output(self, output: Any, name: str, tool_call_id: Optional[str] = None) -> None:
+        """Record a tool result"""
+        # Tools called with a tool call return a ToolMessage; plain
+        # invocations return the raw output
+        if not isinstance(output, ToolMessage):
+            output = ToolMessage(
+                content=output if isinstance(output, str) else str(output),
+                name=name,
+                tool_call_id=tool_call_id or ""
+            )
+        with self._lock:
+            self.builder.add_message(output)
+
+    # LLM callbacks
+
+    def on_chat_model_start(
+        self,
+        serialized: Dict[str, Any],
+        messages: List[List[BaseMessage]],
+        *,
+        run_id: UUID,
+        **kwargs: Any
+    ) -> None:
+        """Record human messages not seen before and start timing the call"""
+        self.start_step(run_id, "llm", _run_name(serialized, kwargs, "chat_model"))
+        self.record_inputs(messages[0] if messages else [])
+
+    def on_llm_start(
+        self,
+        serialized: Dict[str, Any],
+        prompts: List[str],
+        *,
+        run_id: UUID,
+        **kwargs: Any
+    ) -> None:
+        """Start timing a completion (non-chat) model call"""
+        self.start_step(run_id, "llm", _run_name(serialized, kwargs, "llm"))
+
+    def on_llm_new_token(self, token: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Note the time to first token of a streaming call"""
+        self.first_token(run_id)
+
+    def on_llm_end(self, response, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record the generated AI messages and tool calls"""
+        # Agents make one call with one candidate; extra candidates were
+        # not chosen and are left out
+        messages = []
+        for generations in response.generations[:1]:
+            for generation in generations[:1]:
+                message = getattr(generation, "message", None)
+                if not isinstance(message, AIMessage):
+                    message = AIMessage(content=generation.text)
+                messages.append(message)
+
+        tokens = output_tokens(messages[0]) if messages else None
+        self.finish_step(run_id, output_tokens=tokens)
+        for message in messages:
+            self.record_output(message)
+
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.finish_step(run_id, error)
+
+    # Tool callbacks
+
+    def on_tool_start(
+        self,
+        serialized: Dict[str, Any],
+        input_str: str,
+        *,
+        run_id: UUID,
+        **kwargs: Any
+    ) -> None:
+        """Start timing a tool call"""
+        self.start_step(run_id, "tool", _run_name(serialized, kwargs, "unknown"))
+
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        """Record the tool result"""
+        name = self.finish_step(run_id) or kwargs.get("name") or "unknown"
+        self.record_tool_output(output, name, kwargs.get("tool_call_id"))
+
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self.finish_step(run_id, error)
+
+    # Results
+
+    def current_root(self) -> str:
+        """Running Merkle root of the events recorded so far"""
+        with self._lock:
+            return self.builder.current_root()
+
+    def build(self, compute_merkle: bool = True) -> TraceJSON:
+        """
+        Build the trace from the events recorded so far.
+
+        Args:
+            compute_merkle: Whether to compute the Merkle root
+
+        Returns:
+            TraceJSON object
+        """
+        with self._lock:
+            return self.builder.build(compute_merkle)
+
+    def timings(self) -> List[Dict[str, Any]]:
+        """Timings of the finished LLM and tool calls as dictionaries"""
+        with self._lock:
+            return [step.model_dump() for step in self.steps]
@@ -0,0 +1,198 @@
+"""
+Canonical JSON Serialization for A2A Trace Hashing
+
+This module encodes JSON values in the JSON Canonicalization Scheme
+(RFC 8785) style used for hashing from trace version a2a-0.3 on:
+
+- object keys sorted by their UTF-16 code units
+- no whitespace
+- strings escaped minimally and written as UTF-8
+- numbers in the shortest round-trip form of ECMAScript Number.toString
+
+Any consumer can recompute the bytes from parsed data, so the root no
+longer depends on how a trace was formatted when it was stored.
+"""
+
+import json
+import math
+from typing import Any, Callable, Dict, Iterable, Iterator, List
+
+# C-accelerated string escaping of the json module (ensure_ascii=False)
+_encode_string: Callable[[str], str] = json.encoder.encode_basestring
+
+# Values json.dumps already writes in canonical form
+_PLAIN_TYPES = (str, int, bool, type(None))
+
+
+def _utf16_key(key: str) -> bytes:
+    """Sort key giving UTF-16 code unit order"""
+    return key.encode("utf-16-be", "surrogatepass")
+
+
+def format_number(value: float) -> str:
+    """
+    Format a number like ECMAScript Number.prototype.toString
+
+    Python's repr gives the shortest digits that round-trip; only the
+    placement of the decimal point and exponent differs from ECMAScript.
+
+    Args:
+        value: int or float
+
+    Returns:
+        Canonical number text
+
+    Raises:
+        ValueError: If the value is NaN or infinite
+    """
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if math.isnan(value) or math.isinf(value):
+        raise ValueError(f"{value} is not allowed in canonical JSON")
+    if value == 0:
+        return "0"
+
+    sign = "-" if value < 0 else ""
+    mantissa, _, exponent = repr(abs(value)).partition("e")
+    integer, _, fraction = mantissa.partition(".")
+    digits = (integer + fraction).strip("0")
+
+    # value = 0.<digits> * 10**point
+    if integer == "0":
+        point = int(exponent or 0) - (len(fraction) - len(fraction.lstrip("0")))
+    else:
+        point = len(integer) + int(exponent or 0)
+
+    if len(digits) <= point <= 21:
+        text = digits + "0" * (point - len(digits))
+    elif 0 < point <= 21:
+        text = digits[:point] + "." + digits[point:]
+    elif -6 < point <= 0:
+        text = "0." + "0" * -point + digits
+    else:
+        text = digits[0] + ("." + digits[1:] if len(digits) > 1 else "")
+        text += "e" + ("+" if point > 0 else "-") + str(abs(point - 1))
+
+    return sign + text
+
+
+def _encode(value: Any, parts: List[str]) -> None:
+    """Append the canonical text of value to parts"""
+    if isinstance(value, str):
+        parts.append(_encode_string(value))
+    elif value is None:
+        parts.append("null")
+    elif value is True:
+        parts.append("true")
+    elif value is False:
+        parts.append("false")
+    elif isinstance(value, (int, float)):
+        parts.append(format_number(value))
+    elif isinstance(value, dict):
+        for key in value:
+            if not isinstance(key, str):
+                raise TypeError(f"Object keys must be strings, not {type(key).__name__}")
+        parts.append("{")
+        first = True
+        for key in sorted(value, key=_utf16_key):
+            if not first:
+                parts.append(",")
+            first = False
+            parts.append(_encode_string(key))
+            parts.append(":")
+            _encode(value[key], parts)
+        parts.append("}")
+    elif isinstance(value, (list, tuple)):
+        parts.append("[")
+        for i, item in enumerate(value):
+            if i:
+                parts.append(",")
+            _encode(item, parts)
+        parts.append("]")
+    else:
+        raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def _needs_slow_path(value: Any) -> bool:
+    """
+    Check whether json.dumps(sort_keys=True) would differ from canonical form
+
+    That is the case for floats (different number formatting), keys whose
+    code point order may differ from UTF-16 order, and any type that is
+    not plain JSON. Only containers are walked; strings are not scanned.
+    """
+    stack = [value]
+    pop, push = stack.pop, stack.extend
+    while stack:
+        item = pop()
+        kind = type(item)
+        if kind is dict:
+            for key in item:
+                if type(key) is not str or not (key.isascii() or max(key) < "\ud800"):
+                    return True
+            push(item.values())
+        elif kind is list or kind is tuple:
+            push(item)
+        elif kind not in _PLAIN_TYPES:
+            return True
+    return False
+
+
+def canonicalize(value: Any) -> bytes:
+    """
+    Encode a JSON value as canonical UTF-8 bytes
+
+    Values without floats or unusual keys (the common case for traces)
+    are encoded by the C json encoder, which gives the same bytes.
+
+    Args:
+        value: Parsed JSON value (dict, list, str, int, float, bool, None)
+
+    Returns:
+        Canonical JSON bytes
+
+    Raises:
+        TypeError: If the value contains non-JSON types
+        ValueError: If the value contains NaN or infinity
+    """
+    if not _needs_slow_path(value):
+        return json.dumps(
+            value, sort_keys=True, separators=(",", ":"), ensure_ascii=False
+        ).encode("utf-8")
+
+    parts: List[str] = []
+    _encode(value, parts)
+    return "".join(parts).encode("utf-8")
+
+
+def iter_canonical_object(
+    value: Dict[str, Any],
+    key: str,
+    items: Iterable[Any]
+) -> Iterator[bytes]:
+    """
+    Encode an object with one lazily produced array member, in pieces
+
+    The pieces joined equal canonicalize() of value with value[key] set
+    to the list of items, but only one item is encoded at a time.
+
+    Args:
+        value: Object without the array member
+        key: Key of the array member
+        items: Items of the array
+
+    Returns:
+        Iterator over canonical JSON bytes
+    """
+    keys = sorted(set(value) | {key}, key=_utf16_key)
+    yield b"{"
+    for i, name in enumerate(keys):
+        yield (b"," if i else b"") + _encode_string(name).encode("utf-8") + b":"
+        if name != key:
+            yield canonicalize(value[name])
+            continue
+        yield b"["
+        for j, item in enumerate(items):
+            yield (b"," if j else b"") + canonicalize(item)
+        yield b"]"
+    yield b"}"
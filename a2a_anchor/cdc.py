@@ -0,0 +1,459 @@
+"""
+Content-Defined Chunking for A2A Traces
+
+This module cuts serialized traces at content-defined boundaries
+(FastCDC-style gear hash with normalized chunking) for the "cdc" hashing
+mode. An insertion only changes the chunks around it, so unchanged regions
+keep their leaf hashes across trace versions and dedupe as IPFS blocks.
+
+LeafHashCache reuses the chunk boundaries and leaf hashes of the previous
+version of a trace, so re-anchoring an updated session only scans and
+hashes the changed region.
+
+With numpy installed (the "cdc" extra) the boundary scan is vectorized;
+without it the same boundaries are found byte by byte, about ten times
+slower.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Iterable, Iterator, List, Optional, Tuple, Union
+
+try:
+    import numpy
+except ImportError:  # optional: the "cdc" extra, only speeds up the boundary scan
+    numpy = None
+
+from .merkle import DigestArray, leaf_hash, BytesLike
+
+
+# Gear table, fixed for all time: changing it changes every "cdc" root
+GEAR = tuple(
+    int.from_bytes(hashlib.sha256(b"a2a-cdc-gear" + bytes([i])).digest()[:8], "big")
+    for i in range(256)
+)
+
+_MASK64 = (1 << 64) - 1
+
+# A hash covers the last 64 bytes; earlier ones are shifted out
+_WINDOW = 64
+
+_GEAR_ARRAY = numpy.array(GEAR, dtype=numpy.uint64) if numpy is not None else None
+
+# Budget of a LeafHashCache: trace bytes plus their boundaries and leaf hashes
+DEFAULT_LEAF_CACHE_BYTES = 64 * 1024 * 1024
+
+
+def cdc_sizes(
+    chunk_size: int = 4096,
+    min_chunk_size: Optional[int] = None,
+    max_chunk_size: Optional[int] = None
+) -> Tuple[int, int, int]:
+    """
+    Resolve (min, avg, max) chunk sizes
+
+    chunk_size is the average size. Missing bounds default to a quarter
+    and eight times the average, as in FastCDC.
+
+    Raises:
+        ValueError: If the sizes are not 0 < min <= avg <= max
+    """
+    min_chunk_size = min_chunk_size or max(chunk_size // 4, 1)
+    max_chunk_size = max_chunk_size or chunk_size * 8
+
+    if not 0 < min_chunk_size <= chunk_size <= max_chunk_size:
+        raise ValueError(
+            f"Invalid CDC sizes: min={min_chunk_size}, avg={chunk_size}, max={max_chunk_size}"
+        )
+
+    return min_chunk_size, chunk_size, max_chunk_size
+
+
+def _masks(avg_size: int) -> Tuple[int, int]:
+    """
+    Return the strict and loose boundary masks for an average size
+
+    Masks select the high bits of the gear hash, which depend on the
+    last 64 bytes. The strict mask (one extra bit) is used below the
+    average size and the loose mask above it, which narrows the chunk
+    size distribution around the average.
+    """
+    bits = max(avg_size.bit_length() - 1, 2)
+    mask_s = ((1 << (bits + 1)) - 1) << (64 - bits - 1)
+    mask_l = ((1 << (bits - 1)) - 1) << (64 - bits + 1)
+    return mask_s, mask_l
+
+
+def next_boundary(
+    data: BytesLike,
+    start: int,
+    end: int,
+    min_size: int,
+    avg_size: int,
+    max_size: int
+) -> int:
+    """
+    Find the end offset of the chunk starting at start
+
+    The result only depends on data[start:end], which is what makes
+    boundaries stable around edits.
+
+    Args:
+        data: Byte buffer
+        start: Offset of the chunk
+        end: End of the data
+        min_size: Minimum chunk size
+        avg_size: Average chunk size
+        max_size: Maximum chunk size
+
+    Returns:
+        Offset just past the last byte of the chunk
+    """
+    remaining = end - start
+    if remaining <= min_size:
+        return end
+
+    mask_s, mask_l = _masks(avg_size)
+    normal = start + min(avg_size, remaining)
+    limit = start + min(max_size, remaining)
+    view = memoryview(data)
+    if numpy is not None:
+        return _next_boundary_numpy(view, start + min_size, normal, limit, mask_s, mask_l)
+
+    gear = GEAR
+    fp = 0
+
+    # The first min_size bytes can never end a chunk, so they are not hashed
+    for offset, byte in enumerate(view[start + min_size:normal], start + min_size):
+        fp = ((fp << 1) + gear[byte]) & _MASK64
+        if not fp & mask_s:
+            return offset + 1
+
+    for offset, byte in enumerate(view[normal:limit], normal):
+        fp = ((fp << 1) + gear[byte]) & _MASK64
+        if not fp & mask_l:
+            return offset + 1
+
+    return limit
+
+
+def _window_hashes(view: memoryview, scan: int, lo: int, hi: int) -> "numpy.ndarray":
+    """Gear hashes at offsets lo..hi-1 of a scan that started at offset scan"""
+    base = max(lo - (_WINDOW - 1), scan)
+    # Bytes before the scan did not enter the hash: their gear values are 0
+    fp = numpy.zeros(hi - lo + _WINDOW - 1, dtype=numpy.uint64)
+    fp[_WINDOW - 1 - (lo - base):] = _GEAR_ARRAY[numpy.frombuffer(view[base:hi], dtype=numpy.uint8)]
+    # Doubling: after the step for span, fp[i] covers 2 * span bytes ending at i
+    span = 1
+    while span < _WINDOW:
+        fp[span:] += fp[:-span] << numpy.uint64(span)
+        span *= 2
+    return fp[_WINDOW - 1:]
+
+
+def _next_boundary_numpy(
+    view: memoryview,
+    scan: int,
+    normal: int,
+    limit: int,
+    mask_s: int,
+    mask_l: int
+) -> int:
+    """next_boundary() from offset scan on, hashing whole windows with numpy"""
+    # Hash in steps of the strict region: most chunks end soon after it
+    step = max(normal - scan, _WINDOW)
+    for start, stop, mask in ((scan, normal, mask_s), (normal, limit, mask_l)):
+        mask = numpy.uint64(mask)
+        for lo in range(start, stop, step):
+            hits = numpy.flatnonzero(_window_hashes(view, scan, lo, min(lo + step, stop)) & mask == 0)
+            if hits.size:
+                return lo + int(hits[0]) + 1
+    return limit
+
+
+def cdc_boundaries(
+    data: BytesLike,
+    min_size: int,
+    avg_size: int,
+    max_size: int,
+    start: int = 0
+) -> List[int]:
+    """
+    Compute the end offsets of all chunks of data[start:]
+
+    Returns:
+        List of chunk end offsets (the last one is len(data))
+    """
+    end = len(data)
+    boundaries = []
+    while start < end:
+        start = next_boundary(data, start, end, min_size, avg_size, max_size)
+        boundaries.append(start)
+    return boundaries
+
+
+def chunk_cdc(
+    data: BytesLike,
+    chunk_size: int = 4096,
+    min_chunk_size: Optional[int] = None,
+    max_chunk_size: Optional[int] = None
+) -> List[memoryview]:
+    """
+    Split bytes into content-defined chunks without copying
+
+    Args:
+        data: Byte buffer to split
+        chunk_size: Average chunk size in bytes
+        min_chunk_size: Minimum chunk size (default: chunk_size // 4)
+        max_chunk_size: Maximum chunk size (default: chunk_size * 8)
+
+    Returns:
+        List of memoryview slices over data
+    """
+    sizes = cdc_sizes(chunk_size, min_chunk_size, max_chunk_size)
+    view = memoryview(data)
+    chunks = []
+    start = 0
+    for end in cdc_boundaries(view, *sizes):
+        chunks.append(view[start:end])
+        start = end
+    return chunks
+
+
+def iter_cdc_chunks(
+    blocks: Iterable[BytesLike],
+    chunk_size: int = 4096,
+    min_chunk_size: Optional[int] = None,
+    max_chunk_size: Optional[int] = None
+) -> Iterator[BytesLike]:
+    """
+    Re-cut arbitrary byte blocks into content-defined chunks
+
+    At most max_chunk_size bytes plus one block are buffered. The chunks
+    are the same as chunk_cdc() over the concatenated blocks.
+    """
+    sizes = cdc_sizes(chunk_size, min_chunk_size, max_chunk_size)
+    max_size = sizes[2]
+    pending = bytearray()
+
+    for block in blocks:
+        pending += block
+        start = 0
+        # With max_size bytes available a boundary does not depend on later data
+        while len(pending) - start >= max_size:
+            end = next_boundary(pending, start, len(pending), *sizes)
+            yield bytes(pending[start:end])
+            start = end
+        del pending[:start]
+
+    start = 0
+    while start < len(pending):
+        end = next_boundary(pending, start, len(pending), *sizes)
+        yield bytes(pending[start:end])
+        start = end
+
+
+class _CachedTrace:
+    """Chunk boundaries and leaf hashes of one trace version"""
+
+    __slots__ = ("data", "boundaries", "digests")
+
+    def __init__(self, data: bytes, boundaries: List[int], digests: DigestArray):
+        self.data = data
+        self.boundaries = boundaries
+        self.digests = digests
+
+    @property
+    def size(self) -> int:
+        """Bytes held: the trace, one offset and one leaf hash per chunk"""
+        return len(self.data) + len(self.boundaries) * (8 + self.digests.digest_size)
+
+
+class LeafHashCache:
+    """
+    Reuse "cdc" leaf hashes between versions of the same trace.
+
+    For each key (e.g. a session ID) the previous bytes, boundaries and
+    leaf hashes are kept. A new version is compared against them: chunks
+    inside the common prefix are reused as-is, chunking restarts at the
+    last boundary before the first changed byte, and stops as soon as a
+    new boundary lines up with an old one inside the common suffix. Only
+    the bytes in between are scanned and hashed.
+
+    Attributes:
+        max_bytes: Budget of the cached traces, boundaries and leaf hashes
+            (least recently used traces are evicted; larger traces are
+            not kept)
+        hashed_bytes: Bytes scanned and hashed since creation
+        reused_chunks: Leaf hashes taken from the cache since creation
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_LEAF_CACHE_BYTES):
+        """
+        Initialize an empty cache.
+
+        Args:
+            max_bytes: Budget of the cache in bytes
+
+        Raises:
+            ValueError: If max_bytes is negative
+        """
+        if max_bytes < 0:
+            raise ValueError("Cache budget must not be negative")
+        self.max_bytes = max_bytes
+        self.hashed_bytes = 0
+        self.reused_chunks = 0
+        self._entries: "OrderedDict[str, _CachedTrace]" = OrderedDict()
+        self._bytes = 0
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def cached_bytes(self) -> int:
+        """Bytes held by the cached traces"""
+        return self._bytes
+
+    def clear(self) -> None:
+        """Drop all cached traces"""
+        self._entries.clear()
+        self._bytes = 0
+
+    def digests(
+        self,
+        key: str,
+        data: Union[bytes, bytearray, memoryview],
+        chunk_size: int = 4096,
+        min_chunk_size: Optional[int] = None,
+        max_chunk_size: Optional[int] = None,
+        hash_name: str = "sha256"
+    ) -> DigestArray:
+        """
+        Compute the "cdc" leaf hashes of data, reusing the previous version
+
+        Args:
+            key: Cache key of the trace (e.g. session ID)
+            data: Serialized trace bytes
+            chunk_size: Average chunk size in bytes
+            min_chunk_size: Minimum chunk size
+            max_chunk_size: Maximum chunk size
+            hash_name: Hash function name
+
+        Returns:
+            Leaf hashes as a DigestArray, identical to hashing chunk_cdc(data)
+        """
+        sizes = cdc_sizes(chunk_size, min_chunk_size, max_chunk_size)
+        data = bytes(data)
+        cache_key = (key, hash_name, sizes)
+        previous = self._entries.get(cache_key)
+
+        if previous is not None and previous.data == data:
+            self.reused_chunks += len(previous.digests)
+            self._entries.move_to_end(cache_key)
+            return previous.digests[:]
+
+        if previous is None:
+            boundaries = cdc_boundaries(data, *sizes)
+            digests = self._hash_range(data, 0, boundaries, hash_name)
+        else:
+            boundaries, digests = self._update(previous, data, sizes, hash_name)
+
+        self._remember(cache_key, _CachedTrace(data, boundaries, digests))
+        return digests
+
+    def _remember(self, cache_key: tuple, entry: _CachedTrace) -> None:
+        """Keep entry as the latest version, evicting to fit the budget"""
+        old = self._entries.pop(cache_key, None)
+        if old is not None:
+            self._bytes -= old.size
+        if entry.size > self.max_bytes:
+            return
+        self._entries[cache_key] = entry
+        self._bytes += entry.size
+        while self._bytes > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= evicted.size
+
+    def _hash_range(
+        self,
+        data: bytes,
+        start: int,
+        boundaries: List[int],
+        hash_name: str
+    ) -> DigestArray:
+        """Hash the chunks ending at boundaries, the first one starting at start"""
+        view = memoryview(data)
+        digests = DigestArray()
+        for end in boundaries:
+            digests.append(leaf_hash(view[start:end], hash_name))
+            self.hashed_bytes += end - start
+            start = end
+        return digests
+
+    def _update(
+        self,
+        previous: _CachedTrace,
+        data: bytes,
+        sizes: Tuple[int, int, int],
+        hash_name: str
+    ) -> Tuple[List[int], DigestArray]:
+        """Rechunk only the region of data that differs from previous"""
+        old = previous.data
+        prefix = _common_prefix(old, data)
+        suffix = _common_suffix(old, data, limit=min(len(old), len(data)) - prefix)
+        shift = len(data) - len(old)
+
+        # Chunks that end inside the common prefix are unchanged, except the
+        # old last chunk, which may have been cut short by the end of data
+        keep = 0
+        while keep < len(previous.boundaries) - 1 and previous.boundaries[keep] <= prefix:
+            keep += 1
+        boundaries = previous.boundaries[:keep]
+        digests = previous.digests[:keep]
+        self.reused_chunks += keep
+
+        start = boundaries[-1] if boundaries else 0
+        old_index = {boundary: i for i, boundary in enumerate(previous.boundaries)}
+        view = memoryview(data)
+        end = len(data)
+
+        while start < end:
+            # A boundary inside the common suffix that matches an old one
+            # means the rest of the chunks are the old ones, shifted
+            if start >= end - suffix and start - shift in old_index:
+                index = old_index[start - shift] + 1
+                boundaries.extend(b + shift for b in previous.boundaries[index:])
+                digests.extend(previous.digests[index:])
+                self.reused_chunks += len(previous.boundaries) - index
+                break
+
+            stop = next_boundary(view, start, end, *sizes)
+            digests.append(leaf_hash(view[start:stop], hash_name))
+            self.hashed_bytes += stop - start
+            boundaries.append(stop)
+            start = stop
+
+        return boundaries, digests
+
+
+def _common_prefix(a: bytes, b: bytes) -> int:
+    """Length of the common prefix of a and b, found by bisecting slice comparisons"""
+    a, b = memoryview(a), memoryview(b)
+    low, high = 0, min(len(a), len(b))
+    if a[:high] == b[:high]:
+        return high
+    # Invariant: a[:low] == b[:low] and a[:high] != b[:high]
+    while high - low > 1:
+        mid = (low + high) // 2
+        if a[low:mid] == b[low:mid]:
+            low = mid
+        else:
+            high = mid
+    return low
+
+
+def _common_suffix(a: bytes, b: bytes, limit: int) -> int:
+    """Length of the common suffix of a and b, at most limit bytes"""
+    if limit <= 0:
+        return 0
+    return _common_prefix(memoryview(a)[-limit:][::-1], memoryview(b)[-limit:][::-1])
@@ -0,0 +1,128 @@
+"""
+Latency Reports for Instrumented A2A Traces
+
+Instrumented traces (see TraceBuilder(instrument=True)) carry the timing
+of every LLM and tool call in their "instrumentation" section. This
+module aggregates those timings over a directory of stored traces, e.g.
+to show that anchored sessions met a latency target.
+
+Only the header of each trace is parsed (see TraceReader), so large
+traces are read without loading their events.
+"""
+
+import math
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+from .pipeline import HASHING_SUFFIX
+from .trace_reader import TraceReader
+
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    """Nearest-rank percentile of sorted values (None if there are none)"""
+    if not values:
+        return None
+    rank = max(1, math.ceil(q / 100 * len(values)))
+    return values[rank - 1]
+
+
+def _mean(values: List[float]) -> Optional[float]:
+    return sum(values) / len(values) if values else None
+
+
+class _StepStats:
+    """Accumulates the timings of one group of calls"""
+
+    def __init__(self):
+        self.seconds: List[float] = []
+        self.first_token: List[float] = []
+        self.throughput: List[float] = []
+        self.output_tokens = 0
+        self.errors = 0
+
+    def add(self, step: Dict[str, Any]) -> None:
+        self.seconds.append(float(step.get("seconds") or 0.0))
+        if step.get("error"):
+            self.errors += 1
+        if step.get("first_token_seconds") is not None:
+            self.first_token.append(float(step["first_token_seconds"]))
+        if step.get("tokens_per_second") is not None:
+            self.throughput.append(float(step["tokens_per_second"]))
+        self.output_tokens += step.get("output_tokens") or 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        seconds = sorted(self.seconds)
+        first_token = sorted(self.first_token)
+        return {
+            "count": len(seconds),
+            "errors": self.errors,
+            "total_seconds": sum(seconds),
+            "mean_seconds": _mean(seconds),
+            "p50_seconds": _percentile(seconds, 50),
+            "p95_seconds": _percentile(seconds, 95),
+            "max_seconds": seconds[-1] if seconds else None,
+            "mean_first_token_seconds": _mean(first_token),
+            "p95_first_token_seconds": _percentile(first_token, 95),
+            "output_tokens": self.output_tokens,
+            "mean_tokens_per_second": _mean(self.throughput)
+        }
+
+
+def latency_report(directory: Union[str, Path], pattern: str = "*.json") -> Dict[str, Any]:
+    """
+    Aggregate the call timings of the traces in a directory.
+
+    Args:
+        directory: Directory of stored traces (JSON, optionally compressed)
+        pattern: Glob pattern of the trace files
+
+    Returns:
+        Dictionary with the number of traces read, instrumented, hashed
+        (instrumented with timings covered by the Merkle root) and skipped
+        (unreadable files), and latency statistics per call kind ("llm",
+        "tool") and per "<kind>:<name>"
+
+    Raises:
+        ValueError: If directory is not a directory
+    """
+    directory = Path(directory)
+    if not directory.is_dir():
+        raise ValueError(f"Not a directory: {directory}")
+
+    by_kind: Dict[str, _StepStats] = {}
+    by_name: Dict[str, _StepStats] = {}
+    traces = instrumented = hashed = 0
+    skipped: List[str] = []
+
+    for path in sorted(directory.glob(pattern)):
+        # Hashing sections kept beside stored traces are not traces
+        if path.name.endswith(HASHING_SUFFIX):
+            continue
+        try:
+            header = TraceReader(path).header
+        except (ValueError, UnicodeDecodeError):
+            skipped.append(str(path))
+            continue
+
+        traces += 1
+        instrumentation = header.get("instrumentation") or {}
+        steps = instrumentation.get("steps") or []
+        if not steps:
+            continue
+        instrumented += 1
+        if instrumentation.get("hashed"):
+            hashed += 1
+        for step in steps:
+            kind = step.get("kind", "unknown")
+            by_kind.setdefault(kind, _StepStats()).add(step)
+            by_name.setdefault(f"{kind}:{step.get('name', 'unknown')}", _StepStats()).add(step)
+
+    return {
+        "traces": traces,
+        "instrumented": instrumented,
+        "hashed": hashed,
+        "skipped": skipped,
+        "by_kind": {kind: stats.to_dict() for kind, stats in sorted(by_kind.items())},
+        "by_name": {name: stats.to_dict() for name, stats in sorted(by_name.items())}
+    }
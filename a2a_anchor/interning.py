@@ -0,0 +1,173 @@
+"""
+Intra-Trace Interning of Repeated Event Payloads
+
+Agent loops repeat the same tool arguments and results many times (e.g.
+a retry cycle checking the same draft). When a builder interns, every
+event "content" or "args" value of at least min_size bytes that occurs
+at least twice is stored once in the trace's "interned" table; the
+events hold a reference {"$ref": n} to entry n in its place. Values that
+occur once stay inline, so a trace without repeats does not grow.
+
+Each distinct value is then serialized and hashed once, however often it
+repeats. The table is part of the trace metadata and covered by the
+Merkle root. expand_interned() restores the original events exactly.
+"""
+
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from .canonical import canonicalize
+from .trace_schema import Event, EventRecord, InternEntry, InternTable
+
+
+# Values shorter than this (characters or canonical JSON bytes) stay inline
+DEFAULT_INTERN_MIN_SIZE = 128
+
+# Values that repeat less often than this stay inline
+MIN_INTERN_COUNT = 2
+
+INTERNABLE_FIELDS = ("content", "args")
+
+REF_KEY = "$ref"
+
+
+def is_intern_ref(value: Any) -> bool:
+    """Whether a field value has the form of a reference, {"$ref": n}"""
+    return (isinstance(value, dict) and len(value) == 1 and
+            isinstance(value.get(REF_KEY), int) and not isinstance(value[REF_KEY], bool))
+
+
+class InternTableBuilder:
+    """
+    Count the internable values of a trace while events are added.
+
+    Which values repeat is only known once all events are there, so
+    intern() derives the interned events and the table from the events
+    at build time, before they are hashed.
+    """
+
+    def __init__(self, min_size: int = DEFAULT_INTERN_MIN_SIZE):
+        self.min_size = min_size
+        self.refs = 0
+        self.values = 0
+        self._counts: Dict[Any, int] = {}
+        # Lookup keys of the internable fields of each added event
+        self._keys: List[Tuple[Optional[Any], ...]] = []
+
+    def _key(self, field: str, value: Any) -> Optional[Any]:
+        """Lookup key of a value, or None if it stays inline"""
+        if value is None:
+            return None
+        if field == "content":
+            return ("content", value) if isinstance(value, str) and len(value) >= self.min_size else None
+        data = canonicalize(value)
+        # Args that look like a reference are always interned, so that
+        # every reference-shaped field of an interned trace is one
+        return ("args", data) if len(data) >= self.min_size or is_intern_ref(value) else None
+
+    def add_event(self, event: Union[Event, EventRecord]) -> None:
+        """
+        Count the internable fields of the next event.
+
+        Args:
+            event: Event added to the trace
+        """
+        keys = tuple(self._key(field, getattr(event, field)) for field in INTERNABLE_FIELDS)
+        for key in keys:
+            if key is not None:
+                self._counts[key] = self._counts.get(key, 0) + 1
+        self._keys.append(keys)
+
+    def intern(
+        self,
+        events: List[Union[Event, EventRecord]]
+    ) -> Tuple[List[Union[Event, EventRecord]], Optional[InternTable]]:
+        """
+        Replace the repeated fields of the added events with references.
+
+        Args:
+            events: The events passed to add_event(), in order (they are
+                not modified)
+
+        Returns:
+            Tuple of (events with references, table); the table is None
+            and the events are returned as they are if nothing repeats
+
+        Raises:
+            ValueError: If the events are not those that were added
+        """
+        if len(events) != len(self._keys):
+            raise ValueError(f"{len(self._keys)} events were added, got {len(events)}")
+
+        entries: List[InternEntry] = []
+        index: Dict[Any, int] = {}
+        interned: List[Union[Event, EventRecord]] = []
+        refs = 0
+
+        for event, keys in zip(events, self._keys):
+            replaced = {}
+            for field, key in zip(INTERNABLE_FIELDS, keys):
+                if key is None:
+                    continue
+                value = getattr(event, field)
+                if self._counts[key] < MIN_INTERN_COUNT and not is_intern_ref(value):
+                    continue
+                entry = index.get(key)
+                if entry is None:
+                    entry = index[key] = len(entries)
+                    entries.append(InternEntry(value=value))
+                replaced[field] = {REF_KEY: entry}
+                refs += 1
+
+            if not replaced:
+                interned.append(event)
+            elif isinstance(event, EventRecord):
+                interned.append(EventRecord(**{**event.to_dict(), **replaced}))
+            else:
+                interned.append(event.model_copy(update=replaced))
+
+        self.refs, self.values = refs, len(entries)
+        if not entries:
+            return list(events), None
+        return interned, InternTable(entries=entries)
+
+    def stats(self) -> Dict[str, int]:
+        """Number of references and distinct values of the last intern()"""
+        return {"refs": self.refs, "values": self.values}
+
+
+def expand_interned(trace_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Restore the interned fields of a parsed trace.
+
+    The result equals the trace as built without interning (without the
+    "interned" section). It no longer matches the Merkle root, which
+    covers the interned form.
+
+    Args:
+        trace_data: Parsed trace
+
+    Returns:
+        New trace dictionary; trace_data is not modified
+
+    Raises:
+        ValueError: If an event refers to an entry that does not exist
+    """
+    expanded = {key: value for key, value in trace_data.items() if key != "interned"}
+    if not trace_data.get("interned"):
+        return expanded
+    values = [entry["value"] for entry in trace_data["interned"].get("entries", [])]
+
+    events = []
+    for event in trace_data.get("events", []):
+        restored = {}
+        for field in INTERNABLE_FIELDS:
+            ref = event.get(field)
+            if not is_intern_ref(ref):
+                continue
+            if not 0 <= ref[REF_KEY] < len(values):
+                raise ValueError(f"Event refers to missing intern entry {ref[REF_KEY]}")
+            restored[field] = values[ref[REF_KEY]]
+        events.append({**event, **restored} if restored else event)
+
+    expanded["events"] = events
+    return expanded
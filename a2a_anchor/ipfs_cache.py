@@ -0,0 +1,472 @@
+"""
+CID-Keyed Read Cache for IPFS Retrievals
+
+Content under a CID never changes, so a fetched payload can be kept for
+as long as there is room for it. CIDCache has two tiers: an in-memory
+LRU bounded by its total bytes, and an optional directory on disk (one
+file per CID, also bounded by size and evicted least recently used
+first). CachingIPFSClient puts the cache in front of an IPFSClient's
+reads, so re-verifying the same anchors (TraceVerifier, the app's verify
+button) reads the trace and its segments and attachments locally.
+
+The disk tier trusts its own files. That cannot make a tampered trace
+verify: verification still recomputes the Merkle root and compares it
+with the root anchored on XRPL. A corrupted file could make a valid
+anchor fail, though, so TraceVerifier evicts the cached content a failed
+verification read (CIDCache.evict) and verifies once more from IPFS.
+"""
+
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+from .payload import decompress_payload
+
+
+DEFAULT_MEMORY_BYTES = 64 * 1024 * 1024
+DEFAULT_DISK_BYTES = 1024 * 1024 * 1024
+
+# Seconds after which the disk usage is read from the directory again, so
+# files that other processes add to a shared directory are counted
+DEFAULT_DISK_RESCAN_INTERVAL = 60.0
+
+# Block size of cat_stream() when serving cached content
+STREAM_BLOCK_SIZE = 64 * 1024
+
+# CIDv0 (base58) and CIDv1 (base32/base36) strings; nothing path-like
+_CID = re.compile(r"^[A-Za-z0-9]{8,128}$")
+
+
+class CacheStats:
+    """Hit, miss and eviction counters of a CIDCache"""
+
+    __slots__ = ("memory_hits", "disk_hits", "misses", "memory_evictions",
+                 "disk_evictions", "bytes_fetched")
+
+    def __init__(self):
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.memory_evictions = 0
+        self.disk_evictions = 0
+        self.bytes_fetched = 0
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups served from either tier (0.0 if none)"""
+        lookups = self.memory_hits + self.disk_hits + self.misses
+        return (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "memory_evictions": self.memory_evictions,
+            "disk_evictions": self.disk_evictions,
+            "bytes_fetched": self.bytes_fetched
+        }
+
+
+class CIDCache:
+    """
+    Two-tier cache of immutable content keyed by CID.
+
+    Lookups check memory, then disk (promoting disk hits into memory).
+    Items larger than a tier's budget are not kept in that tier. The
+    cache is thread-safe; disk files are written atomically, so one
+    directory can be shared between processes. The disk usage is counted
+    as files are written and read from the directory only when the count
+    exceeds the budget or is older than disk_rescan_interval.
+
+    Attributes:
+        max_memory_bytes: Budget of the memory tier
+        directory: Directory of the disk tier (None: memory only)
+        max_disk_bytes: Budget of the disk tier
+        disk_rescan_interval: Seconds between reads of the disk usage
+        stats: CacheStats of this cache
+    """
+
+    def __init__(
+        self,
+        max_memory_bytes: int = DEFAULT_MEMORY_BYTES,
+        directory: Optional[Union[str, Path]] = None,
+        max_disk_bytes: int = DEFAULT_DISK_BYTES,
+        disk_rescan_interval: float = DEFAULT_DISK_RESCAN_INTERVAL
+    ):
+        """
+        Initialize the cache; an existing disk directory is reused.
+
+        Args:
+            max_memory_bytes: Budget of the memory tier (0 disables it)
+            directory: Directory of the disk tier (default: no disk tier)
+            max_disk_bytes: Budget of the disk tier
+            disk_rescan_interval: Seconds after which the disk usage is
+                read from the directory again (0: on every write)
+
+        Raises:
+            ValueError: If a budget is negative
+        """
+        if max_memory_bytes < 0 or max_disk_bytes < 0:
+            raise ValueError("Cache budgets must not be negative")
+
+        self.max_memory_bytes = max_memory_bytes
+        self.max_disk_bytes = max_disk_bytes
+        self.disk_rescan_interval = disk_rescan_interval
+        self.directory = Path(directory) if directory is not None else None
+        self.stats = CacheStats()
+
+        self._lock = threading.Lock()
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._memory_bytes = 0
+        # Estimated disk usage and when it was last read from the directory
+        self._disk_bytes = 0
+        self._disk_scanned = 0.0
+        # Held by the thread that scans the directory, so others skip it
+        self._scan_lock = threading.Lock()
+
+        if self.directory is not None:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._evict_disk()
+
+    @property
+    def memory_bytes(self) -> int:
+        """Bytes held in the memory tier"""
+        return self._memory_bytes
+
+    @property
+    def disk_bytes(self) -> int:
+        """Bytes held in the disk tier, including files of other processes"""
+        if self.directory is None:
+            return 0
+        disk_bytes = sum(size for _, size, _ in self._disk_usage())
+        with self._lock:
+            self._disk_bytes = disk_bytes
+            self._disk_scanned = time.monotonic()
+        return disk_bytes
+
+    def _path(self, cid: str) -> Optional[Path]:
+        """File of a CID in the disk tier (None: not kept on disk)"""
+        if self.directory is None or not isinstance(cid, str) or not _CID.match(cid):
+            return None
+        # CIDv0 all start with "Qm", so shard by the end of the CID
+        return self.directory / cid[-2:] / cid
+
+    def _disk_files(self):
+        return (path for path in self.directory.glob("*/*") if path.is_file() and _CID.match(path.name))
+
+    def _disk_usage(self) -> List[Tuple[Path, int, float]]:
+        """(path, size, mtime) of the files in the disk tier"""
+        usage = []
+        for path in self._disk_files():
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                # Evicted by another process sharing the directory
+                continue
+            usage.append((path, stat.st_size, stat.st_mtime))
+        return usage
+
+    def _remember(self, cid: str, data: bytes) -> None:
+        """Put data into the memory tier (lock held)"""
+        if len(data) > self.max_memory_bytes:
+            return
+        old = self._memory.pop(cid, None)
+        if old is not None:
+            self._memory_bytes -= len(old)
+        self._memory[cid] = data
+        self._memory_bytes += len(data)
+        while self._memory_bytes > self.max_memory_bytes:
+            _, evicted = self._memory.popitem(last=False)
+            self._memory_bytes -= len(evicted)
+            self.stats.memory_evictions += 1
+
+    def _evict_disk(self) -> None:
+        """
+        Remove least recently used files until the disk tier fits
+
+        The usage is read from the directory, since other processes may
+        share it. Runs without the lock; if another thread is already
+        scanning, it is left to that thread.
+        """
+        if not self._scan_lock.acquire(blocking=False):
+            return
+        try:
+            usage = self._disk_usage()
+            disk_bytes = sum(size for _, size, _ in usage)
+            evictions = 0
+            if disk_bytes > self.max_disk_bytes:
+                for path, size, _ in sorted(usage, key=lambda item: item[2]):
+                    if disk_bytes <= self.max_disk_bytes:
+                        break
+                    path.unlink(missing_ok=True)
+                    disk_bytes -= size
+                    evictions += 1
+            with self._lock:
+                self._disk_bytes = disk_bytes
+                self._disk_scanned = time.monotonic()
+                self.stats.disk_evictions += evictions
+        finally:
+            self._scan_lock.release()
+
+    def get(self, cid: str) -> Optional[bytes]:
+        """
+        Look up the content of a CID.
+
+        Args:
+            cid: Content Identifier
+
+        Returns:
+            Content bytes, or None on a miss
+        """
+        with self._lock:
+            data = self._memory.get(cid)
+            if data is not None:
+                self._memory.move_to_end(cid)
+                self.stats.memory_hits += 1
+                return data
+
+        # Files are read without the lock, so memory hits never wait on disk
+        path = self._path(cid)
+        if path is not None:
+            try:
+                data = path.read_bytes()
+                # The modification time orders disk evictions
+                os.utime(path)
+            except FileNotFoundError:
+                data = None
+
+        with self._lock:
+            if data is None:
+                self.stats.misses += 1
+                return None
+            self.stats.disk_hits += 1
+            self._remember(cid, data)
+            return data
+
+    def put(self, cid: str, data: bytes, fetched: bool = False) -> None:
+        """
+        Store the content of a CID in both tiers.
+
+        Content of a CID that is not a plain CID string (e.g. an ID of a
+        test double) is only kept in memory.
+
+        Args:
+            cid: Content Identifier
+            data: Content bytes
+            fetched: data was just fetched from IPFS (counted in stats)
+        """
+        data = bytes(data)
+        written = False
+        path = self._path(cid)
+        if path is not None and len(data) <= self.max_disk_bytes and not path.exists():
+            path.parent.mkdir(exist_ok=True)
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+            written = True
+
+        with self._lock:
+            if fetched:
+                self.stats.bytes_fetched += len(data)
+            self._remember(cid, data)
+            if written:
+                self._disk_bytes += len(data)
+                rescan = (self._disk_bytes > self.max_disk_bytes or
+                          time.monotonic() - self._disk_scanned >= self.disk_rescan_interval)
+            else:
+                rescan = False
+
+        if rescan:
+            self._evict_disk()
+
+    def evict(self, cid: str) -> bool:
+        """
+        Remove the content of a CID from both tiers.
+
+        Used when cached content turns out to be corrupted, so that the
+        next lookup misses and it is fetched again.
+
+        Args:
+            cid: Content Identifier
+
+        Returns:
+            Whether anything was removed
+        """
+        with self._lock:
+            data = self._memory.pop(cid, None)
+            removed = data is not None
+            if removed:
+                self._memory_bytes -= len(data)
+
+        path = self._path(cid)
+        if path is not None:
+            try:
+                size = path.stat().st_size
+                path.unlink()
+            except FileNotFoundError:
+                pass
+            else:
+                with self._lock:
+                    self._disk_bytes = max(self._disk_bytes - size, 0)
+                removed = True
+        return removed
+
+    def __contains__(self, cid: str) -> bool:
+        with self._lock:
+            if cid in self._memory:
+                return True
+        path = self._path(cid)
+        return path is not None and path.exists()
+
+    def clear(self) -> None:
+        """Remove all cached content (the counters are kept)"""
+        with self._lock:
+            self._memory.clear()
+            self._memory_bytes = 0
+        if self.directory is not None:
+            for path in list(self._disk_files()):
+                path.unlink(missing_ok=True)
+            with self._lock:
+                self._disk_bytes = 0
+
+
+class CachingIPFSClient:
+    """
+    IPFS client whose reads go through a CIDCache.
+
+    get_bytes(), get_json_str(), get_json() and cat_stream() are served
+    from the cache when possible; everything else is passed to the
+    wrapped client. Uploads through add_bytes() are cached as well, so a
+    trace anchored through this client verifies without downloading it.
+
+    Attributes:
+        ipfs: Wrapped IPFSClient
+        cache: CIDCache in front of its reads
+        cache_hits: CIDs whose reads were served from the cache, in order
+    """
+
+    def __init__(self, ipfs_client: Any, cache: Optional[CIDCache] = None):
+        """
+        Initialize the caching client.
+
+        Args:
+            ipfs_client: IPFSClient (or any object with its methods)
+            cache: Cache to use (default: a memory-only CIDCache)
+        """
+        self.ipfs = ipfs_client
+        self.cache = cache if cache is not None else CIDCache()
+        self.cache_hits: List[str] = []
+
+    @property
+    def api_url(self) -> str:
+        return self.ipfs.api_url
+
+    def get_bytes(self, cid: str) -> bytes:
+        """
+        Retrieve raw content by CID, from the cache if possible.
+
+        Raises:
+            ValueError: If CID is invalid
+            Exception: If IPFS retrieval fails
+        """
+        if not cid or not isinstance(cid, str):
+            raise ValueError("CID must be a non-empty string")
+
+        data = self.cache.get(cid)
+        if data is None:
+            data = self.ipfs.get_bytes(cid)
+            self.cache.put(cid, data, fetched=True)
+        else:
+            self.cache_hits.append(cid)
+        return data
+
+    def get_json_str(self, cid: str) -> str:
+        """
+        Retrieve JSON string by CID, from the cache if possible.
+
+        Compressed payloads are decompressed; the formatting is preserved.
+
+        Raises:
+            ValueError: If CID is invalid
+            Exception: If IPFS retrieval fails
+        """
+        payload = self.get_bytes(cid)
+        try:
+            _, data = decompress_payload(payload)
+            return data.decode("utf-8")
+        except Exception as e:
+            raise Exception(f"Failed to get JSON string from IPFS (CID: {cid}): {e}")
+
+    def get_json(self, cid: str) -> dict:
+        """
+        Retrieve JSON by CID, from the cache if possible.
+
+        Raises:
+            ValueError: If CID is invalid
+            Exception: If IPFS retrieval fails
+        """
+        json_str = self.get_json_str(cid)
+        try:
+            return json.loads(json_str)
+        except Exception as e:
+            raise Exception(f"Failed to get JSON from IPFS (CID: {cid}): {e}")
+
+    def cat_stream(self, cid: str) -> Iterator[bytes]:
+        """
+        Retrieve content by CID as a stream of byte blocks.
+
+        Cached content is served from the cache; otherwise the stream of
+        the wrapped client is returned unchanged (and not cached, so
+        large traces are still never held in memory as a whole).
+        """
+        data = self.cache.get(cid)
+        if data is None:
+            return self.ipfs.cat_stream(cid)
+        self.cache_hits.append(cid)
+        return (data[i:i + STREAM_BLOCK_SIZE] for i in range(0, len(data), STREAM_BLOCK_SIZE))
+
+    def add_bytes(self, data: bytes) -> str:
+        """Upload raw bytes and cache them under the returned CID"""
+        cid = self.ipfs.add_bytes(data)
+        self.cache.put(cid, data)
+        return cid
+
+    def add_json(self, trace_json: dict) -> str:
+        return self.ipfs.add_json(trace_json)
+
+    def add_json_str(self, json_str: str, *args: Any, **kwargs: Any) -> str:
+        return self.ipfs.add_json_str(json_str, *args, **kwargs)
+
+    def pin(self, cid: str) -> None:
+        self.ipfs.pin(cid)
+
+    def unpin(self, cid: str) -> None:
+        self.ipfs.unpin(cid)
+
+    def is_online(self) -> bool:
+        return self.ipfs.is_online()
+
+    def get_version(self) -> dict:
+        return self.ipfs.get_version()
+
+    def close(self) -> None:
+        """Close the wrapped client (the cache stays usable)."""
+        self.ipfs.close()
+
+    def __enter__(self):
+        """Context manager entry."""
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Context manager exit."""
+        self.close()
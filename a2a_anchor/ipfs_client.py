@@ -5,10 +5,14 @@ This module provides a simple interface to interact with IPFS (InterPlanetary Fi
 for storing and retrieving A2A trace JSON files.
 """
 
+import codecs
 import json
-from typing import Optional
+from typing import Iterator, Optional
 import ipfshttpclient
 
+from .payload import compress_payload, iter_decompressed
+from .pipeline import PIPELINE_STATS
+
 
 class IPFSClient:
     """
@@ -64,34 +68,71 @@ class IPFSClient:
         except Exception as e:
             raise Exception(f"Failed to add JSON to IPFS: {e}")
 
-    def add_json_str(self, json_str: str) -> str:
+    def add_json_str(
+        self,
+        json_str: str,
+        compression: Optional[str] = None,
+        level: Optional[int] = None
+    ) -> str:
         """
         Upload trace JSON string to IPFS and return CID.
 
         This preserves the exact JSON formatting, which is important for Merkle Root verification.
+        Compressed uploads keep the formatting too: get_json_str() returns the original string.
 
         Args:
             json_str: Trace data as JSON string
+            compression: "zlib" or "lzma" to upload a compressed payload (default: plain text)
+            level: Compression level 0-9
 
         Returns:
             CID (Content Identifier) as string
 
         Raises:
-            ValueError: If json_str is not valid JSON
+            ValueError: If json_str is not valid JSON or the compression is invalid
             Exception: If IPFS upload fails
         """
         try:
             # Validate JSON
+            PIPELINE_STATS.count_parse()
             json.loads(json_str)
 
+            if compression:
+                payload = compress_payload(json_str.encode('utf-8'), compression, level)
+                return self.client.add_bytes(payload)
+
             # Upload string directly to preserve formatting
             result = self.client.add_str(json_str)
             return result
         except json.JSONDecodeError as e:
             raise ValueError(f"Invalid JSON string: {e}")
+        except ValueError:
+            raise
         except Exception as e:
             raise Exception(f"Failed to add JSON string to IPFS: {e}")
 
+    def add_bytes(self, data: bytes) -> str:
+        """
+        Upload raw bytes (e.g. a CBOR trace) to IPFS and return CID.
+
+        Args:
+            data: Payload bytes
+
+        Returns:
+            CID (Content Identifier) as string
+
+        Raises:
+            ValueError: If data is not bytes
+            Exception: If IPFS upload fails
+        """
+        if not isinstance(data, (bytes, bytearray)):
+            raise ValueError("data must be bytes")
+
+        try:
+            return self.client.add_bytes(bytes(data))
+        except Exception as e:
+            raise Exception(f"Failed to add bytes to IPFS: {e}")
+
     def get_json(self, cid: str) -> dict:
         """
         Retrieve JSON from IPFS by CID.
@@ -111,7 +152,7 @@ class IPFSClient:
 
         try:
             # Get content as string (to preserve formatting for Merkle Root verification)
-            json_str = self.client.cat(cid).decode('utf-8')
+            json_str = self.get_json_str(cid)
             result = json.loads(json_str)
             return result
         except Exception as e:
@@ -122,6 +163,7 @@ class IPFSClient:
         Retrieve JSON string from IPFS by CID.
 
         This preserves the exact formatting, which is important for Merkle Root verification.
+        Compressed payloads are decompressed block by block as they are downloaded.
 
         Args:
             cid: Content Identifier
@@ -137,11 +179,65 @@ class IPFSClient:
             raise ValueError("CID must be a non-empty string")
 
         try:
-            json_str = self.client.cat(cid).decode('utf-8')
-            return json_str
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            parts = [
+                decoder.decode(block)
+                for block in iter_decompressed(self.client.cat(cid, stream=True))
+            ]
+            parts.append(decoder.decode(b'', final=True))
+            return ''.join(parts)
         except Exception as e:
             raise Exception(f"Failed to get JSON string from IPFS (CID: {cid}): {e}")
 
+    def get_bytes(self, cid: str) -> bytes:
+        """
+        Retrieve raw content from IPFS by CID.
+
+        Used for payloads that may be binary; see payload.decode_trace().
+
+        Args:
+            cid: Content Identifier
+
+        Returns:
+            Content bytes
+
+        Raises:
+            ValueError: If CID is invalid
+            Exception: If IPFS retrieval fails
+        """
+        if not cid or not isinstance(cid, str):
+            raise ValueError("CID must be a non-empty string")
+
+        try:
+            return self.client.cat(cid)
+        except Exception as e:
+            raise Exception(f"Failed to get content from IPFS (CID: {cid}): {e}")
+
+    def cat_stream(self, cid: str) -> Iterator[bytes]:
+        """
+        Retrieve content from IPFS by CID as a stream of byte blocks.
+
+        The content is never held in memory as a whole, which allows large
+        traces to be hashed with merkle.compute_merkle_root_stream().
+
+        Args:
+            cid: Content Identifier
+
+        Returns:
+            Iterator over byte blocks of the content
+
+        Raises:
+            ValueError: If CID is invalid
+            Exception: If IPFS retrieval fails
+        """
+        if not cid or not isinstance(cid, str):
+            raise ValueError("CID must be a non-empty string")
+
+        try:
+            return self.client.cat(cid, stream=True)
+        except Exception as e:
+            raise Exception(f"Failed to stream content from IPFS (CID: {cid}): {e}")
+
     def pin(self, cid: str) -> None:
         """
         Pin content to ensure it's not garbage collected.
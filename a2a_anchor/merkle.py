@@ -1,7 +1,186 @@
 """Merkle Tree computation for trace chunks"""
 
+import base64
+import codecs
+import functools
 import hashlib
-from typing import List, Tuple
+import json
+import mmap
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING, Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+)
+
+from .canonical import canonicalize, iter_canonical_object
+from .pipeline import PIPELINE_STATS
+
+if TYPE_CHECKING:
+    from .cdc import LeafHashCache
+
+
+# a2a-0.1 engine: hex digests of str chunks, parents hash the concatenated hex
+LEGACY_ALGORITHM = "sha256"
+
+# Byte-oriented engine: raw digests of UTF-8 byte chunks
+DEFAULT_ALGORITHM = "sha256-chunks"
+
+# Trace versions whose byte engines hash the formatted JSON as stored;
+# later versions hash the canonical JSON (RFC 8785 style) of the parsed trace
+FORMATTED_TRACE_VERSIONS = ("a2a-0.1", "a2a-0.2")
+CANONICAL_TRACE_VERSION = "a2a-0.3"
+
+# Version of the manifests of segmented traces (see segments.py)
+MANIFEST_VERSION = "a2a-manifest-0.1"
+
+# Domain separation between leaves and interior nodes (as in RFC 6962)
+LEAF_PREFIX = b"\x00"
+NODE_PREFIX = b"\x01"
+
+# Leaf/node hash functions by the <hash> part of Hashing.algorithm.
+# Every entry produces 32-byte digests.
+HASH_FUNCTIONS: Dict[str, Callable[..., Any]] = {
+    "sha256": hashlib.sha256,
+    "blake2b": functools.partial(hashlib.blake2b, digest_size=32),
+}
+
+_MODES = ("chunks", "events", "cdc")
+
+# Total input size (bytes) from which leaves are hashed on a thread pool;
+# hashlib releases the GIL while hashing each chunk
+PARALLEL_THRESHOLD = 4 * 1024 * 1024
+
+# Read size for streaming files
+STREAM_BLOCK_SIZE = 1024 * 1024
+
+# Hashing fields filled in from the tree, never part of the hashed data
+_HASHING_RESULT_FIELDS = ("chunkMerkleRoot", "chunks", "chunkDigests")
+
+BytesLike = Union[bytes, bytearray, memoryview]
+
+
+class DigestArray:
+    """
+    Contiguous storage for fixed-size raw digests
+
+    Holds n digests in one bytearray with a 32-byte stride instead of n
+    hex strings (about 4x less memory). Indexing and iteration return raw
+    digests. In pydantic models it serializes to one base64 string and
+    accepts base64, a list of hex digests or a DigestArray.
+    """
+
+    __slots__ = ("_data", "digest_size")
+
+    def __init__(self, data: BytesLike = b"", digest_size: int = 32):
+        """
+        Initialize from concatenated digests.
+
+        Args:
+            data: Concatenated raw digests
+            digest_size: Size of each digest in bytes
+
+        Raises:
+            ValueError: If data is not a whole number of digests
+        """
+        if len(data) % digest_size:
+            raise ValueError(f"Digest data length {len(data)} is not a multiple of {digest_size}")
+        self._data = bytearray(data)
+        self.digest_size = digest_size
+
+    @classmethod
+    def from_hex_list(cls, hex_digests: Iterable[str], digest_size: int = 32) -> "DigestArray":
+        """Build from a list of hex digests (e.g. a2a-0.1 Hashing.chunks)"""
+        return cls(b"".join(bytes.fromhex(h) for h in hex_digests), digest_size)
+
+    @classmethod
+    def from_base64(cls, blob: str, digest_size: int = 32) -> "DigestArray":
+        """Build from the base64 blob written by to_base64()"""
+        return cls(base64.b64decode(blob, validate=True), digest_size)
+
+    def append(self, digest: BytesLike) -> None:
+        """Append one raw digest"""
+        if len(digest) != self.digest_size:
+            raise ValueError(f"Expected a {self.digest_size}-byte digest, got {len(digest)} bytes")
+        self._data += digest
+
+    def extend(self, digests: Iterable[BytesLike]) -> None:
+        """Append raw digests (or another DigestArray)"""
+        if isinstance(digests, DigestArray):
+            if digests.digest_size != self.digest_size:
+                raise ValueError("Digest sizes do not match")
+            self._data += digests._data
+            return
+        for digest in digests:
+            self.append(digest)
+
+    def tobytes(self) -> bytes:
+        """Return all digests concatenated"""
+        return bytes(self._data)
+
+    def hex_list(self) -> List[str]:
+        """Return the digests as a list of hex strings"""
+        return [digest.hex() for digest in self]
+
+    def to_base64(self) -> str:
+        """Serialize all digests as one base64 string"""
+        return base64.b64encode(self._data).decode('ascii')
+
+    def __len__(self) -> int:
+        return len(self._data) // self.digest_size
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            start, stop, step = index.indices(len(self))
+            if step != 1:
+                raise ValueError("DigestArray slices must be contiguous")
+            size = self.digest_size
+            return DigestArray(self._data[start * size:max(start, stop) * size], size)
+
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("DigestArray index out of range")
+        start = index * self.digest_size
+        return bytes(self._data[start:start + self.digest_size])
+
+    def __iter__(self) -> Iterator[bytes]:
+        size = self.digest_size
+        for start in range(0, len(self._data), size):
+            yield bytes(self._data[start:start + size])
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, DigestArray):
+            return NotImplemented
+        return self.digest_size == other.digest_size and self._data == other._data
+
+    def __repr__(self) -> str:
+        return f"DigestArray({len(self)} digests)"
+
+    @classmethod
+    def _validate(cls, value: Any) -> "DigestArray":
+        if isinstance(value, DigestArray):
+            return value
+        if isinstance(value, str):
+            return cls.from_base64(value)
+        if isinstance(value, (list, tuple)):
+            return cls.from_hex_list(value)
+        raise ValueError("Expected a DigestArray, a base64 string or a list of hex digests")
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source_type, handler):
+        from pydantic_core import core_schema
+
+        validator = core_schema.no_info_plain_validator_function(cls._validate)
+        return core_schema.json_or_python_schema(
+            json_schema=core_schema.chain_schema([core_schema.str_schema(), validator]),
+            python_schema=validator,
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                lambda digests: digests.to_base64(),
+                return_schema=core_schema.str_schema()
+            )
+        )
 
 
 def sha256_hash(data: str) -> str:
@@ -58,16 +237,1214 @@ def compute_merkle_root(chunks: List[str]) -> Tuple[str, List[str]]:
     return current_level[0], chunk_hashes
 
 
-def compute_trace_merkle(trace_json: str, chunk_size: int = 4096) -> Tuple[str, List[str]]:
+def parse_algorithm(algorithm: str) -> Tuple[str, str]:
     """
-    Compute Merkle root for a trace JSON string
+    Split a Hashing.algorithm name into (hash_name, mode)
+
+    "sha256" is the a2a-0.1 engine and is reported with mode "legacy".
+    Byte-oriented engines are named "<hash>-<mode>", where <hash> is a key
+    of HASH_FUNCTIONS (e.g. "blake2b-chunks"). "chunks" hashes
+    fixed-size byte chunks of the serialized trace, "cdc" hashes
+    content-defined chunks of it (see cdc.py), and "events" hashes each
+    event (plus one metadata leaf) from the parsed trace.
+
+    Args:
+        algorithm: Value of Hashing.algorithm
+
+    Returns:
+        Tuple of (hash_name, mode)
+
+    Raises:
+        ValueError: If the hash function or mode is not supported
+    """
+    if algorithm == LEGACY_ALGORITHM:
+        return "sha256", "legacy"
+
+    hash_name, _, mode = algorithm.partition("-")
+    if hash_name not in HASH_FUNCTIONS or mode not in _MODES:
+        raise ValueError(f"Unsupported hashing algorithm: {algorithm}")
+
+    return hash_name, mode
+
+
+def trace_version_for(algorithm: str) -> str:
+    """Return the traceVersion new traces get for a hashing algorithm"""
+    _, mode = parse_algorithm(algorithm)
+    return "a2a-0.1" if mode == "legacy" else CANONICAL_TRACE_VERSION
+
+
+def uses_canonical_json(trace_version: str) -> bool:
+    """Whether a trace version hashes canonical JSON of the parsed trace"""
+    return trace_version not in FORMATTED_TRACE_VERSIONS
+
+
+def json_encoder_for(trace_version: str) -> Callable[[Any], bytes]:
+    """
+    Return the JSON encoder used for "events" leaves of a trace version
+
+    a2a-0.2 leaves use canonical_json(); a2a-0.3 and later use the
+    RFC 8785 style canonicalize(), which also fixes number formatting.
+    """
+    return canonicalize if uses_canonical_json(trace_version) else canonical_json
+
+
+def register_hash_function(name: str, factory: Callable[..., Any]) -> None:
+    """
+    Register a hash function usable as "<name>-<mode>" in Hashing.algorithm
+
+    Args:
+        name: Hash name (must not contain "-")
+        factory: hashlib-style constructor taking optional initial data;
+            digests must be 32 bytes
+
+    Raises:
+        ValueError: If the name is invalid or the digest size is not 32 bytes
+    """
+    if not name or "-" in name:
+        raise ValueError(f"Invalid hash function name: {name}")
+    if factory().digest_size != 32:
+        raise ValueError(f"Hash function {name} must produce 32-byte digests")
+    HASH_FUNCTIONS[name] = factory
+
+
+def benchmark_hash_functions(
+    size: int = 8 * 1024 * 1024,
+    chunk_size: int = 4096
+) -> Dict[str, float]:
+    """
+    Measure leaf hashing throughput of every registered hash function
+
+    Args:
+        size: Bytes hashed per function
+        chunk_size: Chunk size, as used for trace hashing
+
+    Returns:
+        Dictionary of hash name to throughput in MB/s
+    """
+    chunks = chunk_bytes(bytes(size), chunk_size)
+    results = {}
+    for name in HASH_FUNCTIONS:
+        start = time.perf_counter()
+        for chunk in chunks:
+            leaf_hash(chunk, name)
+        elapsed = time.perf_counter() - start
+        results[name] = size / (1024 * 1024) / max(elapsed, 1e-9)
+    return results
+
+
+@functools.lru_cache(maxsize=None)
+def fastest_algorithm(mode: str = "chunks") -> str:
+    """
+    Pick the fastest hash function on this host for new traces
+
+    The benchmark runs once per process. Verification never depends on
+    this: it always uses the algorithm recorded in the trace or memo.
+
+    Args:
+        mode: Hashing mode ("chunks", "cdc" or "events")
+
+    Returns:
+        Hashing.algorithm name, e.g. "blake2b-chunks"
+    """
+    if mode not in _MODES:
+        raise ValueError(f"Unsupported hashing mode: {mode}")
+    throughput = benchmark_hash_functions()
+    return f"{max(throughput, key=throughput.get)}-{mode}"
+
+
+def resolve_algorithm(algorithm: str) -> str:
+    """
+    Resolve an "auto" algorithm name for a new trace
+
+    "auto" picks the fastest hash function for "chunks" mode and
+    "auto-<mode>" for the given mode (see fastest_algorithm()). Other
+    names are returned unchanged.
+
+    Args:
+        algorithm: Hashing algorithm requested by the builder
+
+    Returns:
+        Hashing.algorithm name recorded in the trace
+    """
+    if algorithm == "auto":
+        return fastest_algorithm()
+    if algorithm.startswith("auto-"):
+        return fastest_algorithm(algorithm[len("auto-"):])
+    return algorithm
+
+
+def leaf_hash(data: BytesLike, hash_name: str = "sha256") -> bytes:
+    """Compute the raw digest of a leaf (0x00 || data)"""
+    h = HASH_FUNCTIONS[hash_name](LEAF_PREFIX)
+    h.update(data)
+    return h.digest()
+
+
+def node_hash(left: bytes, right: bytes, hash_name: str = "sha256") -> bytes:
+    """Compute the raw digest of an interior node (0x01 || left || right)"""
+    h = HASH_FUNCTIONS[hash_name](NODE_PREFIX)
+    h.update(left)
+    h.update(right)
+    return h.digest()
+
+
+def empty_root(hash_name: str = "sha256") -> bytes:
+    """Root of a tree without leaves: the digest of empty input"""
+    return HASH_FUNCTIONS[hash_name]().digest()
+
+
+def canonical_json(obj: Any) -> bytes:
+    """Serialize obj as compact, key-sorted UTF-8 JSON for a2a-0.2 leaf hashing"""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), ensure_ascii=False).encode('utf-8')
+
+
+def chunk_bytes(data: BytesLike, chunk_size: int = 4096) -> List[memoryview]:
+    """
+    Split bytes into fixed-size chunks without copying
 
     Args:
-        trace_json: JSON string of the trace
+        data: Byte buffer to split
         chunk_size: Size of each chunk in bytes
 
     Returns:
-        Tuple of (merkle_root, chunk_hashes)
+        List of memoryview slices over data
+    """
+    view = memoryview(data)
+    return [view[i:i + chunk_size] for i in range(0, len(view), chunk_size)]
+
+
+def merkle_root_from_digests(digests: Sequence[bytes], hash_name: str = "sha256") -> bytes:
+    """
+    Reduce raw leaf digests to the Merkle root
+
+    Pairs are combined level by level; an odd node at the end of a level
+    is promoted unchanged, as in the a2a-0.1 engine.
+
+    Args:
+        digests: Raw leaf digests (list or DigestArray)
+        hash_name: Hash function name
+
+    Returns:
+        Raw root digest
+    """
+    if not digests:
+        return empty_root(hash_name)
+
+    current_level = digests
+    while len(current_level) > 1:
+        next_level = [
+            node_hash(current_level[i], current_level[i + 1], hash_name)
+            for i in range(0, len(current_level) - 1, 2)
+        ]
+        if len(current_level) % 2:
+            next_level.append(current_level[-1])
+        current_level = next_level
+
+    return current_level[0]
+
+
+class MerkleAccumulator:
     """
-    chunks = chunk_data(trace_json, chunk_size)
-    return compute_merkle_root(chunks)
+    Append-only Merkle accumulator
+
+    Keeps only the frontier: the roots of the perfect subtrees that make up
+    the tree so far, one per set bit of the leaf count. Appending a leaf
+    costs O(log n) node hashes and the root is available at any time. The
+    root equals merkle_root_from_digests() over the same leaves.
+    """
+
+    def __init__(self, hash_name: str = "sha256"):
+        """
+        Initialize an empty accumulator.
+
+        Args:
+            hash_name: Hash function name
+        """
+        if hash_name not in HASH_FUNCTIONS:
+            raise ValueError(f"Unsupported hash function: {hash_name}")
+        self.hash_name = hash_name
+        self.size = 0
+        self._frontier: List[bytes] = []
+
+    def append(self, data: BytesLike) -> bytes:
+        """
+        Hash data as a new leaf and add it to the tree.
+
+        Args:
+            data: Leaf content
+
+        Returns:
+            Raw leaf digest
+        """
+        digest = self._leaf(data)
+        self.append_digest(digest)
+        return digest
+
+    def append_digest(self, digest: bytes) -> None:
+        """Add an already hashed leaf to the tree"""
+        # Merge completed subtrees like a binary counter carry
+        n = self.size
+        while n & 1:
+            digest = self._node(self._frontier.pop(), digest)
+            n >>= 1
+        self._frontier.append(digest)
+        self.size += 1
+
+    def root(self) -> bytes:
+        """Return the raw root digest of all leaves appended so far"""
+        if not self._frontier:
+            return self._empty()
+
+        # Fold the smaller (right) subtrees into the larger (left) ones
+        digest = self._frontier[-1]
+        for left in reversed(self._frontier[:-1]):
+            digest = self._node(left, digest)
+        return digest
+
+    def root_hex(self) -> str:
+        """Return the root digest as a hex string"""
+        return self.root().hex()
+
+    def _leaf(self, data: BytesLike) -> bytes:
+        return leaf_hash(data, self.hash_name)
+
+    def _node(self, left: bytes, right: bytes) -> bytes:
+        return node_hash(left, right, self.hash_name)
+
+    def _empty(self) -> bytes:
+        return empty_root(self.hash_name)
+
+
+class LegacyMerkleAccumulator(MerkleAccumulator):
+    """
+    Append-only accumulator for the a2a-0.1 engine
+
+    Leaves are str chunks and digests are hex strings, combined by hashing
+    their concatenation. Promoting the odd node gives the same tree shape,
+    so the root equals compute_merkle_root() over the same chunks.
+    """
+
+    def __init__(self):
+        super().__init__("sha256")
+
+    def root_hex(self) -> str:
+        """Return the root digest (already hex)"""
+        return self.root()
+
+    def _leaf(self, data: str) -> str:
+        return sha256_hash(data)
+
+    def _node(self, left: str, right: str) -> str:
+        return sha256_hash(left + right)
+
+    def _empty(self) -> str:
+        return sha256_hash("")
+
+
+def _hash_subtree(chunks: List[BytesLike], hash_name: str) -> Tuple[bytes, DigestArray]:
+    """Hash a block of chunks and reduce it to its subtree root"""
+    chunk_hashes = DigestArray(b"".join(leaf_hash(chunk, hash_name) for chunk in chunks))
+    return merkle_root_from_digests(chunk_hashes, hash_name), chunk_hashes
+
+
+def compute_merkle_root_bytes(
+    chunks: List[BytesLike],
+    hash_name: str = "sha256",
+    workers: Optional[int] = None,
+    parallel_threshold: int = PARALLEL_THRESHOLD
+) -> Tuple[bytes, DigestArray]:
+    """
+    Compute Merkle root from byte chunks
+
+    Inputs of at least parallel_threshold bytes are split into aligned
+    power-of-two blocks of leaves. Each block is hashed and reduced to its
+    subtree root on a thread pool, and the block roots are reduced last.
+    Aligned blocks are exactly the subtrees of the serial tree, so the
+    root is identical to the single-threaded result.
+
+    Args:
+        chunks: List of byte chunks (bytes or memoryview slices)
+        hash_name: Hash function name
+        workers: Thread count (default: os.cpu_count())
+        parallel_threshold: Minimum total size in bytes for the thread pool
+
+    Returns:
+        Tuple of (raw merkle_root, chunk_hashes as a DigestArray)
+    """
+    workers = workers or os.cpu_count() or 1
+
+    if workers < 2 or len(chunks) < 2 or sum(len(chunk) for chunk in chunks) < parallel_threshold:
+        return _hash_subtree(chunks, hash_name)
+
+    # Smallest power-of-two block size giving each worker a few blocks
+    block_size = 1
+    while block_size * workers * 4 < len(chunks):
+        block_size *= 2
+
+    blocks = [chunks[i:i + block_size] for i in range(0, len(chunks), block_size)]
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(lambda block: _hash_subtree(block, hash_name), blocks))
+
+    block_roots = [block_root for block_root, _ in results]
+    chunk_hashes = DigestArray()
+    for _, block_hashes in results:
+        chunk_hashes.extend(block_hashes)
+
+    return merkle_root_from_digests(block_roots, hash_name), chunk_hashes
+
+
+def compute_trace_digests(
+    trace_json: Union[str, BytesLike],
+    chunk_size: int = 4096,
+    algorithm: str = DEFAULT_ALGORITHM,
+    workers: Optional[int] = None,
+    parallel_threshold: int = PARALLEL_THRESHOLD,
+    min_chunk_size: Optional[int] = None,
+    max_chunk_size: Optional[int] = None,
+    leaf_cache: Optional["LeafHashCache"] = None,
+    cache_key: Optional[str] = None
+) -> Tuple[str, DigestArray]:
+    """
+    Compute the byte engine Merkle root, keeping leaf hashes as raw digests
+
+    Args:
+        trace_json: JSON string (or its UTF-8 bytes) of the trace
+        chunk_size: Size of each chunk in bytes (average size for "cdc")
+        algorithm: Hashing.algorithm of the trace ("<hash>-chunks" or "<hash>-cdc")
+        workers: Hashing threads for large traces
+        parallel_threshold: Minimum size in bytes for multi-threaded hashing
+        min_chunk_size: Minimum "cdc" chunk size (default: chunk_size // 4)
+        max_chunk_size: Maximum "cdc" chunk size (default: chunk_size * 8)
+        leaf_cache: cdc.LeafHashCache reusing leaf hashes of the previous
+            version of the trace ("cdc" only)
+        cache_key: Key of the trace in leaf_cache (e.g. session ID)
+
+    Returns:
+        Tuple of (hex merkle_root, chunk_hashes as a DigestArray)
+
+    Raises:
+        ValueError: If the algorithm is not a byte chunk engine
+    """
+    hash_name, mode = parse_algorithm(algorithm)
+
+    if mode not in ("chunks", "cdc"):
+        raise ValueError(f"{algorithm} is not a byte chunk algorithm")
+
+    if isinstance(trace_json, str):
+        trace_json = trace_json.encode('utf-8')
+
+    if mode == "chunks":
+        chunks = chunk_bytes(trace_json, chunk_size)
+    elif leaf_cache is not None:
+        chunk_hashes = leaf_cache.digests(
+            cache_key or "", trace_json, chunk_size, min_chunk_size, max_chunk_size, hash_name
+        )
+        return merkle_root_from_digests(chunk_hashes, hash_name).hex(), chunk_hashes
+    else:
+        from .cdc import chunk_cdc
+        chunks = chunk_cdc(trace_json, chunk_size, min_chunk_size, max_chunk_size)
+
+    root, chunk_hashes = compute_merkle_root_bytes(
+        chunks, hash_name, workers, parallel_threshold
+    )
+    return root.hex(), chunk_hashes
+
+
+def compute_trace_merkle(
+    trace_json: Union[str, BytesLike],
+    chunk_size: int = 4096,
+    algorithm: str = LEGACY_ALGORITHM,
+    workers: Optional[int] = None,
+    parallel_threshold: int = PARALLEL_THRESHOLD,
+    min_chunk_size: Optional[int] = None,
+    max_chunk_size: Optional[int] = None
+) -> Tuple[str, List[str]]:
+    """
+    Compute Merkle root for a trace JSON string
+
+    Args:
+        trace_json: JSON string (or its UTF-8 bytes) of the trace
+        chunk_size: Size of each chunk (characters for "sha256", bytes otherwise)
+        algorithm: Hashing.algorithm of the trace
+        workers: Hashing threads for large traces (byte engine only)
+        parallel_threshold: Minimum size in bytes for multi-threaded hashing
+        min_chunk_size: Minimum "cdc" chunk size
+        max_chunk_size: Maximum "cdc" chunk size
+
+    Returns:
+        Tuple of (merkle_root, chunk_hashes) as hex strings
+    """
+    _, mode = parse_algorithm(algorithm)
+
+    if mode == "legacy":
+        if not isinstance(trace_json, str):
+            trace_json = bytes(trace_json).decode('utf-8')
+        chunks = chunk_data(trace_json, chunk_size)
+        return compute_merkle_root(chunks)
+
+    if mode == "events":
+        raise ValueError(f"{algorithm} hashes parsed events, use compute_event_merkle()")
+
+    root, chunk_hashes = compute_trace_digests(
+        trace_json, chunk_size, algorithm, workers, parallel_threshold,
+        min_chunk_size, max_chunk_size
+    )
+    return root, chunk_hashes.hex_list()
+
+
+def hash_leaf(data: Union[str, BytesLike], algorithm: str = DEFAULT_ALGORITHM) -> str:
+    """
+    Compute the hex leaf hash of one chunk as the given engine does
+
+    Args:
+        data: Chunk content (str for "sha256", str or bytes otherwise)
+        algorithm: Hashing.algorithm of the trace
+
+    Returns:
+        Hex leaf hash
+    """
+    hash_name, mode = parse_algorithm(algorithm)
+
+    if mode == "legacy":
+        if not isinstance(data, str):
+            data = bytes(data).decode('utf-8')
+        return sha256_hash(data)
+
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    return leaf_hash(data, hash_name).hex()
+
+
+def inclusion_proof(
+    chunk_hashes: Union[List[str], DigestArray],
+    index: int,
+    algorithm: str = DEFAULT_ALGORITHM
+) -> Dict[str, Any]:
+    """
+    Build the audit path proving that one leaf is part of the tree
+
+    The path lists the sibling of the current node at each level, bottom
+    up, with its position. Levels where the node is promoted without a
+    sibling contribute no entry.
+
+    Args:
+        chunk_hashes: All leaf hashes of the tree, as hex strings
+            (Hashing.chunks) or a DigestArray (Hashing.chunkDigests)
+        index: Position of the leaf to prove
+        algorithm: Hashing.algorithm of the trace
+
+    Returns:
+        Proof dictionary:
+        {
+            "algorithm": str,
+            "index": int,
+            "tree_size": int,
+            "leaf": str,
+            "path": [{"hash": str, "position": "left" | "right"}, ...],
+            "root": str
+        }
+
+    Raises:
+        IndexError: If index is outside the tree
+    """
+    if not 0 <= index < len(chunk_hashes):
+        raise IndexError(f"Leaf index {index} out of range for {len(chunk_hashes)} leaves")
+
+    hash_name, mode = parse_algorithm(algorithm)
+    legacy = mode == "legacy"
+
+    # Legacy nodes are hex strings, byte engine nodes are raw digests
+    if isinstance(chunk_hashes, DigestArray):
+        level = chunk_hashes.hex_list() if legacy else list(chunk_hashes)
+    else:
+        level = list(chunk_hashes) if legacy else [bytes.fromhex(h) for h in chunk_hashes]
+
+    tree_size = len(level)
+    leaf = level[index] if legacy else level[index].hex()
+    position = index
+    path = []
+
+    while len(level) > 1:
+        sibling = position ^ 1
+        if sibling < len(level):
+            sibling_hash = level[sibling]
+            path.append({
+                "hash": sibling_hash if legacy else sibling_hash.hex(),
+                "position": "left" if sibling < position else "right"
+            })
+
+        if legacy:
+            next_level = [
+                sha256_hash(level[i] + level[i + 1])
+                for i in range(0, len(level) - 1, 2)
+            ]
+        else:
+            next_level = [
+                node_hash(level[i], level[i + 1], hash_name)
+                for i in range(0, len(level) - 1, 2)
+            ]
+        if len(level) % 2:
+            next_level.append(level[-1])
+
+        level = next_level
+        position //= 2
+
+    return {
+        "algorithm": algorithm,
+        "index": index,
+        "tree_size": tree_size,
+        "leaf": leaf,
+        "path": path,
+        "root": level[0] if legacy else level[0].hex()
+    }
+
+
+def root_from_inclusion_proof(
+    leaf: str,
+    path: List[Dict[str, str]],
+    algorithm: str = DEFAULT_ALGORITHM
+) -> str:
+    """
+    Recompute the root implied by a leaf hash and its audit path
+
+    Args:
+        leaf: Hex leaf hash
+        path: Audit path from inclusion_proof()
+        algorithm: Hashing.algorithm of the trace
+
+    Returns:
+        Hex root
+
+    Raises:
+        ValueError: If a path entry is malformed
+    """
+    hash_name, mode = parse_algorithm(algorithm)
+
+    if mode == "legacy":
+        current = leaf
+        for step in path:
+            if step["position"] == "left":
+                current = sha256_hash(step["hash"] + current)
+            elif step["position"] == "right":
+                current = sha256_hash(current + step["hash"])
+            else:
+                raise ValueError(f"Invalid position in proof: {step['position']}")
+        return current
+
+    current = bytes.fromhex(leaf)
+    for step in path:
+        sibling = bytes.fromhex(step["hash"])
+        if step["position"] == "left":
+            current = node_hash(sibling, current, hash_name)
+        elif step["position"] == "right":
+            current = node_hash(current, sibling, hash_name)
+        else:
+            raise ValueError(f"Invalid position in proof: {step['position']}")
+    return current.hex()
+
+
+def _leaf_digests(chunk_hashes: Union[List[str], DigestArray]) -> List[bytes]:
+    """Normalize byte engine leaf hashes to a list of raw digests"""
+    if isinstance(chunk_hashes, DigestArray):
+        return list(chunk_hashes)
+    return [bytes.fromhex(h) for h in chunk_hashes]
+
+
+def _subproof(
+    leaves: List[bytes],
+    old_size: int,
+    complete: bool,
+    hash_name: str
+) -> List[bytes]:
+    """SUBPROOF(m, D[n], b) from RFC 6962, section 2.1.2"""
+    if old_size == len(leaves):
+        return [] if complete else [merkle_root_from_digests(leaves, hash_name)]
+
+    split = 1 << ((len(leaves) - 1).bit_length() - 1)
+    if old_size <= split:
+        return _subproof(leaves[:split], old_size, complete, hash_name) + \
+            [merkle_root_from_digests(leaves[split:], hash_name)]
+    return _subproof(leaves[split:], old_size - split, False, hash_name) + \
+        [merkle_root_from_digests(leaves[:split], hash_name)]
+
+
+def _new_root_from_consistency(
+    old_size: int,
+    new_size: int,
+    path: List[bytes],
+    old_root: bytes,
+    hash_name: str
+) -> bytes:
+    """
+    Check a consistency path against the old root and return the new root
+
+    This is the verification algorithm of RFC 9162, section 2.1.4.2: the
+    path is folded into both the old and the new root at once.
+
+    Raises:
+        ValueError: If the path does not lead to old_root
+    """
+    if not 0 < old_size <= new_size:
+        raise ValueError(f"Invalid tree sizes: {old_size} -> {new_size}")
+
+    if old_size == new_size:
+        if path:
+            raise ValueError("Proof between equal tree sizes must be empty")
+        return old_root
+
+    # A complete old tree is a node of the new one and is not in the path
+    if old_size & (old_size - 1) == 0:
+        path = [old_root] + path
+    if not path:
+        raise ValueError("Empty consistency path")
+
+    fn, sn = old_size - 1, new_size - 1
+    while fn & 1:
+        fn >>= 1
+        sn >>= 1
+
+    old_node = new_node = path[0]
+    for sibling in path[1:]:
+        if sn == 0:
+            raise ValueError("Consistency path is too long")
+        if fn & 1 or fn == sn:
+            old_node = node_hash(sibling, old_node, hash_name)
+            new_node = node_hash(sibling, new_node, hash_name)
+            while not fn & 1 and fn != 0:
+                fn >>= 1
+                sn >>= 1
+        else:
+            new_node = node_hash(new_node, sibling, hash_name)
+        fn >>= 1
+        sn >>= 1
+
+    if sn != 0 or old_node != old_root:
+        raise ValueError("Consistency path does not match the old root")
+
+    return new_node
+
+
+def _tree_consistency_proof(
+    chunk_hashes: Union[List[str], DigestArray],
+    old_size: int,
+    algorithm: str
+) -> Dict[str, Any]:
+    """Build an RFC 6962 consistency proof over any list of leaves"""
+    hash_name, mode = parse_algorithm(algorithm)
+
+    if mode == "legacy":
+        raise ValueError("Consistency proofs need a byte-oriented algorithm")
+    if not 0 < old_size <= len(chunk_hashes):
+        raise IndexError(f"Old size {old_size} out of range for {len(chunk_hashes)} leaves")
+
+    leaves = _leaf_digests(chunk_hashes)
+
+    return {
+        "algorithm": algorithm,
+        "old_size": old_size,
+        "new_size": len(leaves),
+        "old_root": merkle_root_from_digests(leaves[:old_size], hash_name).hex(),
+        "new_root": merkle_root_from_digests(leaves, hash_name).hex(),
+        "path": [node.hex() for node in _subproof(leaves, old_size, True, hash_name)]
+    }
+
+
+def consistency_proof(
+    chunk_hashes: Union[List[str], DigestArray],
+    old_size: int,
+    algorithm: str = "sha256-events"
+) -> Dict[str, Any]:
+    """
+    Build a proof that the tree over the first old_size leaves is a prefix
+    of the tree over all leaves (append-only growth, as in RFC 6962)
+
+    The path holds O(log n) subtree roots. Together with the old root it
+    yields the new root, so an auditor needs only the two anchored roots.
+
+    Only "events" traces grow by appending leaves. In "chunks" and "cdc"
+    mode the serialized trace changes before its end on every append (the
+    closing brackets, and canonical key order puts "events" first), so
+    two versions of a session never share a chunk prefix; those modes are
+    rejected. Manifests have their own proof, see
+    manifest_consistency_proof().
+
+    Args:
+        chunk_hashes: All event leaf hashes of the newer tree (hex strings
+            or a DigestArray)
+        old_size: Number of leaves of the older tree
+        algorithm: Hashing.algorithm of the trace ("events" mode)
+
+    Returns:
+        Proof dictionary:
+        {
+            "algorithm": str,
+            "old_size": int,
+            "new_size": int,
+            "old_root": str,
+            "new_root": str,
+            "path": [str, ...]
+        }
+        The roots are those of the event subtree; event_consistency_proof()
+        extends the proof to the anchored roots.
+
+    Raises:
+        IndexError: If old_size is not between 1 and the number of leaves
+        ValueError: If the algorithm is not an "events" algorithm
+    """
+    _, mode = parse_algorithm(algorithm)
+
+    if mode != "events":
+        raise ValueError(
+            f"Consistency proofs need an \"events\" algorithm; {algorithm} traces "
+            "do not keep a common leaf prefix between versions"
+        )
+
+    return _tree_consistency_proof(chunk_hashes, old_size, algorithm)
+
+
+def root_from_consistency_proof(proof: Dict[str, Any], old_root: str) -> str:
+    """
+    Check a consistency proof against the old root and return the new root
+
+    Args:
+        proof: Proof dictionary from event_consistency_proof() or
+            manifest_consistency_proof()
+        old_root: Hex root anchored for the older version
+
+    Returns:
+        Hex root of the newer version implied by the proof
+
+    Raises:
+        ValueError: If the proof is malformed or does not match old_root
+    """
+    hash_name, mode = parse_algorithm(proof["algorithm"])
+
+    if mode == "legacy":
+        raise ValueError("Consistency proofs need a byte-oriented algorithm")
+
+    path = [bytes.fromhex(h) for h in proof["path"]]
+    old_size, new_size = int(proof["old_size"]), int(proof["new_size"])
+
+    # Manifest proofs cover the segment roots (see segments.py)
+    if proof.get("manifest"):
+        return _new_root_from_consistency(
+            old_size, new_size, path, bytes.fromhex(old_root), hash_name
+        ).hex()
+
+    if mode != "events":
+        raise ValueError(f"Consistency proofs need an \"events\" algorithm, got {proof['algorithm']}")
+
+    # "events" roots put the metadata leaf beside the event tree
+    old_events_root = bytes.fromhex(proof["old_events_root"])
+    old_metadata = bytes.fromhex(proof["old_metadata"])
+    if event_tree_root(old_events_root, old_metadata, hash_name).hex() != old_root:
+        raise ValueError("Old metadata and event root do not match the old root")
+
+    new_events_root = _new_root_from_consistency(
+        old_size, new_size, path, old_events_root, hash_name
+    )
+    return event_tree_root(new_events_root, bytes.fromhex(proof["new_metadata"]), hash_name).hex()
+
+
+def compute_root_of_roots(
+    segment_roots: Sequence[str],
+    algorithm: str = DEFAULT_ALGORITHM
+) -> str:
+    """
+    Compute the root committed to by a segmented trace manifest
+
+    Each segment root is one leaf, in segment order, so appending segments
+    keeps earlier leaves and manifest_consistency_proof() applies
+    between manifests of the same session.
+
+    Args:
+        segment_roots: Hex Merkle roots of the segments
+        algorithm: Hashing.algorithm of the segments (selects the hash)
+
+    Returns:
+        Hex root-of-roots
+    """
+    hash_name, _ = parse_algorithm(algorithm)
+    leaves = [leaf_hash(bytes.fromhex(root), hash_name) for root in segment_roots]
+    return merkle_root_from_digests(leaves, hash_name).hex()
+
+
+def manifest_consistency_proof(
+    old_manifest: Dict[str, Any],
+    new_manifest: Dict[str, Any]
+) -> Dict[str, Any]:
+    """
+    Build a proof that a newer manifest of a session keeps all segments of
+    an older one
+
+    Finalized segments never change, so the segment roots of a growing
+    session form an append-only list and rootOfRoots grows like any
+    Merkle tree over it.
+
+    Args:
+        old_manifest: Manifest anchored earlier (parsed or a TraceManifest)
+        new_manifest: Manifest anchored later (parsed or a TraceManifest)
+
+    Returns:
+        Proof dictionary in the format of consistency_proof() over the
+        rootOfRoots values, with "manifest": True
+
+    Raises:
+        ValueError: If the manifests belong to different sessions or
+            algorithms, or the older segments are not a prefix of the newer
+    """
+    if hasattr(old_manifest, "model_dump"):
+        old_manifest = old_manifest.model_dump()
+    if hasattr(new_manifest, "model_dump"):
+        new_manifest = new_manifest.model_dump()
+
+    if old_manifest["session"]["id"] != new_manifest["session"]["id"]:
+        raise ValueError("Manifests belong to different sessions")
+    if old_manifest["algorithm"] != new_manifest["algorithm"]:
+        raise ValueError("Manifests use different algorithms")
+
+    old_roots = [entry["root"] for entry in old_manifest["segments"]]
+    new_roots = [entry["root"] for entry in new_manifest["segments"]]
+    if new_roots[:len(old_roots)] != old_roots:
+        raise ValueError("The older manifest's segments are not a prefix of the newer manifest's")
+
+    hash_name, _ = parse_algorithm(new_manifest["algorithm"])
+    leaves = [leaf_hash(bytes.fromhex(root), hash_name).hex() for root in new_roots]
+    proof = _tree_consistency_proof(leaves, len(old_roots), new_manifest["algorithm"])
+    proof["manifest"] = True
+    return proof
+
+
+def event_metadata(trace_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the metadata hashed as the separate leaf in "events" mode
+
+    This is everything in the trace except the events, the signatures
+    (which sign the root), the hashing results and instrumentation that
+    is not marked as hashed.
+
+    Args:
+        trace_data: Trace as a dictionary (parsed JSON or model_dump())
+
+    Returns:
+        Metadata dictionary
+    """
+    metadata = {
+        key: value for key, value in trace_data.items()
+        if key not in ("events", "signatures")
+    }
+    if not instrumentation_hashed(trace_data):
+        metadata.pop("instrumentation", None)
+    if isinstance(metadata.get("hashing"), dict):
+        metadata["hashing"] = {
+            key: value for key, value in metadata["hashing"].items()
+            if key not in _HASHING_RESULT_FIELDS
+        }
+    return metadata
+
+
+def instrumentation_hashed(trace_data: Dict[str, Any]) -> bool:
+    """Whether the instrumentation section of a trace is covered by its root"""
+    instrumentation = trace_data.get("instrumentation")
+    return isinstance(instrumentation, dict) and bool(instrumentation.get("hashed"))
+
+
+def trace_hash_view(trace_data: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Extract the part of a trace that canonical (a2a-0.3) roots cover
+
+    This is the "events" metadata plus the events: the hashing results
+    and signatures are left out, so they can be filled in afterwards.
+
+    Args:
+        trace_data: Trace as a dictionary (parsed JSON or model_dump())
+
+    Returns:
+        Dictionary to canonicalize
+    """
+    view = event_metadata(trace_data)
+    view["events"] = trace_data.get("events", [])
+    return view
+
+
+def canonical_trace_bytes(trace_data: Dict[str, Any]) -> bytes:
+    """
+    Serialize a parsed trace to the canonical bytes hashed from a2a-0.3 on
+
+    Args:
+        trace_data: Trace as a dictionary (parsed JSON or model_dump(mode="json"))
+
+    Returns:
+        Canonical JSON bytes of trace_hash_view(trace_data)
+    """
+    PIPELINE_STATS.count_serialization()
+    return canonicalize(trace_hash_view(trace_data))
+
+
+def iter_canonical_trace_bytes(
+    header: Dict[str, Any],
+    events: Iterable[Dict[str, Any]]
+) -> Iterator[bytes]:
+    """
+    Serialize a lazily read trace to canonical_trace_bytes(), in pieces
+
+    Only one event is encoded at a time, so a trace read with TraceReader
+    can be hashed in constant memory.
+
+    Args:
+        header: Top-level fields of the trace except "events"
+        events: Event dictionaries, in order
+
+    Returns:
+        Iterator over the canonical JSON bytes
+    """
+    return iter_canonical_object(event_metadata(header), "events", events)
+
+
+def stored_trace_bytes(trace_data: Dict[str, Any]) -> bytes:
+    """
+    Serialize a parsed trace to the canonical bytes stored for a2a-0.3
+
+    These are the hashed bytes plus any unhashed instrumentation, which
+    verifiers drop again before hashing. Without such instrumentation
+    they equal canonical_trace_bytes().
+
+    Args:
+        trace_data: Trace as a dictionary (parsed JSON or model_dump(mode="json"))
+
+    Returns:
+        Canonical JSON bytes
+    """
+    view = trace_hash_view(trace_data)
+    if trace_data.get("instrumentation") is not None:
+        view["instrumentation"] = trace_data["instrumentation"]
+    PIPELINE_STATS.count_serialization()
+    return canonicalize(view)
+
+
+def event_tree_root(
+    event_root: bytes,
+    metadata_leaf: bytes,
+    hash_name: str = "sha256"
+) -> bytes:
+    """
+    Combine the metadata leaf with the root of the event leaves
+
+    The metadata leaf is the left child of the root, so appending events
+    only changes the right subtree and every earlier event leaf is reused.
+    """
+    return node_hash(metadata_leaf, event_root, hash_name)
+
+
+def compute_event_merkle(
+    trace_data: Dict[str, Any],
+    algorithm: str = "sha256-events",
+    trace_version: Optional[str] = None
+) -> Tuple[str, DigestArray, str]:
+    """
+    Compute the "events" mode Merkle root of a parsed trace
+
+    Each event is a leaf over its canonical JSON; the metadata is one more
+    leaf, so the root does not depend on how the trace was formatted.
+
+    Args:
+        trace_data: Trace as a dictionary
+        algorithm: Hashing.algorithm of the trace
+        trace_version: Trace version selecting the leaf JSON encoder
+            (default: trace_data["traceVersion"])
+
+    Returns:
+        Tuple of (merkle_root, event_hashes, metadata_hash); the roots are
+        hex strings and event_hashes is a DigestArray
+    """
+    hash_name, _ = parse_algorithm(algorithm)
+    encode = json_encoder_for(trace_version or trace_data.get("traceVersion", "a2a-0.2"))
+
+    accumulator = MerkleAccumulator(hash_name)
+    event_hashes = DigestArray()
+    for event in trace_data.get("events", []):
+        event_hashes.append(accumulator.append(encode(event)))
+
+    metadata_leaf = leaf_hash(encode(event_metadata(trace_data)), hash_name)
+    root = event_tree_root(accumulator.root(), metadata_leaf, hash_name)
+
+    return root.hex(), event_hashes, metadata_leaf.hex()
+
+
+def event_inclusion_proof(
+    event_hashes: Union[List[str], DigestArray],
+    metadata_hash: str,
+    index: int,
+    algorithm: str = "sha256-events"
+) -> Dict[str, Any]:
+    """
+    Build the audit path proving that one event is part of an "events" tree
+
+    Args:
+        event_hashes: Leaf hashes of all events (e.g. Hashing.chunkDigests)
+        metadata_hash: Hex hash of the metadata leaf
+        index: Position of the event to prove
+        algorithm: Hashing.algorithm of the trace
+
+    Returns:
+        Proof dictionary in the format of inclusion_proof()
+    """
+    hash_name, _ = parse_algorithm(algorithm)
+
+    proof = inclusion_proof(event_hashes, index, algorithm)
+    proof["path"].append({"hash": metadata_hash, "position": "left"})
+    proof["root"] = event_tree_root(
+        bytes.fromhex(proof["root"]), bytes.fromhex(metadata_hash), hash_name
+    ).hex()
+
+    return proof
+
+
+def event_consistency_proof(
+    event_hashes: Union[List[str], DigestArray],
+    old_size: int,
+    old_metadata_hash: str,
+    new_metadata_hash: str,
+    algorithm: str = "sha256-events"
+) -> Dict[str, Any]:
+    """
+    Build a proof that a grown "events" trace keeps all earlier events
+
+    The metadata leaf may change between versions (e.g. usage), so both
+    metadata hashes and the old event subtree root are part of the proof.
+
+    Args:
+        event_hashes: Leaf hashes of all events of the newer trace
+        old_size: Number of events in the older trace
+        old_metadata_hash: Hex metadata leaf of the older trace
+        new_metadata_hash: Hex metadata leaf of the newer trace
+        algorithm: Hashing.algorithm of the trace
+
+    Returns:
+        Proof dictionary in the format of consistency_proof() with the
+        extra keys "old_events_root", "old_metadata" and "new_metadata"
+    """
+    hash_name, _ = parse_algorithm(algorithm)
+
+    proof = consistency_proof(event_hashes, old_size, algorithm)
+    proof["old_events_root"] = proof["old_root"]
+    proof["old_metadata"] = old_metadata_hash
+    proof["new_metadata"] = new_metadata_hash
+    proof["old_root"] = event_tree_root(
+        bytes.fromhex(proof["old_root"]), bytes.fromhex(old_metadata_hash), hash_name
+    ).hex()
+    proof["new_root"] = event_tree_root(
+        bytes.fromhex(proof["new_root"]), bytes.fromhex(new_metadata_hash), hash_name
+    ).hex()
+
+    return proof
+
+
+StreamSource = Union[str, Path, BytesLike, mmap.mmap, Iterable[BytesLike]]
+
+
+def _iter_blocks(source: StreamSource) -> Iterator[BytesLike]:
+    """Yield byte blocks from a file path, a buffer or an iterable of blocks"""
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            for block in iter(lambda: f.read(STREAM_BLOCK_SIZE), b""):
+                yield block
+    elif isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        # Views of at most STREAM_BLOCK_SIZE, so an mmap is never decoded
+        # or copied as a whole
+        view = memoryview(source)
+        for start in range(0, len(view), STREAM_BLOCK_SIZE):
+            yield view[start:start + STREAM_BLOCK_SIZE]
+    else:
+        yield from source
+
+
+def _iter_byte_chunks(blocks: Iterable[BytesLike], chunk_size: int) -> Iterator[BytesLike]:
+    """Re-cut arbitrary byte blocks into chunk_size chunks"""
+    pending = bytearray()
+    for block in blocks:
+        view = memoryview(block)
+
+        # Complete a chunk left over from the previous block
+        if pending:
+            take = chunk_size - len(pending)
+            pending += view[:take]
+            view = view[take:]
+            if len(pending) < chunk_size:
+                continue
+            yield pending
+            pending = bytearray()
+
+        full = len(view) - len(view) % chunk_size
+        for i in range(0, full, chunk_size):
+            yield view[i:i + chunk_size]
+        pending += view[full:]
+
+    if pending:
+        yield pending
+
+
+def _iter_text_chunks(blocks: Iterable[BytesLike], chunk_size: int) -> Iterator[str]:
+    """Decode UTF-8 blocks incrementally and cut them into chunk_size characters"""
+    decoder = codecs.getincrementaldecoder("utf-8")()
+    pending = ""
+    for block in blocks:
+        pending += decoder.decode(block)
+        full = len(pending) - len(pending) % chunk_size
+        for i in range(0, full, chunk_size):
+            yield pending[i:i + chunk_size]
+        pending = pending[full:]
+    pending += decoder.decode(b"", final=True)
+    for i in range(0, len(pending), chunk_size):
+        yield pending[i:i + chunk_size]
+
+
+def compute_merkle_root_stream(
+    source: StreamSource,
+    chunk_size: int = 4096,
+    algorithm: str = DEFAULT_ALGORITHM,
+    min_chunk_size: Optional[int] = None,
+    max_chunk_size: Optional[int] = None
+) -> Tuple[str, int]:
+    """
+    Compute a trace Merkle root without holding the trace in memory
+
+    Chunks are hashed as they arrive and only the O(log n) frontier of the
+    tree is kept, so memory use does not grow with the trace size. The root
+    equals compute_trace_merkle() over the same content.
+
+    Args:
+        source: File path, bytes/mmap buffer, or iterable of byte blocks
+            (e.g. IPFSClient.cat_stream())
+        chunk_size: Size of each chunk (characters for "sha256", bytes otherwise)
+        algorithm: Hashing.algorithm of the trace
+        min_chunk_size: Minimum "cdc" chunk size
+        max_chunk_size: Maximum "cdc" chunk size
+
+    Returns:
+        Tuple of (merkle_root, chunk_count)
+
+    Raises:
+        ValueError: If the algorithm does not hash serialized bytes
+    """
+    hash_name, mode = parse_algorithm(algorithm)
+
+    if mode == "events":
+        raise ValueError(f"{algorithm} hashes parsed events, use compute_event_merkle()")
+
+    if mode == "legacy":
+        accumulator = LegacyMerkleAccumulator()
+        chunks = _iter_text_chunks(_iter_blocks(source), chunk_size)
+    elif mode == "cdc":
+        from .cdc import iter_cdc_chunks
+        accumulator = MerkleAccumulator(hash_name)
+        chunks = iter_cdc_chunks(_iter_blocks(source), chunk_size, min_chunk_size, max_chunk_size)
+    else:
+        accumulator = MerkleAccumulator(hash_name)
+        chunks = _iter_byte_chunks(_iter_blocks(source), chunk_size)
+
+    for chunk in chunks:
+        accumulator.append(chunk)
+
+    return accumulator.root_hex(), accumulator.size
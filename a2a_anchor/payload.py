@@ -0,0 +1,371 @@
+"""
+IPFS Payload Encodings for A2A Traces
+
+A trace is stored on IPFS either as JSON (the default) or as deterministic
+CBOR (see cbor.py). CBOR is smaller (about a quarter less than the
+compact a2a-0.3 canonical JSON) but not faster to read: json.loads is
+C-accelerated, and decoding CBOR is only comparable with cbor2 installed
+(the "cbor" extra); the built-in decoder is several times slower.
+Either can be compressed with zlib or lzma; compressed payloads start
+with a short envelope header naming the compression, so they can be
+recognized without the memo. Encoding and compression are recorded in
+the memo "v" field as suffixes of the trace version, e.g.
+"a2a-0.3+cbor+zlib".
+
+Only canonical trace versions (a2a-0.3 and later) can be stored as CBOR:
+their Merkle root covers the canonical bytes of the parsed trace, which
+are the same whichever encoding the payload was decoded from. Roots are
+always computed over the uncompressed data.
+"""
+
+import itertools
+import json
+import lzma
+import zlib
+from typing import TYPE_CHECKING, Any, Dict, Iterable, Iterator, Optional, Tuple
+
+from . import cbor
+from .merkle import uses_canonical_json
+from .pipeline import PIPELINE_STATS
+
+if TYPE_CHECKING:
+    from .trace_schema import TraceJSON
+
+
+PAYLOAD_ENCODINGS = ("json", "cbor")
+
+COMPRESSIONS = ("zlib", "lzma")
+DEFAULT_COMPRESSION_LEVEL = 6
+
+# Decompressed payloads larger than this are rejected, so that a small
+# compressed payload cannot exhaust the memory of a verifier
+DEFAULT_MAX_OUTPUT_SIZE = 1024 * 1024 * 1024
+_OUTPUT_BLOCK_SIZE = 1024 * 1024
+
+# Separates the trace version, encoding and compression in the memo "v" field
+VERSION_SEPARATOR = "+"
+
+# Compressed payloads start with ENVELOPE_MAGIC + compression name + b"\n".
+# The NUL byte never starts a JSON or CBOR trace.
+ENVELOPE_MAGIC = b"\x00a2a:"
+_MAX_ENVELOPE_SIZE = 32
+
+
+def _check_compression(compression: str) -> None:
+    if compression not in COMPRESSIONS:
+        raise ValueError(f"Unsupported payload compression: {compression}")
+
+
+def payload_version(
+    trace_version: str,
+    encoding: str = "json",
+    compression: Optional[str] = None
+) -> str:
+    """
+    Build the memo "v" value for a trace version and payload format
+
+    Uncompressed JSON payloads keep the bare trace version, so existing
+    memos are unchanged.
+
+    Raises:
+        ValueError: If the encoding or compression is unknown
+    """
+    if encoding not in PAYLOAD_ENCODINGS:
+        raise ValueError(f"Unsupported payload encoding: {encoding}")
+
+    parts = [trace_version]
+    if encoding != "json":
+        parts.append(encoding)
+    if compression:
+        _check_compression(compression)
+        parts.append(compression)
+    return VERSION_SEPARATOR.join(parts)
+
+
+def parse_payload_version(version: str) -> Tuple[str, str, Optional[str]]:
+    """
+    Split a memo "v" value into (trace_version, encoding, compression)
+
+    Raises:
+        ValueError: If a suffix is not a known encoding or compression
+    """
+    trace_version, *suffixes = version.split(VERSION_SEPARATOR)
+    encoding, compression = "json", None
+    for suffix in suffixes:
+        if suffix in PAYLOAD_ENCODINGS:
+            encoding = suffix
+        elif suffix in COMPRESSIONS:
+            compression = suffix
+        else:
+            raise ValueError(f"Unsupported payload format: {suffix}")
+    return trace_version, encoding, compression
+
+
+def compress_payload(data: bytes, compression: str, level: Optional[int] = None) -> bytes:
+    """
+    Compress a payload and wrap it in the envelope
+
+    Args:
+        data: Uncompressed payload bytes
+        compression: "zlib" or "lzma"
+        level: Compression level 0-9 (zlib level or lzma preset;
+            default: DEFAULT_COMPRESSION_LEVEL)
+
+    Returns:
+        Envelope header followed by the compressed data
+
+    Raises:
+        ValueError: If the compression or level is invalid
+    """
+    _check_compression(compression)
+    level = DEFAULT_COMPRESSION_LEVEL if level is None else level
+    if not 0 <= level <= 9:
+        raise ValueError(f"Compression level must be between 0 and 9, not {level}")
+
+    if compression == "zlib":
+        body = zlib.compress(data, level)
+    else:
+        body = lzma.compress(data, preset=level)
+    return ENVELOPE_MAGIC + compression.encode("ascii") + b"\n" + body
+
+
+def read_envelope(payload: bytes) -> Tuple[Optional[str], int]:
+    """
+    Read the envelope header of a payload
+
+    Returns:
+        Tuple of (compression, header_size); (None, 0) for uncompressed payloads
+
+    Raises:
+        ValueError: If the header is malformed or names an unknown compression
+    """
+    if not payload.startswith(ENVELOPE_MAGIC):
+        return None, 0
+    end = payload.find(b"\n", 0, _MAX_ENVELOPE_SIZE)
+    if end < 0:
+        raise ValueError("Malformed payload envelope")
+    compression = payload[len(ENVELOPE_MAGIC):end].decode("ascii", "replace")
+    _check_compression(compression)
+    return compression, end + 1
+
+
+def _decompressor(compression: str):
+    """Return an incremental decompressor (with decompress() and eof)"""
+    if compression == "zlib":
+        return zlib.decompressobj()
+    return lzma.LZMADecompressor()
+
+
+def _inflate(decompressor: Any, data: bytes) -> Iterator[bytes]:
+    """Decompress one input block in pieces of at most _OUTPUT_BLOCK_SIZE bytes"""
+    if isinstance(decompressor, lzma.LZMADecompressor):
+        yield decompressor.decompress(data, _OUTPUT_BLOCK_SIZE)
+        while not decompressor.eof and not decompressor.needs_input:
+            yield decompressor.decompress(b"", _OUTPUT_BLOCK_SIZE)
+        return
+
+    # zlib keeps the input it could not process yet in unconsumed_tail
+    piece = decompressor.decompress(data, _OUTPUT_BLOCK_SIZE)
+    yield piece
+    while decompressor.unconsumed_tail or (
+        len(piece) == _OUTPUT_BLOCK_SIZE and not decompressor.eof
+    ):
+        piece = decompressor.decompress(decompressor.unconsumed_tail, _OUTPUT_BLOCK_SIZE)
+        yield piece
+
+
+def _decompress_blocks(
+    compression: str,
+    blocks: Iterable[bytes],
+    max_output_size: Optional[int]
+) -> Iterator[bytes]:
+    """Decompress a compressed payload body, enforcing max_output_size"""
+    decompressor = _decompressor(compression)
+    size = 0
+    try:
+        for block in blocks:
+            for piece in _inflate(decompressor, block):
+                size += len(piece)
+                if max_output_size is not None and size > max_output_size:
+                    raise ValueError(
+                        f"Decompressed {compression} payload exceeds {max_output_size} bytes"
+                    )
+                yield piece
+    except (zlib.error, lzma.LZMAError) as e:
+        raise ValueError(f"Invalid {compression} payload: {e}")
+    if not decompressor.eof:
+        raise ValueError(f"Truncated {compression} payload")
+
+
+def decompress_payload(
+    payload: bytes,
+    max_output_size: Optional[int] = DEFAULT_MAX_OUTPUT_SIZE
+) -> Tuple[Optional[str], bytes]:
+    """
+    Unwrap and decompress a payload
+
+    Uncompressed payloads are returned unchanged.
+
+    Args:
+        payload: Stored payload bytes
+        max_output_size: Largest accepted decompressed size in bytes
+            (None: no limit)
+
+    Returns:
+        Tuple of (compression, data)
+
+    Raises:
+        ValueError: If the payload is malformed or truncated, or
+            decompresses to more than max_output_size bytes
+    """
+    compression, offset = read_envelope(payload)
+    if compression is None:
+        return None, payload
+
+    pieces = list(_decompress_blocks(compression, [payload[offset:]], max_output_size))
+    return compression, b"".join(pieces)
+
+
+def iter_decompressed(
+    blocks: Iterable[bytes],
+    max_output_size: Optional[int] = DEFAULT_MAX_OUTPUT_SIZE
+) -> Iterator[bytes]:
+    """
+    Decompress a payload read as a stream of byte blocks
+
+    Only one compressed block is decompressed at a time, and its output
+    is yielded in pieces of at most 1 MiB, so large traces are never held
+    in memory in compressed and uncompressed form at once. Uncompressed
+    payloads are passed through.
+
+    Args:
+        blocks: Byte blocks (e.g. ipfs_client.cat_stream(cid))
+        max_output_size: Largest accepted decompressed size in bytes
+            (None: no limit); uncompressed payloads are not limited
+
+    Returns:
+        Iterator over uncompressed byte blocks
+
+    Raises:
+        ValueError: If the payload is malformed or truncated, or
+            decompresses to more than max_output_size bytes
+    """
+    blocks = iter(blocks)
+    head = b""
+    for block in blocks:
+        head += block
+        if len(head) >= _MAX_ENVELOPE_SIZE or b"\n" in head:
+            break
+
+    compression, offset = read_envelope(head)
+    if compression is None:
+        if head:
+            yield head
+        yield from blocks
+        return
+
+    yield from _decompress_blocks(
+        compression, itertools.chain([head[offset:]], blocks), max_output_size
+    )
+
+
+def detect_encoding(payload: bytes) -> str:
+    """
+    Detect the encoding of a stored trace from its first byte
+
+    A JSON trace starts with "{" (possibly after whitespace); a CBOR trace
+    starts with a map header (major type 5, initial bytes 0xa0-0xbb).
+    """
+    head = payload.lstrip(b" \t\r\n")[:1]
+    if head == b"{":
+        return "json"
+    if head and 0xa0 <= head[0] <= 0xbb:
+        return "cbor"
+    raise ValueError("Payload is neither a JSON nor a CBOR trace")
+
+
+def encode_trace(
+    trace: "TraceJSON",
+    encoding: str = "json",
+    compression: Optional[str] = None,
+    level: Optional[int] = None
+) -> bytes:
+    """
+    Serialize a trace for upload to IPFS
+
+    JSON payloads are trace.payload(), the buffer the root was computed
+    over (a2a-0.1/0.2) or from (a2a-0.3). CBOR payloads hold the fields
+    of get_merkle_json(); they leave out the leaf digests, which can be
+    recomputed.
+
+    Args:
+        trace: Trace with its Merkle root computed
+        encoding: "json" or "cbor"
+        compression: "zlib", "lzma" or None
+        level: Compression level 0-9
+
+    Returns:
+        Payload bytes
+
+    Raises:
+        ValueError: If the encoding is unknown or cannot hold this trace
+            version, or the compression is invalid
+    """
+    if encoding == "json":
+        data = trace.payload()
+    elif encoding not in PAYLOAD_ENCODINGS:
+        raise ValueError(f"Unsupported payload encoding: {encoding}")
+    elif not uses_canonical_json(trace.traceVersion):
+        raise ValueError(
+            f"{encoding} payloads need a canonical trace version, not {trace.traceVersion}"
+        )
+    else:
+        data = trace.to_cbor()
+
+    return compress_payload(data, compression, level) if compression else data
+
+
+def decode_trace(
+    payload: bytes,
+    encoding: Optional[str] = None,
+    compression: Optional[str] = None
+) -> Tuple[Optional[str], Dict[str, Any]]:
+    """
+    Parse a stored trace
+
+    Compressed payloads are recognized by their envelope and decompressed.
+
+    Args:
+        payload: Bytes retrieved from IPFS
+        encoding: Encoding from the memo (default: detected from the payload)
+        compression: Compression from the memo; the envelope must match it
+
+    Returns:
+        Tuple of (trace_json, trace_data); trace_json is the stored text of
+        JSON payloads, which a2a-0.1/0.2 roots are computed over, and None
+        for binary payloads
+
+    Raises:
+        ValueError: If the payload cannot be decoded or its compression
+            does not match the memo
+    """
+    stored_compression, payload = decompress_payload(payload)
+    if compression and compression != stored_compression:
+        raise ValueError(
+            f"Payload compression {stored_compression} does not match the memo ({compression})"
+        )
+
+    encoding = encoding or detect_encoding(payload)
+    PIPELINE_STATS.count_parse()
+
+    if encoding == "json":
+        trace_json = payload.decode("utf-8")
+        return trace_json, json.loads(trace_json)
+
+    if encoding not in PAYLOAD_ENCODINGS:
+        raise ValueError(f"Unsupported payload encoding: {encoding}")
+
+    trace_data: Any = cbor.loads(payload)
+    if not isinstance(trace_data, dict):
+        raise ValueError("CBOR payload is not a trace object")
+    return None, trace_data
@@ -0,0 +1,153 @@
+"""
+Instrumentation for the Serialized Trace Buffer
+
+A trace is serialized once, when its Merkle root is computed, into an
+immutable bytes buffer (TraceJSON.payload()). The same object is then
+written to the local file, uploaded to IPFS and reported, without being
+serialized, copied or parsed again. A compressed upload reads the buffer
+once; the upload and report stages then use the compressed object.
+
+PIPELINE_STATS counts serializations and parses of whole traces and
+records which buffer each stage of the pipeline handled, so this can be
+checked (e.g. in tests or from the app's logs).
+"""
+
+import json
+import threading
+import time
+from collections import deque
+from pathlib import Path
+from typing import Any, Deque, Dict, List, Optional, Union
+
+
+# Suffix of the file persist_payload() keeps the hashing section in
+HASHING_SUFFIX = ".hashing.json"
+
+
+class StageRecord:
+    """One pipeline stage that handled a serialized trace buffer"""
+
+    __slots__ = ("stage", "buffer_id", "size", "seconds")
+
+    def __init__(self, stage: str, buffer_id: int, size: int, seconds: float):
+        self.stage = stage
+        self.buffer_id = buffer_id
+        self.size = size
+        self.seconds = seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            "stage": self.stage,
+            "buffer_id": self.buffer_id,
+            "size": self.size,
+            "seconds": self.seconds
+        }
+
+
+class PipelineStats:
+    """
+    Counters for whole-trace serializations and parses.
+
+    Attributes:
+        serializations: Traces serialized (canonical bytes or JSON text)
+        parses: Trace payloads parsed back into Python objects
+        stages: Most recent stage records (oldest are dropped)
+    """
+
+    def __init__(self, max_stages: int = 256):
+        self._lock = threading.Lock()
+        self.serializations = 0
+        self.parses = 0
+        self.stages: Deque[StageRecord] = deque(maxlen=max_stages)
+
+    def count_serialization(self) -> None:
+        with self._lock:
+            self.serializations += 1
+
+    def count_parse(self) -> None:
+        with self._lock:
+            self.parses += 1
+
+    def record_stage(self, stage: str, buffer: bytes, started: Optional[float] = None) -> None:
+        """
+        Record that a stage handled buffer.
+
+        Args:
+            stage: Stage name (e.g. "hash", "persist", "upload")
+            buffer: The buffer the stage used
+            started: time.perf_counter() at the start of the stage
+        """
+        seconds = time.perf_counter() - started if started is not None else 0.0
+        with self._lock:
+            self.stages.append(StageRecord(stage, id(buffer), len(buffer), seconds))
+
+    def stage_records(self, stages: Optional[List[str]] = None) -> List[StageRecord]:
+        """Return the recorded stages, optionally only those named in stages"""
+        with self._lock:
+            return [r for r in self.stages if stages is None or r.stage in stages]
+
+    def shared_buffer(self, stages: List[str]) -> bool:
+        """
+        Check that the last record of each named stage used the same buffer.
+
+        Returns:
+            True if every stage was recorded and all saw one buffer object
+        """
+        latest = {record.stage: record for record in self.stage_records(stages)}
+        if set(latest) != set(stages):
+            return False
+        return len({record.buffer_id for record in latest.values()}) == 1
+
+    def reset(self) -> None:
+        """Clear all counters and records"""
+        with self._lock:
+            self.serializations = 0
+            self.parses = 0
+            self.stages.clear()
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert to dictionary."""
+        return {
+            "serializations": self.serializations,
+            "parses": self.parses,
+            "stages": [record.to_dict() for record in self.stage_records()]
+        }
+
+
+PIPELINE_STATS = PipelineStats()
+
+
+def persist_payload(
+    payload: bytes,
+    path: Union[str, Path],
+    hashing: Optional[Dict[str, Any]] = None
+) -> Path:
+    """
+    Write a serialized trace buffer to a local file as-is.
+
+    The file holds exactly the bytes uploaded to IPFS, so it has the same
+    CID and verifies against the same root. For a2a-0.3 traces these are
+    the canonical bytes, which leave out the hashing results (the memo
+    carries the root); pass hashing to keep them in a sidecar file
+    "<name>.hashing.json" (HASHING_SUFFIX) next to the trace.
+
+    Args:
+        payload: Buffer from TraceJSON.payload()
+        path: Destination file
+        hashing: Hashing section of the trace (root, digests) to store
+            beside it
+
+    Returns:
+        Path of the written file
+    """
+    started = time.perf_counter()
+    path = Path(path)
+    with open(path, "wb") as f:
+        f.write(payload)
+    PIPELINE_STATS.record_stage("persist", payload, started)
+
+    if hashing is not None:
+        with open(path.with_suffix(HASHING_SUFFIX), "w", encoding="utf-8") as f:
+            json.dump(hashing, f, indent=2)
+    return path
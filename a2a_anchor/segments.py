@@ -0,0 +1,143 @@
+"""
+Segmented A2A Traces
+
+A long session is split into bounded segments. Each segment is an
+ordinary TraceJSON (with a "segment" field giving its position) that has
+its own Merkle root and is stored as its own IPFS object. A small
+TraceManifest lists the segments and commits to them with a root-of-roots;
+the manifest is what gets anchored.
+
+Segments are finalized as soon as they are full, so they can be uploaded
+while the session is still running, and they can be uploaded and verified
+independently of each other.
+"""
+
+from datetime import datetime, timezone
+from typing import Callable, List, Optional, Sequence, Union
+
+from .merkle import DEFAULT_ALGORITHM
+from .trace_builder import TraceBuilder
+from .trace_schema import TraceJSON, TraceManifest, SegmentInfo, Event, EventRecord
+
+
+# Events per segment unless configured otherwise
+DEFAULT_SEGMENT_EVENTS = 1000
+
+
+class SegmentedTraceBuilder:
+    """
+    Build a session as a sequence of bounded segments.
+
+    Messages and events go into the open segment; once it holds at least
+    segment_events events it is finalized (built and hashed) and a new
+    segment is opened. Finalized segments never change, so they can be
+    handed to on_segment (e.g. to upload them) before the session ends.
+    """
+
+    def __init__(
+        self,
+        session_id: str = None,
+        algorithm: str = DEFAULT_ALGORITHM,
+        chunk_size: int = 4096,
+        segment_events: int = DEFAULT_SEGMENT_EVENTS,
+        trusted: bool = False,
+        on_segment: Optional[Callable[[TraceJSON], None]] = None
+    ):
+        """
+        Initialize the builder.
+
+        Args:
+            session_id: Session ID shared by all segments
+            algorithm: Hashing algorithm of the segments
+            chunk_size: Chunk size of the segments
+            segment_events: Events after which a segment is finalized
+            trusted: Skip per-event validation (see TraceBuilder)
+            on_segment: Called with each segment when it is finalized
+
+        Raises:
+            ValueError: If segment_events is not positive
+        """
+        if segment_events < 1:
+            raise ValueError("segment_events must be positive")
+
+        self.session_id = session_id or TraceBuilder._generate_session_id()
+        self.algorithm = algorithm
+        self.chunk_size = chunk_size
+        self.segment_events = segment_events
+        self.trusted = trusted
+        self.on_segment = on_segment
+        self.created_at = datetime.now(timezone.utc).isoformat()
+        self.segments: List[TraceJSON] = []
+        self.event_count = 0
+        self._builder = self._new_builder()
+
+    def _new_builder(self) -> TraceBuilder:
+        builder = TraceBuilder(
+            self.session_id,
+            algorithm=self.algorithm,
+            chunk_size=self.chunk_size,
+            trusted=self.trusted,
+            segment=SegmentInfo(index=len(self.segments), firstEvent=self.event_count)
+        )
+        builder.created_at = self.created_at
+        # Model info is only reported once per session; carry it over
+        if self.segments and self.segments[-1].model.name != "unknown":
+            builder.model_info = self.segments[-1].model
+        return builder
+
+    def _after_add(self) -> None:
+        if len(self._builder.events) >= self.segment_events:
+            self.finalize_segment()
+
+    def add_message(self, message) -> None:
+        """Add a LangChain message to the open segment"""
+        self._builder.add_message(message)
+        self._after_add()
+
+    def add_messages(self, messages: List) -> None:
+        """Add multiple messages"""
+        for message in messages:
+            self.add_message(message)
+
+    def add_event(self, event: Union[Event, EventRecord]) -> None:
+        """Add an already built event to the open segment"""
+        self._builder.add_event(event)
+        self._after_add()
+
+    def finalize_segment(self) -> Optional[TraceJSON]:
+        """
+        Build and hash the open segment and open a new one.
+
+        Returns:
+            The finalized segment, or None if the open segment is empty
+        """
+        if not self._builder.events:
+            return None
+
+        segment = self._builder.build()
+        self.segments.append(segment)
+        self.event_count += len(segment.events)
+        self._builder = self._new_builder()
+
+        if self.on_segment:
+            self.on_segment(segment)
+        return segment
+
+    def build_manifest(
+        self,
+        cids: Optional[Sequence[str]] = None,
+        versions: Optional[Sequence[str]] = None
+    ) -> TraceManifest:
+        """
+        Finalize the open segment and build the manifest.
+
+        Args:
+            cids: IPFS CIDs of the segments, if uploaded
+            versions: Payload versions of the uploaded segments
+
+        Returns:
+            TraceManifest
+        """
+        self.finalize_segment()
+        return TraceManifest.from_segments(self.segments, cids, versions)
+
@@ -0,0 +1,222 @@
+"""
+Async Trace Capture from LangChain Event Streams
+
+AsyncTraceBuilder consumes the events of runnable.astream_events(...,
+version="v2") and records trace events as they arrive, the same way
+TraceCallbackHandler does for callbacks. The stream can be passed through
+(stream()) so tokens still reach the caller, or drained (consume()).
+
+Only the recorded events are kept; streamed chunks and chain outputs are
+dropped as soon as they have been seen. Each session has its own builder
+and nothing blocks, so many sessions can be captured on one event loop
+(see capture_sessions()). A partial trace can be checkpointed at any
+time, or automatically every checkpoint_events events.
+"""
+
+import asyncio
+import inspect
+from typing import Any, AsyncIterable, AsyncIterator, Callable, Dict, List, Mapping, Optional
+
+from langchain_core.messages import AIMessage
+
+from .callbacks import TraceCallbackHandler, output_tokens, LIVE_ALGORITHM
+from .trace_schema import TraceJSON
+
+
+def _model_input(data: Dict[str, Any]) -> List[Any]:
+    """Get the message list from the data of an on_chat_model_start event"""
+    messages = (data.get("input") or {}).get("messages") or []
+    # Batched inputs are a list of message lists; agents send one
+    if messages and isinstance(messages[0], list):
+        messages = messages[0]
+    return messages
+
+
+class AsyncTraceBuilder:
+    """
+    Build an A2A trace from an astream_events() stream.
+
+    Attributes:
+        recorder: TraceCallbackHandler holding the builder and timings
+        checkpoint_events: Events between automatic checkpoints (None: off)
+        on_checkpoint: Called (or awaited) with each automatic checkpoint
+    """
+
+    def __init__(
+        self,
+        session_id: str = None,
+        algorithm: str = LIVE_ALGORITHM,
+        chunk_size: int = 4096,
+        instrument: bool = False,
+        hash_instrumentation: bool = False,
+        checkpoint_events: Optional[int] = None,
+        on_checkpoint: Optional[Callable[[TraceJSON], Any]] = None
+    ):
+        """
+        Initialize the builder.
+
+        Args:
+            session_id: Session ID of the trace
+            algorithm: Hashing algorithm (an "events" algorithm makes
+                checkpoints and the final build cheap)
+            chunk_size: Chunk size for byte-based algorithms
+            instrument: Add the call timings to the trace
+            hash_instrumentation: Cover the timings by the Merkle root
+            checkpoint_events: Checkpoint after every this many events
+            on_checkpoint: Receives each automatic checkpoint; may be a
+                coroutine function
+
+        Raises:
+            ValueError: If checkpoint_events is not positive
+        """
+        if checkpoint_events is not None and checkpoint_events < 1:
+            raise ValueError("checkpoint_events must be positive")
+
+        self.recorder = TraceCallbackHandler(
+            session_id, algorithm=algorithm, chunk_size=chunk_size,
+            instrument=instrument, hash_instrumentation=hash_instrumentation
+        )
+        self.checkpoint_events = checkpoint_events
+        self.on_checkpoint = on_checkpoint
+        self._checkpointed = 0
+
+    @property
+    def session_id(self) -> str:
+        return self.recorder.session_id
+
+    @property
+    def event_count(self) -> int:
+        return len(self.recorder.builder.events)
+
+    def handle_event(self, event: Dict[str, Any]) -> None:
+        """
+        Record one astream_events() event.
+
+        Events other than chat model, LLM and tool starts and ends are
+        ignored, apart from noting the first streamed token of a call.
+        """
+        kind = event.get("event")
+        run_id = event.get("run_id")
+        name = event.get("name") or "unknown"
+        data = event.get("data") or {}
+
+        if kind == "on_chat_model_start":
+            self.recorder.start_step(run_id, "llm", name)
+            self.recorder.record_inputs(_model_input(data))
+        elif kind == "on_llm_start":
+            self.recorder.start_step(run_id, "llm", name)
+        elif kind in ("on_chat_model_stream", "on_llm_stream"):
+            self.recorder.first_token(run_id)
+        elif kind in ("on_chat_model_end", "on_llm_end"):
+            output = data.get("output")
+            if isinstance(output, AIMessage):
+                messages = [output]
+            else:
+                # Completion models end with an LLMResult
+                messages = [
+                    AIMessage(content=generation.text)
+                    for generations in getattr(output, "generations", [])[:1]
+                    for generation in generations[:1]
+                ]
+            self.recorder.finish_step(
+                run_id, output_tokens=output_tokens(messages[0]) if messages else None
+            )
+            for message in messages:
+                self.recorder.record_output(message)
+        elif kind == "on_tool_start":
+            self.recorder.start_step(run_id, "tool", name)
+        elif kind == "on_tool_end":
+            self.recorder.finish_step(run_id)
+            self.recorder.record_tool_output(data.get("output"), name)
+        elif kind in ("on_tool_error", "on_llm_error", "on_chat_model_error"):
+            self.recorder.finish_step(run_id, data.get("error"))
+
+    async def _maybe_checkpoint(self) -> None:
+        if not self.checkpoint_events:
+            return
+        if self.event_count - self._checkpointed < self.checkpoint_events:
+            return
+        trace = self.checkpoint()
+        if self.on_checkpoint:
+            result = self.on_checkpoint(trace)
+            if inspect.isawaitable(result):
+                await result
+
+    async def stream(self, events: AsyncIterable[Dict[str, Any]]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Record events while passing them through.
+
+        Args:
+            events: Stream from runnable.astream_events(..., version="v2")
+
+        Returns:
+            Async iterator over the same events
+        """
+        async for event in events:
+            self.handle_event(event)
+            await self._maybe_checkpoint()
+            yield event
+
+    async def consume(self, events: AsyncIterable[Dict[str, Any]]) -> TraceJSON:
+        """
+        Record a whole stream and build the trace.
+
+        Args:
+            events: Stream from runnable.astream_events(..., version="v2")
+
+        Returns:
+            TraceJSON object
+        """
+        async for _ in self.stream(events):
+            pass
+        return self.build()
+
+    def checkpoint(self) -> TraceJSON:
+        """
+        Build a trace of the events recorded so far.
+
+        Recording continues afterwards. The checkpoint is a complete trace
+        with its own Merkle root and can be anchored like any other.
+
+        Returns:
+            TraceJSON object
+        """
+        self._checkpointed = self.event_count
+        return self.recorder.build()
+
+    def build(self) -> TraceJSON:
+        """Build the trace"""
+        return self.recorder.build()
+
+    def timings(self) -> List[Dict[str, Any]]:
+        """Timings of the finished LLM and tool calls as dictionaries"""
+        return self.recorder.timings()
+
+
+async def capture_sessions(
+    streams: Mapping[str, AsyncIterable[Dict[str, Any]]],
+    max_concurrency: Optional[int] = None,
+    **builder_kwargs: Any
+) -> Dict[str, TraceJSON]:
+    """
+    Capture many sessions concurrently on the running event loop.
+
+    Args:
+        streams: astream_events() streams by session ID
+        max_concurrency: Sessions consumed at once (default: all)
+        **builder_kwargs: Further AsyncTraceBuilder arguments
+
+    Returns:
+        Traces by session ID
+    """
+    semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+
+    async def capture(session_id: str, events: AsyncIterable[Dict[str, Any]]) -> TraceJSON:
+        builder = AsyncTraceBuilder(session_id, **builder_kwargs)
+        if semaphore is None:
+            return await builder.consume(events)
+        async with semaphore:
+            return await builder.consume(events)
+
+    traces = await asyncio.gather(*(capture(sid, events) for sid, events in streams.items()))
+    return dict(zip(streams, traces))
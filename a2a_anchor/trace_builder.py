@@ -1,25 +1,82 @@
 """Build A2A Trace from LangChain agent execution results"""
 
+import time
 from datetime import datetime, timezone
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Union
 from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
 
 from .trace_schema import (
-    TraceJSON, Session, Model, Event, Usage, Hashing
+    TraceJSON, Session, Model, Event, EventRecord, Usage, Hashing, SegmentInfo,
+    Instrumentation, StepTiming, Attachment
 )
-from .merkle import compute_trace_merkle
+from .merkle import (
+    compute_trace_merkle, compute_trace_digests, trace_version_for, parse_algorithm,
+    resolve_algorithm, uses_canonical_json,
+    json_encoder_for, event_metadata, event_tree_root, leaf_hash,
+    DigestArray, MerkleAccumulator, DEFAULT_ALGORITHM
+)
+from .cdc import cdc_sizes, LeafHashCache
+from .attachments import offload_event, DEFAULT_ATTACHMENT_THRESHOLD
+from .interning import InternTableBuilder, DEFAULT_INTERN_MIN_SIZE
+from .pipeline import PIPELINE_STATS
 
 
 class TraceBuilder:
     """Build A2A trace from LangChain messages"""
 
-    def __init__(self, session_id: str = None):
+    def __init__(
+        self,
+        session_id: str = None,
+        algorithm: str = DEFAULT_ALGORITHM,
+        chunk_size: int = 4096,
+        min_chunk_size: Optional[int] = None,
+        max_chunk_size: Optional[int] = None,
+        leaf_cache: Optional[LeafHashCache] = None,
+        trusted: bool = False,
+        segment: Optional[SegmentInfo] = None,
+        instrument: bool = False,
+        hash_instrumentation: bool = False,
+        attachment_store: Any = None,
+        attachment_threshold: int = DEFAULT_ATTACHMENT_THRESHOLD,
+        intern: bool = False,
+        intern_min_size: int = DEFAULT_INTERN_MIN_SIZE
+    ):
         self.session_id = session_id or self._generate_session_id()
+        # "auto" is benchmarked once per process (see fastest_algorithm)
+        self.algorithm = resolve_algorithm(algorithm)
+        self.chunk_size = chunk_size
+        self.min_chunk_size = min_chunk_size
+        self.max_chunk_size = max_chunk_size
+        # Reuses "cdc" leaf hashes when the same session is built again
+        self.leaf_cache = leaf_cache
+        # Trusted builders skip per-event validation
+        self.trusted = trusted
+        self._make_event = EventRecord if trusted else Event
+        # Position within a segmented session (see segments.py)
+        self.segment = segment
         self.created_at = datetime.now(timezone.utc).isoformat()
-        self.events: List[Event] = []
+        self.events: List[Union[Event, EventRecord]] = []
+        # Running root over the events added so far (one leaf per event)
+        self.hash_name, self.mode = parse_algorithm(self.algorithm)
+        self.trace_version = trace_version_for(self.algorithm)
+        self._encode_json = json_encoder_for(self.trace_version)
+        # Event leaves, hashed on demand (see _hash_new_events)
+        self.accumulator = MerkleAccumulator(self.hash_name)
+        self.event_hashes = DigestArray()
         self.usage_data: List[Usage] = []
         self.actors = set(["user", "assistant"])
         self.model_info = None
+        # Per-call timings, added to the trace as its instrumentation
+        # section if instrument is set (a2a-0.1 roots always cover it)
+        self.instrument = instrument
+        self.hash_instrumentation = hash_instrumentation or not uses_canonical_json(self.trace_version)
+        self.steps: List[StepTiming] = []
+        # Large event fields go to this blob store (see attachments.py)
+        self.attachment_store = attachment_store
+        self.attachment_threshold = attachment_threshold
+        self.attachments: List[Attachment] = []
+        # Repeated event payloads are stored once (see interning.py)
+        self.interner = InternTableBuilder(intern_min_size) if intern else None
 
     @staticmethod
     def _generate_session_id() -> str:
@@ -27,17 +84,63 @@ class TraceBuilder:
         import uuid
         return f"session-{uuid.uuid4().hex[:12]}"
 
+    def add_step(self, step: StepTiming) -> None:
+        """Record the timing of an LLM or tool call"""
+        self.steps.append(step)
+
+    def add_event(self, event: Union[Event, EventRecord]) -> None:
+        """Add an already built event (e.g. from a log) to the trace"""
+        self._append_event(event)
+
+    def _append_event(self, event: Union[Event, EventRecord]) -> None:
+        """Record an event"""
+        if self.attachment_store is not None:
+            event, attachments = offload_event(
+                event, len(self.events), self.attachment_store,
+                self.attachment_threshold, self.hash_name
+            )
+            self.attachments.extend(attachments)
+        if self.interner is not None:
+            self.interner.add_event(event)
+        self.events.append(event)
+
+    def _event_leaf(self, event: Union[Event, EventRecord]) -> bytes:
+        """Encoded event as hashed into its leaf"""
+        data = event.to_dict() if isinstance(event, EventRecord) else event.model_dump()
+        return self._encode_json(data)
+
+    def _hash_new_events(self) -> None:
+        """Fold the events added since the last call into the running root"""
+        for event in self.events[len(self.event_hashes):]:
+            self.event_hashes.append(self.accumulator.append(self._event_leaf(event)))
+
+    def current_root(self) -> str:
+        """
+        Get the running Merkle root of the events added so far.
+
+        Events are hashed when this (or build() in "events" mode) is
+        called, O(log n) each and only once, so other modes pay nothing
+        for it unless it is used. In "events" mode build() combines it
+        with the metadata leaf to get the anchored chunkMerkleRoot
+        (unless it interns, as interning changes the events it hashes).
+
+        Returns:
+            Hex root digest
+        """
+        self._hash_new_events()
+        return self.accumulator.root_hex()
+
     def add_message(self, message) -> None:
         """Add a message to the trace"""
         timestamp = datetime.now(timezone.utc).isoformat()
 
         if isinstance(message, HumanMessage):
-            event = Event(
+            event = self._make_event(
                 type="human_message",
                 ts=timestamp,
                 content=message.content
             )
-            self.events.append(event)
+            self._append_event(event)
 
         elif isinstance(message, AIMessage):
             # Extract model info if available
@@ -64,36 +167,36 @@ class TraceBuilder:
                     tool_name = tool_call.get('name', 'unknown')
                     self.actors.add(f"tool:{tool_name}")
 
-                    event = Event(
+                    event = self._make_event(
                         type="ai_tool_call",
                         ts=timestamp,
                         tool=tool_name,
                         args=tool_call.get('args', {}),
                         tool_call_id=tool_call.get('id')
                     )
-                    self.events.append(event)
+                    self._append_event(event)
 
             # Regular AI message
             if message.content:
-                event = Event(
+                event = self._make_event(
                     type="ai_message",
                     ts=timestamp,
                     content=message.content
                 )
-                self.events.append(event)
+                self._append_event(event)
 
         elif isinstance(message, ToolMessage):
             tool_name = message.name if hasattr(message, 'name') else 'unknown'
             self.actors.add(f"tool:{tool_name}")
 
-            event = Event(
+            event = self._make_event(
                 type="tool_result",
                 ts=timestamp,
                 tool=tool_name,
                 content=message.content,
                 tool_call_id=message.tool_call_id if hasattr(message, 'tool_call_id') else None
             )
-            self.events.append(event)
+            self._append_event(event)
 
     def add_messages(self, messages: List) -> None:
         """Add multiple messages"""
@@ -110,9 +213,9 @@ class TraceBuilder:
         Returns:
             TraceJSON object
         """
-        # Default model if not extracted
-        if not self.model_info:
-            self.model_info = Model(name="unknown", provider="unknown")
+        # Default model if not extracted yet; not stored, so a later
+        # message can still report it (e.g. after a checkpoint)
+        model = self.model_info or Model(name="unknown", provider="unknown")
 
         # Create session
         session = Session(
@@ -121,42 +224,103 @@ class TraceBuilder:
             actors=sorted(list(self.actors))
         )
 
+        # Intern the values that repeat; known only once all events are in
+        events, interned = self.events, None
+        if self.interner is not None:
+            events, interned = self.interner.intern(self.events)
+
         # Create trace
-        trace = TraceJSON(
+        build_trace = TraceJSON.construct_trusted if self.trusted else TraceJSON
+        trace = build_trace(
+            traceVersion=self.trace_version,
             session=session,
-            model=self.model_info,
-            events=self.events,
-            usage=self.usage_data
+            model=model,
+            events=events,
+            usage=self.usage_data,
+            hashing=Hashing(algorithm=self.algorithm, chunk_size=self.chunk_size),
+            segment=self.segment
         )
+        if self.attachments:
+            trace.attachments = list(self.attachments)
+        trace.interned = interned
+        if self.instrument:
+            trace.instrumentation = Instrumentation(
+                hashed=self.hash_instrumentation, steps=list(self.steps)
+            )
+        if self.mode == "cdc":
+            trace.hashing.min_chunk_size, _, trace.hashing.max_chunk_size = cdc_sizes(
+                self.chunk_size, self.min_chunk_size, self.max_chunk_size
+            )
 
         # Compute Merkle root if requested
-        if compute_merkle:
+        if compute_merkle and self.mode == "events":
+            if self.interner is None:
+                # Reuse the event leaves hashed by earlier builds; only new
+                # events and the metadata leaf are hashed
+                self._hash_new_events()
+                accumulator, event_hashes = self.accumulator, self.event_hashes[:]
+            else:
+                # A value that starts to repeat changes earlier events
+                accumulator, event_hashes = MerkleAccumulator(self.hash_name), DigestArray()
+                for event in events:
+                    event_hashes.append(accumulator.append(self._event_leaf(event)))
+            metadata = event_metadata(trace.model_dump(exclude={"events"}))
+            metadata_leaf = leaf_hash(self._encode_json(metadata), self.hash_name)
+            merkle_root = event_tree_root(accumulator.root(), metadata_leaf, self.hash_name)
+
+            trace.hashing.chunkMerkleRoot = merkle_root.hex()
+            trace.hashing.chunkDigests = event_hashes
+
+        elif compute_merkle and self.mode == "legacy":
             # Capture the JSON used for merkle calculation
             trace_json = trace.to_json()
-            merkle_root, chunk_hashes = compute_trace_merkle(trace_json)
 
             # Store the JSON used for merkle calculation
             trace._merkle_json_cache = trace_json
 
             # Update hashing field
-            trace.hashing.chunkMerkleRoot = merkle_root
+            merkle_root, chunk_hashes = compute_trace_merkle(
+                trace_json, self.chunk_size, self.algorithm
+            )
             trace.hashing.chunks = chunk_hashes
+            trace.hashing.chunkMerkleRoot = merkle_root
+
+        elif compute_merkle:
+            # The canonical bytes are serialized once and kept as the
+            # payload that is saved and uploaded
+            started = time.perf_counter()
+            payload = trace.hashed_bytes()
+            merkle_root, trace.hashing.chunkDigests = compute_trace_digests(
+                payload, self.chunk_size, self.algorithm,
+                min_chunk_size=trace.hashing.min_chunk_size,
+                max_chunk_size=trace.hashing.max_chunk_size,
+                leaf_cache=self.leaf_cache,
+                cache_key=self.session_id
+            )
+            trace.hashing.chunkMerkleRoot = merkle_root
+            PIPELINE_STATS.record_stage("hash", payload, started)
 
         return trace
 
     @staticmethod
-    def from_langchain_result(result: Dict[str, Any], session_id: str = None) -> TraceJSON:
+    def from_langchain_result(
+        result: Dict[str, Any],
+        session_id: str = None,
+        algorithm: str = DEFAULT_ALGORITHM
+    ) -> TraceJSON:
         """
         Build trace from LangChain agent result
 
         Args:
             result: Result dict from agent.invoke()
             session_id: Optional session ID
+            algorithm: Hashing algorithm ("sha256" builds an a2a-0.1 trace,
+                "auto" uses the fastest hash function on this host)
 
         Returns:
             TraceJSON object
         """
-        builder = TraceBuilder(session_id)
+        builder = TraceBuilder(session_id, algorithm=algorithm)
 
         if 'messages' in result:
             builder.add_messages(result['messages'])
@@ -0,0 +1,450 @@
+"""
+Lazy Streaming Reader for A2A Trace JSON
+
+This module reads a stored trace without parsing it as a whole. The
+top-level object is tokenized incrementally from a byte stream; every
+field except "events" is parsed as usual, and events are parsed one at a
+time as they are iterated. Typed Event objects are only built on request.
+
+Memory use is bounded by the largest single event (plus one read block),
+so multi-hundred-MB traces can be inspected and summarized cheaply.
+Compressed payloads (see payload.py) are decompressed on the fly.
+
+Reading only the header skips the events without decoding them. The
+header still comes after a full pass over the bytes when "events" is
+the first key, as in canonical (a2a-0.3) traces with sorted keys.
+"""
+
+import codecs
+import json
+import mmap
+import re
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+from .merkle import StreamSource, STREAM_BLOCK_SIZE
+from .payload import iter_decompressed
+from .trace_schema import Event
+
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+
+# Characters of numbers, literals and separators other than commas: what
+# is left of JSON outside of strings is brackets and commas
+_NOT_STRUCTURE = str.maketrans("", "", " \t\n\r:0123456789+-.eEtrufalsn")
+
+# Characters per piece of an array skipped by _Tokenizer.skip_array()
+_SKIP_BLOCK_SIZE = 64 * 1024
+
+_BUFFER_TYPES = (bytes, bytearray, memoryview, mmap.mmap)
+
+# The hashing section of a formatted (indented) trace: a top-level object
+# holding only scalars and lists of strings, so it ends at the first
+# line closing an object at the top level
+_HASHING_START = b'\n  "hashing": {'
+_HASHING_END = b"\n  }"
+
+
+def is_replayable(source: StreamSource) -> bool:
+    """Whether a source can be read more than once (a path or a buffer)"""
+    return isinstance(source, (str, Path) + _BUFFER_TYPES)
+
+
+def _iter_source_blocks(source: StreamSource) -> Iterator[bytes]:
+    """Yield blocks of at most STREAM_BLOCK_SIZE bytes from a source"""
+    if isinstance(source, (str, Path)):
+        with open(source, "rb") as f:
+            yield from iter(lambda: f.read(STREAM_BLOCK_SIZE), b"")
+    elif isinstance(source, _BUFFER_TYPES):
+        view = memoryview(source)
+        for start in range(0, len(view), STREAM_BLOCK_SIZE):
+            yield view[start:start + STREAM_BLOCK_SIZE].tobytes()
+    else:
+        yield from source
+
+
+def _unhashed_section(section: bytes) -> bytes:
+    """Rewrite a formatted hashing section as it was before the root was set"""
+    hashing = json.loads(section)
+    if not (hashing.get("chunkMerkleRoot") or hashing.get("chunks") or "chunkDigests" in hashing):
+        return section
+    hashing.pop("chunkDigests", None)
+    hashing["chunkMerkleRoot"] = None
+    hashing["chunks"] = []
+    text = json.dumps(hashing, indent=2, ensure_ascii=False)
+    return text.replace("\n", "\n  ").encode("utf-8")
+
+
+def iter_without_hashing_results(source: StreamSource) -> Iterator[bytes]:
+    """
+    Yield the blocks of a stored trace with its hashing results cleared
+
+    a2a-0.1/0.2 roots cover the formatted JSON before the root and leaf
+    hashes were filled in, while TraceJSON.to_json() (e.g. an archived
+    copy of a trace) includes them. The hashing section of such a trace
+    is rewritten as it was when the root was computed, so the root can be
+    recomputed from the archive; only that section is held in memory.
+    Other traces, including uploaded payloads, pass through unchanged.
+
+    Compressed payloads are decompressed.
+
+    Args:
+        source: File path, bytes/mmap buffer, or iterable of byte blocks
+
+    Returns:
+        Iterator over byte blocks
+    """
+    blocks = iter_decompressed(_iter_source_blocks(source))
+    pending = bytearray()
+    for block in blocks:
+        pending += block
+        start = pending.find(_HASHING_START)
+        if start < 0:
+            # Keep a tail that may hold the start of the marker
+            cut = len(pending) - len(_HASHING_START) + 1
+            if cut > 0:
+                yield bytes(pending[:cut])
+                del pending[:cut]
+            continue
+
+        # The section starts at its "{"
+        start += len(_HASHING_START) - 1
+        yield bytes(pending[:start])
+        del pending[:start]
+        searched = 0
+        while True:
+            end = pending.find(_HASHING_END, searched)
+            if end >= 0:
+                break
+            searched = max(0, len(pending) - len(_HASHING_END) + 1)
+            block = next(blocks, None)
+            if block is None:
+                # Not a formatted trace after all; the root decides
+                yield bytes(pending)
+                return
+            pending += block
+
+        end += len(_HASHING_END)
+        yield _unhashed_section(bytes(pending[:end]))
+        yield bytes(pending[end:])
+        yield from blocks
+        return
+    if pending:
+        yield bytes(pending)
+
+
+def without_hashing_results(trace_json: str) -> str:
+    """In-memory iter_without_hashing_results() of a JSON string"""
+    if _HASHING_START.decode("ascii") not in trace_json:
+        return trace_json
+    return b"".join(iter_without_hashing_results(trace_json.encode("utf-8"))).decode("utf-8")
+
+
+class _ArraySkipper:
+    """Bracket and comma state of an array being skipped (see _Tokenizer.skip_array)"""
+
+    __slots__ = ("depth", "count", "expect_value", "in_string")
+
+    def __init__(self):
+        self.depth = 1
+        self.count = 0
+        self.expect_value = True
+        self.in_string = False
+
+    def feed(self, structure: str) -> int:
+        """
+        Follow brackets and commas found outside of strings.
+
+        Args:
+            structure: The brackets and commas of the next piece, in order
+
+        Returns:
+            Index of the bracket closing the array, or -1 if still open
+
+        Raises:
+            ValueError: If elements are not objects or arrays separated by
+                single commas, or on a character invalid outside strings
+        """
+        for i, char in enumerate(structure):
+            if char == ",":
+                if self.depth == 1:
+                    if self.expect_value:
+                        raise ValueError("Expected an object or array in trace JSON array")
+                    self.expect_value = True
+            elif char in "[{":
+                if self.depth == 1:
+                    if not self.expect_value:
+                        raise ValueError("Expected ',' or ']' in trace JSON array")
+                    self.count += 1
+                    self.expect_value = False
+                self.depth += 1
+            elif char in "]}":
+                self.depth -= 1
+                if self.depth == 0:
+                    if self.expect_value and self.count:
+                        raise ValueError("Expected an object or array in trace JSON array")
+                    return i
+            else:
+                raise ValueError(f"Unexpected {char!r} in trace JSON array")
+        return -1
+
+
+def _structure_offset(piece: str, in_string: bool, index: int) -> int:
+    """Offset in piece of the index-th bracket or comma outside of strings"""
+    escaped = False
+    for offset, char in enumerate(piece):
+        if in_string:
+            if escaped:
+                escaped = False
+            elif char == "\\":
+                escaped = True
+            elif char == '"':
+                in_string = False
+        elif char == '"':
+            in_string = True
+        elif char in "[]{},":
+            if index == 0:
+                return offset
+            index -= 1
+    raise AssertionError("structure index out of range")
+
+
+class _Tokenizer:
+    """Incremental JSON value reader over a stream of UTF-8 blocks"""
+
+    def __init__(self, blocks: Iterator[bytes]):
+        self._blocks = blocks
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+        self._json = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+        self._eof = False
+
+    def _read_more(self, at_least: int = 1) -> bool:
+        """Append at least at_least more characters; False at end of stream"""
+        if self._eof:
+            return False
+        text = [self._buffer[self._pos:]]
+        added = 0
+        while added < at_least:
+            block = next(self._blocks, None)
+            if block is None:
+                text.append(self._decoder.decode(b"", final=True))
+                self._eof = True
+                break
+            chunk = self._decoder.decode(block)
+            text.append(chunk)
+            added += len(chunk)
+        self._buffer = "".join(text)
+        self._pos = 0
+        return added > 0 or len(text[-1]) > 0
+
+    def peek(self) -> str:
+        """Skip whitespace and return the next character ("" at end of stream)"""
+        while True:
+            self._pos = _WHITESPACE.match(self._buffer, self._pos).end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._read_more():
+                return ""
+
+    def expect(self, chars: str) -> str:
+        """Consume the next character, which must be one of chars"""
+        char = self.peek()
+        if not char or char not in chars:
+            raise ValueError(f"Expected one of {chars!r} in trace JSON, found {char or 'end of data'!r}")
+        self._pos += 1
+        return char
+
+    def value(self) -> Any:
+        """Parse the next complete JSON value"""
+        self.peek()
+        while True:
+            try:
+                value, end = self._json.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                # Incomplete value: read as much again as is buffered, so a
+                # large value is retried O(log n) times
+                if not self._read_more(max(len(self._buffer) - self._pos, STREAM_BLOCK_SIZE)):
+                    raise
+                continue
+            # A number at the end of the buffer may continue in the next block
+            if end == len(self._buffer) and not self._eof and self._read_more():
+                continue
+            self._pos = end
+            return value
+
+    def skip_array(self) -> int:
+        """
+        Skip the rest of an array whose "[" has been consumed.
+
+        The elements are not decoded: each piece of the buffer is split at
+        its quotes (escaped quotes removed first) and only the brackets and
+        commas between strings are followed. Elements must be objects or
+        arrays, as events are; their contents are not validated.
+
+        Returns:
+            Number of elements
+
+        Raises:
+            ValueError: If the array is malformed or the data ends first
+        """
+        skipper = _ArraySkipper()
+        while True:
+            start = self._pos
+            end = min(len(self._buffer), start + _SKIP_BLOCK_SIZE)
+            buffered = end == len(self._buffer)
+            piece = self._buffer[start:end]
+            # Do not split a backslash from the character it escapes
+            if (len(piece) - len(piece.rstrip("\\"))) % 2 and not (buffered and self._eof):
+                end -= 1
+                piece = piece[:-1]
+
+            text = piece.replace("\\\\", "").replace('\\"', "") if "\\" in piece else piece
+            parts = text.split('"')
+            outside = "".join(parts[1::2] if skipper.in_string else parts[0::2])
+            index = skipper.feed(outside.translate(_NOT_STRUCTURE))
+            if index >= 0:
+                self._pos = start + _structure_offset(piece, skipper.in_string, index) + 1
+                return skipper.count
+
+            if len(parts) % 2 == 0:
+                skipper.in_string = not skipper.in_string
+            self._pos = end
+            if buffered and not self._read_more(STREAM_BLOCK_SIZE):
+                raise ValueError("Unexpected end of trace JSON")
+
+
+class TraceReader:
+    """
+    Read a stored trace lazily.
+
+    Header fields (everything but the events) are read on first access.
+    For paths and buffers (bytes, mmap) this is a separate pass that
+    skips the events without decoding them, so events can be iterated
+    any number of times. Canonical traces put "events" first, so this
+    pass reads all of their bytes before the header is known. A
+    one-shot stream (e.g. IPFSClient.cat_stream()) is read once: either
+    iterate the events, after which the header is complete, or access the
+    header first, after which the events can no longer be iterated.
+
+    Attributes:
+        source: File path, buffer, or iterable of byte blocks
+    """
+
+    def __init__(self, source: StreamSource):
+        self.source = source
+        self._header: Dict[str, Any] = {}
+        self._event_count: Optional[int] = None
+        self._consumed = False
+
+    def _scan(self, skip_events: bool = False) -> Iterator[Dict[str, Any]]:
+        """Parse the source, filling in the header and yielding events (unless skipped)"""
+        if self._consumed and not is_replayable(self.source):
+            raise ValueError("The trace stream has already been read")
+        self._consumed = True
+
+        tokens = _Tokenizer(iter_decompressed(_iter_source_blocks(self.source)))
+        header: Dict[str, Any] = {}
+        count = 0
+
+        tokens.expect("{")
+        if tokens.peek() == "}":
+            tokens.expect("}")
+        else:
+            while True:
+                key = tokens.value()
+                if not isinstance(key, str):
+                    raise ValueError("Trace JSON keys must be strings")
+                tokens.expect(":")
+                if key == "events":
+                    tokens.expect("[")
+                    if skip_events:
+                        count = tokens.skip_array()
+                    elif tokens.peek() == "]":
+                        tokens.expect("]")
+                    else:
+                        while True:
+                            yield tokens.value()
+                            count += 1
+                            if tokens.expect(",]") == "]":
+                                break
+                else:
+                    header[key] = tokens.value()
+                if tokens.expect(",}") == "}":
+                    break
+
+        if tokens.peek():
+            raise ValueError("Unexpected data after the trace JSON object")
+
+        self._header = header
+        self._event_count = count
+
+    def _read_header(self) -> Dict[str, Any]:
+        if self._event_count is None:
+            for _ in self._scan(skip_events=True):
+                pass
+        return self._header
+
+    @property
+    def header(self) -> Dict[str, Any]:
+        """All top-level fields except "events" """
+        return self._read_header()
+
+    @property
+    def event_count(self) -> int:
+        """Number of events in the trace"""
+        self._read_header()
+        return self._event_count
+
+    @property
+    def trace_version(self) -> str:
+        return self.header.get("traceVersion", "a2a-0.1")
+
+    @property
+    def session_id(self) -> Optional[str]:
+        return (self.header.get("session") or {}).get("id")
+
+    @property
+    def hashing(self) -> Dict[str, Any]:
+        return self.header.get("hashing") or {}
+
+    def iter_events(self) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over the events as dictionaries, parsing one at a time.
+
+        Returns:
+            Iterator over event dictionaries
+
+        Raises:
+            ValueError: If a one-shot stream has already been read or the
+                JSON is malformed
+        """
+        return self._scan()
+
+    def iter_typed_events(self) -> Iterator[Event]:
+        """Iterate over the events as validated Event objects"""
+        for event in self.iter_events():
+            yield Event.model_validate(event)
+
+    def summary(self) -> Dict[str, Any]:
+        """
+        Summarize the trace in one pass over the events.
+
+        Returns:
+            Dictionary with version, session, model, hashing and event counts
+        """
+        event_types: Counter = Counter()
+        for event in self.iter_events():
+            event_types[event.get("type")] += 1
+
+        return {
+            "traceVersion": self.trace_version,
+            "session_id": self.session_id,
+            "model": (self.header.get("model") or {}).get("name"),
+            "algorithm": self.hashing.get("algorithm"),
+            "merkle_root": self.hashing.get("chunkMerkleRoot"),
+            "events": self._event_count,
+            "event_types": dict(event_types)
+        }
@@ -1,8 +1,16 @@
 """A2A Trace JSON Schema Definition (a2a-0.1)"""
 
 from datetime import datetime
-from typing import List, Optional, Dict, Any, Literal
-from pydantic import BaseModel, Field
+from typing import List, Optional, Dict, Any, Iterable, Literal, Sequence, Union
+from pydantic import BaseModel, Field, model_serializer
+from pydantic_core import core_schema
+
+from . import cbor
+from .merkle import (
+    DigestArray, canonical_trace_bytes, stored_trace_bytes, compute_root_of_roots,
+    uses_canonical_json, MANIFEST_VERSION
+)
+from .pipeline import PIPELINE_STATS
 
 
 class Session(BaseModel):
@@ -18,16 +26,89 @@ class Model(BaseModel):
     provider: str
 
 
+# Field value of an interned event: entry n of the trace's intern table
+# (see interning.py)
+InternRef = Dict[Literal["$ref"], int]
+
+
 class Event(BaseModel):
     """Base event structure"""
     type: Literal["human_message", "ai_message", "ai_tool_call", "tool_result"]
     ts: str
-    content: Optional[str] = None
+    content: Optional[Union[str, InternRef]] = None
     tool: Optional[str] = None
     args: Optional[Dict[str, Any]] = None
     tool_call_id: Optional[str] = None
 
 
+# Event fields in declaration (and serialization) order
+EVENT_FIELDS = ("type", "ts", "content", "tool", "args", "tool_call_id")
+_EVENT_FIELDS_SET = frozenset(EVENT_FIELDS)
+
+
+class EventRecord:
+    """
+    Compact event for trusted data from our own builders and logger.
+
+    Nothing is validated. A record takes a fraction of the memory and
+    construction time of an Event, converts to one without validation
+    and serializes to the same dictionary as Event.model_dump().
+    """
+
+    __slots__ = EVENT_FIELDS
+
+    def __init__(
+        self,
+        type: str,
+        ts: str,
+        content: Optional[Union[str, InternRef]] = None,
+        tool: Optional[str] = None,
+        args: Optional[Dict[str, Any]] = None,
+        tool_call_id: Optional[str] = None
+    ):
+        self.type = type
+        self.ts = ts
+        self.content = content
+        self.tool = tool
+        self.args = args
+        self.tool_call_id = tool_call_id
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize like Event.model_dump()"""
+        return {
+            "type": self.type,
+            "ts": self.ts,
+            "content": self.content,
+            "tool": self.tool,
+            "args": self.args,
+            "tool_call_id": self.tool_call_id
+        }
+
+    def to_event(self) -> Event:
+        """Convert to an Event without running validation"""
+        return Event.model_construct(_EVENT_FIELDS_SET, **self.to_dict())
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (EventRecord, Event)):
+            return all(getattr(self, name) == getattr(other, name) for name in EVENT_FIELDS)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"EventRecord(type={self.type!r}, ts={self.ts!r})"
+
+    @classmethod
+    def __get_pydantic_core_schema__(cls, source_type, handler):
+        """Accept records as-is and serialize them like Event"""
+        return core_schema.json_or_python_schema(
+            json_schema=handler.generate_schema(Event),
+            python_schema=core_schema.is_instance_schema(cls),
+            serialization=core_schema.plain_serializer_function_ser_schema(
+                cls.to_dict,
+                return_schema=core_schema.dict_schema()
+            )
+        )
+
+
 class Usage(BaseModel):
     """Token usage per turn"""
     turn: int
@@ -40,7 +121,22 @@ class Hashing(BaseModel):
     algorithm: str = "sha256"
     chunk_size: int = 4096
     chunkMerkleRoot: Optional[str] = None
+    # Leaf hashes as hex strings (a2a-0.1)
     chunks: List[str] = Field(default_factory=list)
+    # Leaf hashes of the byte-oriented engines, serialized as one base64 blob
+    chunkDigests: Optional[DigestArray] = None
+    # Chunk size bounds of the "cdc" mode (chunk_size is the average)
+    min_chunk_size: Optional[int] = None
+    max_chunk_size: Optional[int] = None
+
+    @model_serializer(mode="wrap")
+    def _omit_unset_fields(self, handler):
+        """Keep a2a-0.1 output unchanged when the newer fields are unset."""
+        data = handler(self)
+        for field in ("chunkDigests", "min_chunk_size", "max_chunk_size"):
+            if data.get(field) is None:
+                data.pop(field, None)
+        return data
 
 
 class Signature(BaseModel):
@@ -57,29 +153,273 @@ class Redaction(BaseModel):
     masked_fields: List[str] = Field(default_factory=list)
 
 
+class SegmentInfo(BaseModel):
+    """Position of a segment within a segmented session"""
+    index: int
+    # Session-wide index of the first event of the segment
+    firstEvent: int
+
+
+class StepTiming(BaseModel):
+    """Timing of one LLM or tool call"""
+    kind: Literal["llm", "tool"]
+    name: str
+    # Wall-clock start (ISO 8601) and duration
+    started: str
+    seconds: float
+    # Index of the first event the call produced (None if it produced none)
+    event: Optional[int] = None
+    error: Optional[str] = None
+    # Streaming LLM calls only
+    first_token_seconds: Optional[float] = None
+    output_tokens: Optional[int] = None
+    tokens_per_second: Optional[float] = None
+
+
+class Instrumentation(BaseModel):
+    """Per-call timings of a session"""
+    # Whether the Merkle root covers this section (a2a-0.3 leaves it out
+    # unless set; a2a-0.1 roots cover the whole stored JSON)
+    hashed: bool = False
+    steps: List[StepTiming] = Field(default_factory=list)
+
+
+class Attachment(BaseModel):
+    """Event field stored as a separate content-addressed blob"""
+    # Index of the event and the field, which the event holds as null
+    event: int
+    field: Literal["content", "args"]
+    cid: str
+    # Size and hex digest (the trace's hash function) of the blob
+    size: int
+    digest: str
+
+
+class InternEntry(BaseModel):
+    """A value shared by event fields, which refer to it as {"$ref": index}"""
+    value: Any
+
+
+class InternTable(BaseModel):
+    """Values shared by event fields, each stored (and hashed) once"""
+    entries: List[InternEntry] = Field(default_factory=list)
+
+
 class TraceJSON(BaseModel):
     """Complete A2A Trace JSON structure (a2a-0.1)"""
     traceVersion: str = "a2a-0.1"
     session: Session
     model: Model
-    events: List[Event]
+    # EventRecords only come from construct_trusted()
+    events: List[Union[Event, EventRecord]]
     usage: List[Usage] = Field(default_factory=list)
     hashing: Hashing = Field(default_factory=Hashing)
     signatures: List[Signature] = Field(default_factory=list)
     redactions: Redaction = Field(default_factory=Redaction)
+    # Only set for the segments of a segmented trace
+    segment: Optional[SegmentInfo] = None
+    # Only set for instrumented traces
+    instrumentation: Optional[Instrumentation] = None
+    # Only set if event fields were offloaded (see attachments.py)
+    attachments: Optional[List[Attachment]] = None
+    # Only set if event fields were interned (see interning.py)
+    interned: Optional[InternTable] = None
 
     # Cache for the JSON used in Merkle Root calculation
     # This is NOT part of the A2A schema, just for internal use
     model_config = {"extra": "allow"}
     _merkle_json_cache: str = ""
+    # Serialized payload shared by hashing, persistence and upload
+    _payload: bytes = b""
+
+    @model_serializer(mode="wrap")
+    def _omit_unset_sections(self, handler):
+        """Keep the output of traces without the optional sections unchanged."""
+        data = handler(self)
+        for field in ("segment", "instrumentation", "attachments", "interned"):
+            if data.get(field) is None:
+                data.pop(field, None)
+        return data
+
+    @classmethod
+    def construct_trusted(
+        cls,
+        events: Iterable[Union[Event, EventRecord]],
+        **fields: Any
+    ) -> "TraceJSON":
+        """
+        Build a trace from trusted events without validating them.
+
+        The session, model and other small fields are still validated;
+        only the per-event validation, which dominates for long sessions,
+        is skipped. EventRecords are kept as they are and serialize like
+        Events. Use this only for events produced by our own builders and
+        logger.
+
+        Args:
+            events: Events or EventRecords
+            **fields: Remaining TraceJSON fields
+
+        Returns:
+            TraceJSON object
+        """
+        trace = cls(events=[], **fields)
+        trace.events = list(events)
+        return trace
 
     def to_json(self, **kwargs) -> str:
         """Export to JSON string"""
+        PIPELINE_STATS.count_serialization()
         return self.model_dump_json(indent=2, **kwargs)
 
+    def payload(self) -> bytes:
+        """
+        Get the serialized trace that is hashed, saved and uploaded.
+
+        It is produced once and the same immutable bytes object is
+        returned afterwards, so every stage shares one buffer. For
+        a2a-0.3 traces these are the canonical bytes (the hashing results
+        are not part of them); a2a-0.1/0.2 traces use the JSON the root
+        was computed over. Like the JSON cache, it is not updated when
+        the trace is changed afterwards.
+        """
+        if not self._payload:
+            if self._merkle_json_cache:
+                self._payload = self._merkle_json_cache.encode("utf-8")
+            elif uses_canonical_json(self.traceVersion):
+                self._payload = stored_trace_bytes(self.model_dump(mode="json"))
+            else:
+                self._payload = self.get_merkle_json().encode("utf-8")
+        return self._payload
+
+    def to_cbor(self) -> bytes:
+        """
+        Export to deterministic CBOR bytes.
+
+        The fields are those of get_merkle_json(): the leaf digests are
+        left out, as they are recomputed on verification.
+        """
+        return cbor.dumps(self.model_dump(mode="json", exclude={"hashing": {"chunkDigests"}}))
+
+    @classmethod
+    def from_cbor(cls, data: bytes) -> "TraceJSON":
+        """Load a trace exported with to_cbor()"""
+        return cls.model_validate(cbor.loads(data))
+
+    def canonical_bytes(self) -> bytes:
+        """
+        Get the canonical JSON bytes hashed by a2a-0.3 byte engines.
+
+        These are computed from the parsed trace, so any formatting of
+        the stored JSON verifies against the same root.
+        """
+        return canonical_trace_bytes(self.model_dump(mode="json"))
+
+    def hashed_bytes(self) -> bytes:
+        """
+        Get the bytes a2a-0.3 byte engines hash, sharing payload() if possible.
+
+        Only a trace with unhashed instrumentation is serialized a second
+        time, since its payload also carries the instrumentation.
+        """
+        if self.instrumentation is None or self.instrumentation.hashed:
+            return self.payload()
+        return self.canonical_bytes()
+
     def get_merkle_json(self) -> str:
         """
         Get the JSON string that was used for Merkle Root calculation.
         This is the cached version without hashing/signatures/redactions fields populated.
+        Leaf digests are never hashed, so they are left out of the fallback.
+        a2a-0.3 traces keep no cache: their root covers canonical_bytes().
+        """
+        if self._merkle_json_cache:
+            return self._merkle_json_cache
+        return self.to_json(exclude={"hashing": {"chunkDigests"}})
+
+
+class SegmentEntry(BaseModel):
+    """Manifest entry for one segment of a segmented trace"""
+    index: int
+    # Merkle root of the segment (its hashing.chunkMerkleRoot)
+    root: str
+    events: int
+    cid: Optional[str] = None
+    # Payload version of the stored segment, as in the memo "v" field
+    v: Optional[str] = None
+
+
+class TraceManifest(BaseModel):
+    """
+    Manifest of a segmented trace
+
+    Lists the segments of a session in order and commits to them with
+    rootOfRoots (see merkle.compute_root_of_roots()). The manifest, not
+    the segments, is what gets anchored.
+    """
+    manifestVersion: str = MANIFEST_VERSION
+    session: Session
+    model: Model
+    # Hashing.algorithm shared by all segments
+    algorithm: str
+    segments: List[SegmentEntry] = Field(default_factory=list)
+    rootOfRoots: Optional[str] = None
+
+    @classmethod
+    def from_segments(
+        cls,
+        segments: Sequence[TraceJSON],
+        cids: Optional[Sequence[str]] = None,
+        versions: Optional[Sequence[str]] = None
+    ) -> "TraceManifest":
+        """
+        Build the manifest of finalized segments.
+
+        Args:
+            segments: Segments in order, with their Merkle roots computed
+            cids: IPFS CIDs of the segments, if uploaded
+            versions: Payload versions (memo "v" style) of the uploaded segments
+
+        Returns:
+            TraceManifest with rootOfRoots set
+
+        Raises:
+            ValueError: If there are no segments, or they are out of order,
+                not hashed, or do not share the session and algorithm
         """
-        return self._merkle_json_cache if self._merkle_json_cache else self.to_json()
+        if not segments:
+            raise ValueError("A manifest needs at least one segment")
+
+        first = segments[0]
+        entries = []
+        for position, segment in enumerate(segments):
+            if segment.segment is None or segment.segment.index != position:
+                raise ValueError(f"Segment {position} is missing or out of order")
+            if not segment.hashing.chunkMerkleRoot:
+                raise ValueError(f"Segment {position} has no Merkle root")
+            if segment.session.id != first.session.id:
+                raise ValueError(f"Segment {position} belongs to session {segment.session.id}")
+            if segment.hashing.algorithm != first.hashing.algorithm:
+                raise ValueError(f"Segment {position} uses {segment.hashing.algorithm}")
+
+            entries.append(SegmentEntry(
+                index=position,
+                root=segment.hashing.chunkMerkleRoot,
+                events=len(segment.events),
+                cid=cids[position] if cids else None,
+                v=versions[position] if versions else None
+            ))
+
+        actors = sorted({actor for segment in segments for actor in segment.session.actors})
+        return cls(
+            session=Session(id=first.session.id, createdAt=first.session.createdAt, actors=actors),
+            # Later segments know the model if the first turns did not report it
+            model=segments[-1].model,
+            algorithm=first.hashing.algorithm,
+            segments=entries,
+            rootOfRoots=compute_root_of_roots([entry.root for entry in entries], first.hashing.algorithm)
+        )
+
+    def to_json(self, **kwargs) -> str:
+        """Export to JSON string"""
+        return self.model_dump_json(indent=2, **kwargs)
@@ -9,12 +9,157 @@ by following the verification chain:
 4. Compare with anchored Merkle Root
 """
 
-from typing import Dict, Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Any, Iterator, Optional, Sequence, Tuple
 import json
+import re
 
 from .ipfs_client import IPFSClient
+from .ipfs_cache import CachingIPFSClient, CIDCache
 from .xrpl_client import XRPLClient
-from .merkle import compute_trace_merkle
+from .merkle import (
+    compute_trace_merkle, compute_trace_digests, compute_event_merkle,
+    compute_merkle_root_stream, parse_algorithm, uses_canonical_json, canonical_trace_bytes,
+    iter_canonical_trace_bytes, json_encoder_for, event_metadata, event_tree_root, leaf_hash,
+    root_from_inclusion_proof, root_from_consistency_proof, compute_root_of_roots,
+    MerkleAccumulator, StreamSource, CANONICAL_TRACE_VERSION, DEFAULT_ALGORITHM,
+    LEGACY_ALGORITHM, MANIFEST_VERSION
+)
+from .payload import decode_trace, parse_payload_version
+from .attachments import verify_attachments
+from .trace_reader import (
+    TraceReader, is_replayable, iter_without_hashing_results, without_hashing_results
+)
+
+
+# Start of a formatted (TraceJSON.to_json()) trace, which names its version first
+_FORMATTED_VERSION = re.compile(rb'\{\s*"traceVersion":\s*"([^"]+)"')
+
+
+def _recompute_root(
+    trace_json: Optional[str],
+    trace_data: Dict[str, Any],
+    algorithm: Optional[str] = None,
+    trace_version: Optional[str] = None
+) -> Tuple[str, Sequence]:
+    """
+    Recompute the Merkle root with the engine recorded in the memo or trace.
+
+    An algorithm or version from the memo takes precedence over the trace.
+    Traces without a hashing section are a2a-0.1 and use the legacy engine.
+    "events" mode and a2a-0.3 byte engines hash the parsed trace, so its
+    formatting does not matter; a2a-0.1/0.2 byte engines hash trace_json,
+    which binary payloads (trace_json None) do not have.
+    """
+    hashing = trace_data.get("hashing") or {}
+    algorithm = algorithm or hashing.get("algorithm", LEGACY_ALGORITHM)
+    trace_version = trace_version or trace_data.get("traceVersion", "a2a-0.1")
+    mode = parse_algorithm(algorithm)[1]
+
+    if mode == "events":
+        root, event_hashes, _ = compute_event_merkle(trace_data, algorithm, trace_version)
+        return root, event_hashes
+
+    if uses_canonical_json(trace_version) and mode != "legacy":
+        trace_json = canonical_trace_bytes(trace_data)
+    elif trace_json is None:
+        raise ValueError(f"Trace version {trace_version} can only be verified from JSON")
+
+    if mode == "legacy":
+        return compute_trace_merkle(trace_json, hashing.get("chunk_size", 4096), algorithm)
+
+    return compute_trace_digests(
+        trace_json,
+        hashing.get("chunk_size", 4096),
+        algorithm,
+        min_chunk_size=hashing.get("min_chunk_size"),
+        max_chunk_size=hashing.get("max_chunk_size")
+    )
+
+
+def _verify_segment(
+    entry: Dict[str, Any],
+    manifest_data: Dict[str, Any],
+    ipfs_client: IPFSClient,
+    position: int,
+    first_event: int
+) -> Optional[str]:
+    """
+    Verify one segment listed in a manifest; returns an error or None
+
+    rootOfRoots only commits to the segment roots, so the entry's event
+    count and position are checked against the downloaded segment.
+    """
+    if entry.get("index") != position:
+        return f"manifest entry {position} has index {entry.get('index')}"
+    try:
+        trace_version, encoding, compression = parse_payload_version(entry.get("v") or "")
+        trace_json, trace_data = decode_trace(
+            ipfs_client.get_bytes(entry["cid"]),
+            encoding if entry.get("v") else None,
+            compression
+        )
+        segment = trace_data.get("segment") or {}
+        if segment.get("index") != entry["index"]:
+            return f"segment index {segment.get('index')} does not match the manifest"
+        if (trace_data.get("session") or {}).get("id") != manifest_data["session"]["id"]:
+            return "segment belongs to another session"
+        if segment.get("firstEvent") != first_event:
+            return f"segment starts at event {segment.get('firstEvent')}, expected {first_event}"
+        events = len(trace_data.get("events", []))
+        if events != entry.get("events"):
+            return f"segment has {events} events, manifest lists {entry.get('events')}"
+
+        computed_root, _ = _recompute_root(
+            trace_json, trace_data, manifest_data["algorithm"], trace_version or None
+        )
+        if computed_root != entry["root"]:
+            return f"root mismatch (computed {computed_root})"
+        return None
+    except Exception as e:
+        return f"verification failed: {e}"
+
+
+def verify_segments(
+    manifest_data: Dict[str, Any],
+    ipfs_client: IPFSClient,
+    workers: int = 4
+) -> Dict[int, Optional[str]]:
+    """
+    Verify every segment of a segmented trace against its manifest.
+
+    Segments are independent, so they are downloaded and rehashed
+    concurrently.
+
+    Args:
+        manifest_data: Parsed TraceManifest
+        ipfs_client: IPFS client instance
+        workers: Number of segments verified at the same time
+
+    Returns:
+        Dictionary mapping segment index to an error message (None if verified)
+    """
+    entries = manifest_data.get("segments", [])
+
+    # Each segment must start where the previous ones end
+    first_events = []
+    total = 0
+    for entry in entries:
+        first_events.append(total)
+        total += entry.get("events") or 0
+
+    def check(position: int) -> Optional[str]:
+        return _verify_segment(
+            entries[position], manifest_data, ipfs_client, position, first_events[position]
+        )
+
+    if workers > 1 and len(entries) > 1:
+        with ThreadPoolExecutor(max_workers=min(workers, len(entries))) as executor:
+            errors = list(executor.map(check, range(len(entries))))
+    else:
+        errors = [check(position) for position in range(len(entries))]
+
+    return {entry["index"]: error for entry, error in zip(entries, errors)}
 
 
 class VerificationResult:
@@ -65,7 +210,8 @@ class VerificationResult:
 def verify_trace(
     tx_hash: str,
     xrpl_client: XRPLClient,
-    ipfs_client: IPFSClient
+    ipfs_client: IPFSClient,
+    attachment_store: Any = None
 ) -> VerificationResult:
     """
     Verify trace integrity from XRPL transaction hash.
@@ -77,10 +223,18 @@ def verify_trace(
     4. Recalculate Merkle Root from trace
     5. Compare with anchored Merkle Root
 
+    For segmented traces the CID is a manifest: its root-of-roots is
+    compared with the anchored root and every segment is verified
+    against the root listed for it.
+
+    Attachment blobs (see attachments.py) are only checked if an
+    attachment_store is given; the root covers their digests either way.
+
     Args:
         tx_hash: XRPL transaction hash
         xrpl_client: XRPL client instance
         ipfs_client: IPFS client instance
+        attachment_store: Store to check attachment blobs in (e.g. ipfs_client)
 
     Returns:
         VerificationResult object
@@ -113,11 +267,17 @@ def verify_trace(
         expected_root = memo_data["root"]
         session_id = memo_data["sid"]
 
+        # The memo "v" field may carry the payload format ("a2a-0.3+cbor+zlib")
+        trace_version, encoding, compression = parse_payload_version(memo_data.get("v") or "")
+
         # Step 3: Retrieve trace from IPFS
         try:
-            # Get JSON string directly to preserve formatting for Merkle Root verification
-            trace_json = ipfs_client.get_json_str(cid)
-            trace_data = json.loads(trace_json)
+            # Get the raw bytes to preserve formatting for Merkle Root verification;
+            # JSON payloads also keep their text, CBOR payloads are decoded.
+            # Compressed payloads are decompressed; the root covers the original bytes
+            trace_json, trace_data = decode_trace(
+                ipfs_client.get_bytes(cid), encoding, compression
+            )
         except Exception as e:
             return VerificationResult(
                 verified=False,
@@ -128,14 +288,39 @@ def verify_trace(
                 error=f"Failed to retrieve trace from IPFS: {e}"
             )
 
+        # Segmented traces: the memo anchors the manifest's root-of-roots
+        if trace_version == MANIFEST_VERSION or "manifestVersion" in trace_data:
+            return _verify_manifest_result(
+                tx_hash, memo_data, tx_data, trace_data, ipfs_client
+            )
+
         # Step 4: Recalculate Merkle Root
         # The trace JSON from IPFS is exactly what was used for merkle calculation
         # (it was stored with get_merkle_json() which has empty hashing/signatures/redactions)
-        computed_root, chunks = compute_trace_merkle(trace_json)
+        # The algorithm and version anchored in the memo win over the trace's
+        hashing = trace_data.get("hashing") or {}
+        algorithm = memo_data.get("alg") or hashing.get("algorithm", LEGACY_ALGORITHM)
+        computed_root, chunks = _recompute_root(
+            trace_json, trace_data, algorithm, trace_version or None
+        )
 
         # Step 5: Compare roots
         verified = expected_root == computed_root
 
+        # Step 6 (optional): Check the attachment blobs against their digests
+        error = None
+        attachments = trace_data.get("attachments") or []
+        if verified and attachments and attachment_store is not None:
+            failed = {
+                key: message
+                for key, message in verify_attachments(trace_data, attachment_store).items()
+                if message
+            }
+            if failed:
+                verified = False
+                (event, field), message = next(iter(failed.items()))
+                error = f"{len(failed)} attachment(s) failed verification (event {event} {field}: {message})"
+
         return VerificationResult(
             verified=verified,
             tx_hash=tx_hash,
@@ -143,13 +328,19 @@ def verify_trace(
             cid=cid,
             expected_root=expected_root,
             computed_root=computed_root,
+            error=error,
             details={
                 "model": memo_data.get("model"),
                 "timestamp": memo_data.get("ts"),
                 "version": memo_data.get("v"),
+                "encoding": encoding,
+                "compression": compression,
+                "algorithm": algorithm,
                 "ledger_index": tx_data.get("ledger_index"),
                 "chunks": len(chunks),
-                "trace_events": len(trace_data.get("events", []))
+                "trace_events": len(trace_data.get("events", [])),
+                "attachments": len(attachments),
+                "attachments_checked": attachment_store is not None
             }
         )
 
@@ -161,6 +352,54 @@ def verify_trace(
         )
 
 
+def _verify_manifest_result(
+    tx_hash: str,
+    memo_data: Dict[str, Any],
+    tx_data: Dict[str, Any],
+    manifest_data: Dict[str, Any],
+    ipfs_client: IPFSClient
+) -> VerificationResult:
+    """Verify an anchored manifest: its root-of-roots, then every segment"""
+    algorithm = memo_data.get("alg") or manifest_data["algorithm"]
+    entries = manifest_data.get("segments", [])
+    computed_root = compute_root_of_roots([entry["root"] for entry in entries], algorithm)
+
+    errors = {}
+    if computed_root == memo_data["root"]:
+        errors = {
+            index: error
+            for index, error in verify_segments(manifest_data, ipfs_client).items()
+            if error
+        }
+
+    error = None
+    manifest_session = (manifest_data.get("session") or {}).get("id")
+    if manifest_session != memo_data["sid"]:
+        error = f"Manifest session {manifest_session} does not match the memo session {memo_data['sid']}"
+    elif errors:
+        error = "; ".join(f"segment {index}: {message}" for index, message in sorted(errors.items()))
+
+    return VerificationResult(
+        verified=computed_root == memo_data["root"] and error is None,
+        tx_hash=tx_hash,
+        session_id=memo_data["sid"],
+        cid=memo_data["cid"],
+        expected_root=memo_data["root"],
+        computed_root=computed_root,
+        error=error,
+        details={
+            "model": memo_data.get("model"),
+            "timestamp": memo_data.get("ts"),
+            "version": memo_data.get("v"),
+            "algorithm": algorithm,
+            "ledger_index": tx_data.get("ledger_index"),
+            "segments": len(entries),
+            "segment_errors": errors,
+            "trace_events": sum(entry.get("events", 0) for entry in entries)
+        }
+    )
+
+
 def verify_trace_from_cid(
     cid: str,
     expected_root: str,
@@ -181,13 +420,13 @@ def verify_trace_from_cid(
         VerificationResult object
     """
     try:
-        # Retrieve trace from IPFS (preserving formatting)
-        trace_json = ipfs_client.get_json_str(cid)
-        trace_data = json.loads(trace_json)
+        # Retrieve trace from IPFS (preserving formatting); the encoding
+        # (JSON or CBOR) and compression are detected from the payload
+        trace_json, trace_data = decode_trace(ipfs_client.get_bytes(cid))
 
         # Recalculate Merkle Root
         # The trace JSON from IPFS is exactly what was used for merkle calculation
-        computed_root, chunks = compute_trace_merkle(trace_json)
+        computed_root, chunks = _recompute_root(trace_json, trace_data)
 
         # Compare roots
         verified = expected_root == computed_root
@@ -222,6 +461,10 @@ def verify_trace_from_json(
     """
     Verify trace integrity from JSON string.
 
+    The JSON may be the uploaded payload or TraceJSON.to_json() of the
+    trace (e.g. an archived copy); the hashing results of the latter are
+    cleared before a2a-0.1/0.2 roots are recomputed.
+
     Args:
         trace_json: Trace JSON string
         expected_root: Expected Merkle Root
@@ -234,7 +477,9 @@ def verify_trace_from_json(
         trace_data = json.loads(trace_json)
 
         # Recalculate Merkle Root
-        computed_root, chunks = compute_trace_merkle(trace_json)
+        computed_root, chunks = _recompute_root(
+            without_hashing_results(trace_json), trace_data
+        )
 
         # Compare roots
         verified = expected_root == computed_root
@@ -261,33 +506,259 @@ def verify_trace_from_json(
         )
 
 
+def _event_root_stream(
+    reader: TraceReader,
+    algorithm: str,
+    trace_version: Optional[str]
+) -> Tuple[str, int]:
+    """Compute an "events" mode root one event at a time"""
+    hash_name, _ = parse_algorithm(algorithm)
+    encode = json_encoder_for(trace_version or CANONICAL_TRACE_VERSION)
+    accumulator = MerkleAccumulator(hash_name)
+    for event in reader.iter_events():
+        accumulator.append(encode(event))
+
+    # The header of a one-shot stream is only known after its events
+    if json_encoder_for(reader.trace_version) is not encode:
+        raise ValueError(
+            f"Events were hashed for {trace_version or CANONICAL_TRACE_VERSION}, but the "
+            f"trace is {reader.trace_version}; pass trace_version"
+        )
+    metadata_leaf = leaf_hash(encode(event_metadata(reader.header)), hash_name)
+    root = event_tree_root(accumulator.root(), metadata_leaf, hash_name)
+    return root.hex(), accumulator.size
+
+
+def _stored_bytes(blocks: Iterator[bytes], mode: str) -> Iterator[bytes]:
+    """Pass stored trace bytes through, refusing formatted traces of canonical versions"""
+    head = b""
+    for block in blocks:
+        head += bytes(block)
+        if len(head) >= 64:
+            break
+    match = _FORMATTED_VERSION.match(head)
+    if match and mode != "legacy" and uses_canonical_json(match.group(1).decode("utf-8")):
+        raise ValueError(
+            f"Formatted {match.group(1).decode('utf-8')} traces are hashed as canonical JSON "
+            "and can only be stream-verified from a path or buffer"
+        )
+    yield head
+    yield from blocks
+
+
+def verify_trace_stream(
+    source: StreamSource,
+    expected_root: str,
+    algorithm: Optional[str] = None,
+    chunk_size: Optional[int] = None,
+    trace_version: Optional[str] = None
+) -> VerificationResult:
+    """
+    Verify trace integrity from a file or byte stream in constant memory.
+
+    Paths and buffers are read with TraceReader: the algorithm, chunk size
+    and version default to those in the trace's header, and the root is
+    recomputed the way the trace was hashed, one event at a time:
+
+    - "events" mode: one leaf per event plus the metadata leaf
+    - a2a-0.3 byte engines: the canonical bytes of the parsed trace
+    - a2a-0.1/0.2 byte engines: the stored bytes, with the hashing results
+      of copies written with TraceJSON.to_json() cleared
+
+    So the uploaded payload and an archived to_json() copy both verify.
+    Files and buffers that are not a single trace object are hashed as
+    stored.
+    One-shot streams (e.g. ipfs_client.cat_stream(cid)) cannot be read
+    twice: they are hashed as stored, so they must be the uploaded payload,
+    and the algorithm (default DEFAULT_ALGORITHM) and, for "events" mode
+    traces older than a2a-0.3, the version have to be passed in. Formatted
+    traces that a one-shot stream cannot check are reported as errors.
+
+    Args:
+        source: File path, mmap/bytes buffer, or iterable of byte blocks;
+            compressed payloads are decompressed
+        expected_root: Expected Merkle Root
+        algorithm: Hashing.algorithm the trace was anchored with (the memo
+            "alg" field; default: from the trace)
+        chunk_size: Hashing.chunk_size the trace was anchored with
+            (default: from the trace, or 4096)
+        trace_version: Trace version the trace was anchored with (default:
+            from the trace)
+
+    Returns:
+        VerificationResult object
+    """
+    try:
+        reader = TraceReader(source)
+        replayable = is_replayable(source)
+        hashing = {}
+        if replayable:
+            try:
+                hashing = reader.hashing
+            except ValueError:
+                # Not a single trace object: hash the bytes as stored
+                replayable = False
+        algorithm = algorithm or hashing.get(
+            "algorithm", LEGACY_ALGORITHM if replayable else DEFAULT_ALGORITHM
+        )
+        chunk_size = chunk_size or hashing.get("chunk_size", 4096)
+        if replayable:
+            trace_version = trace_version or reader.trace_version
+        mode = parse_algorithm(algorithm)[1]
+
+        if mode == "events":
+            computed_root, chunk_count = _event_root_stream(reader, algorithm, trace_version)
+        else:
+            if replayable and uses_canonical_json(trace_version) and mode != "legacy":
+                blocks = iter_canonical_trace_bytes(reader.header, reader.iter_events())
+            else:
+                blocks = iter_without_hashing_results(source)
+                if not replayable:
+                    blocks = _stored_bytes(blocks, mode)
+            computed_root, chunk_count = compute_merkle_root_stream(
+                blocks, chunk_size, algorithm,
+                min_chunk_size=hashing.get("min_chunk_size"),
+                max_chunk_size=hashing.get("max_chunk_size")
+            )
+
+        details = {
+            "algorithm": algorithm,
+            "chunks": chunk_count
+        }
+        session_id = None
+        if replayable or mode == "events":
+            session_id = reader.session_id
+            details["trace_events"] = reader.event_count
+
+        return VerificationResult(
+            verified=expected_root == computed_root,
+            tx_hash="N/A",
+            session_id=session_id,
+            expected_root=expected_root,
+            computed_root=computed_root,
+            details=details
+        )
+
+    except Exception as e:
+        return VerificationResult(
+            verified=False,
+            tx_hash="N/A",
+            expected_root=expected_root,
+            error=f"Verification failed: {e}"
+        )
+
+
+def verify_inclusion(leaf: str, proof: Dict[str, Any], root: str) -> bool:
+    """
+    Verify that a single leaf is part of an anchored trace.
+
+    Only the leaf hash, its O(log n) audit path and the anchored root are
+    needed; the rest of the trace does not have to be downloaded.
+
+    Args:
+        leaf: Hex leaf hash (see merkle.hash_leaf for hashing a chunk)
+        proof: Proof dictionary from merkle.inclusion_proof()
+        root: Anchored Merkle Root (e.g. the memo "root" field)
+
+    Returns:
+        True if the path leads from the leaf to the root, False otherwise
+    """
+    try:
+        computed_root = root_from_inclusion_proof(
+            leaf,
+            proof["path"],
+            proof.get("algorithm", LEGACY_ALGORITHM)
+        )
+    except (KeyError, TypeError, ValueError):
+        return False
+
+    return computed_root == root
+
+
+def verify_consistency(old_root: str, new_root: str, proof: Dict[str, Any]) -> bool:
+    """
+    Verify that a newer anchor of a session extends an older one.
+
+    Only the two anchored roots and the O(log n) hashes of the proof are
+    needed, so history can be audited without downloading either trace.
+
+    Args:
+        old_root: Merkle Root anchored for the older version
+        new_root: Merkle Root anchored for the newer version
+        proof: Proof dictionary from merkle.event_consistency_proof() or
+            merkle.manifest_consistency_proof()
+
+    Returns:
+        True if the newer tree only appends leaves to the older one
+    """
+    try:
+        computed_root = root_from_consistency_proof(proof, old_root)
+    except (KeyError, TypeError, ValueError):
+        return False
+
+    return computed_root == new_root
+
+
 class TraceVerifier:
     """
     Convenience class for verifying traces with pre-configured clients.
+
+    With a cache, a verification that fails after reading cached content
+    evicts that content and is repeated once with it fetched from IPFS,
+    so a corrupted cache file cannot fail a valid anchor for good.
     """
 
-    def __init__(self, xrpl_client: XRPLClient, ipfs_client: IPFSClient):
+    def __init__(
+        self,
+        xrpl_client: XRPLClient,
+        ipfs_client: IPFSClient,
+        cache: Optional[CIDCache] = None
+    ):
         """
         Initialize verifier.
 
         Args:
             xrpl_client: XRPL client instance
             ipfs_client: IPFS client instance
+            cache: Read cache for IPFS content, so re-verifying an anchor
+                does not download its trace again (default: no cache)
         """
         self.xrpl = xrpl_client
-        self.ipfs = ipfs_client
-
-    def verify(self, tx_hash: str) -> VerificationResult:
+        self.cache = cache
+        self.ipfs = CachingIPFSClient(ipfs_client, cache) if cache is not None else ipfs_client
+
+    def _verify_with_retry(
+        self, verify: Callable[[Any], VerificationResult]
+    ) -> VerificationResult:
+        """Run verify(ipfs_client), again after evicting cached reads if it fails"""
+        if self.cache is None:
+            return verify(self.ipfs)
+
+        # A client per call, so the cache hits of concurrent calls stay apart
+        ipfs = CachingIPFSClient(self.ipfs.ipfs, self.cache)
+        result = verify(ipfs)
+        if result.verified:
+            return result
+        evicted = [cid for cid in dict.fromkeys(ipfs.cache_hits) if self.cache.evict(cid)]
+        if not evicted:
+            return result
+        return verify(CachingIPFSClient(self.ipfs.ipfs, self.cache))
+
+    def verify(self, tx_hash: str, check_attachments: bool = False) -> VerificationResult:
         """
         Verify trace from transaction hash.
 
         Args:
             tx_hash: XRPL transaction hash
+            check_attachments: Also check attachment blobs stored on IPFS
 
         Returns:
             VerificationResult object
         """
-        return verify_trace(tx_hash, self.xrpl, self.ipfs)
+        return self._verify_with_retry(lambda ipfs: verify_trace(
+            tx_hash, self.xrpl, ipfs,
+            attachment_store=ipfs if check_attachments else None
+        ))
 
     def verify_cid(self, cid: str, expected_root: str) -> VerificationResult:
         """
@@ -300,7 +771,9 @@ class TraceVerifier:
         Returns:
             VerificationResult object
         """
-        return verify_trace_from_cid(cid, expected_root, self.ipfs)
+        return self._verify_with_retry(
+            lambda ipfs: verify_trace_from_cid(cid, expected_root, ipfs)
+        )
 
     def close(self) -> None:
         """Close client connections."""
@@ -60,7 +60,9 @@ class XRPLClient:
         merkle_root: str,
         session_id: str,
         model: str,
-        timestamp: Optional[int] = None
+        timestamp: Optional[int] = None,
+        version: str = "a2a-0.1",
+        algorithm: Optional[str] = None
     ) -> Dict[str, Any]:
         """
         Record trace metadata to XRPL Memo.
@@ -72,6 +74,7 @@ class XRPLClient:
         - Merkle Root
         - Timestamp
         - Model name
+        - Hashing algorithm (if given)
 
         Args:
             cid: IPFS Content Identifier
@@ -79,6 +82,8 @@ class XRPLClient:
             session_id: Trace session ID
             model: Model name
             timestamp: Unix timestamp (defaults to current time)
+            version: Trace version recorded as the memo "v" field
+            algorithm: Hashing.algorithm recorded as the memo "alg" field
 
         Returns:
             Dictionary with transaction result:
@@ -97,13 +102,15 @@ class XRPLClient:
 
         # Prepare memo data
         memo_data = {
-            "v": "a2a-0.1",
+            "v": version,
             "sid": session_id,
             "cid": cid,
             "root": merkle_root,
             "ts": timestamp,
             "model": model
         }
+        if algorithm:
+            memo_data["alg"] = algorithm
 
         # Convert memo data to hex
         memo_data_json = json.dumps(memo_data, ensure_ascii=False)
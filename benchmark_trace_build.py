@@ -0,0 +1,67 @@
+"""Benchmark: validated vs trusted construction of large MCP traces
+
+Builds the same trace from synthetic MCP logs with and without per-event
+validation and reports the time per phase.
+
+Usage:
+    python benchmark_trace_build.py [n_events]
+"""
+
+import sys
+import time
+
+from a2a_anchor.trace_schema import Event, EventRecord
+from mcp.mcp_trace_builder import MCPTraceBuilder
+
+
+def make_logs(n_events: int):
+    """Synthetic MCPLogger output: user messages and tool calls (2 events each)"""
+    logs = []
+    for i in range(n_events // 2):
+        ts = f"2025-01-01T00:{i // 3600 % 60:02d}:{i % 60:02d}+00:00"
+        if i % 2:
+            logs.append({
+                "session_id": "bench-session",
+                "timestamp": ts,
+                "channel": "mcp_tool",
+                "jsonrpc_request": {"id": i, "params": {"name": "search", "arguments": {"q": f"query {i}"}}},
+                "jsonrpc_response": {"result": {"content": [{"text": f"result {i}"}]}},
+            })
+        else:
+            logs.append({"session_id": "bench-session", "timestamp": ts, "event_type": "user_message",
+                         "content": f"message {i}"})
+            logs.append({"session_id": "bench-session", "timestamp": ts, "event_type": "ai_message",
+                         "content": f"reply {i}"})
+    return logs
+
+
+def timed(label, func):
+    start = time.perf_counter()
+    result = func()
+    print(f"  {label:<34} {time.perf_counter() - start:8.3f} s")
+    return result
+
+
+def main(n_events: int = 100_000):
+    fields = [
+        {"type": "ai_message", "ts": "2025-01-01T00:00:00+00:00", "content": f"reply {i}"}
+        for i in range(n_events)
+    ]
+
+    print(f"Event construction ({n_events} events)")
+    timed("Event(...) (validated)", lambda: [Event(**f) for f in fields])
+    timed("EventRecord(...)", lambda: [EventRecord(**f) for f in fields])
+
+    logs = make_logs(n_events)
+    for algorithm in ("sha256-chunks", "sha256-events"):
+        print(f"\nMCPTraceBuilder.from_jsonl_logs ({algorithm})")
+        validated = timed("validated", lambda: MCPTraceBuilder.from_jsonl_logs(
+            logs, algorithm=algorithm))
+        trusted = timed("trusted", lambda: MCPTraceBuilder.from_jsonl_logs(
+            logs, algorithm=algorithm, trusted=True))
+        assert validated.hashing.chunkMerkleRoot == trusted.hashing.chunkMerkleRoot
+        print(f"  events: {len(trusted.events)}, roots match")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -20,6 +20,7 @@ from langchain_core.messages import HumanMessage
 from langchain_core.tools import tool
 
 from a2a_anchor.trace_builder import TraceBuilder
+from a2a_anchor.pipeline import persist_payload
 from a2a_anchor.ipfs_client import create_ipfs_client
 
 load_dotenv()
@@ -92,8 +93,9 @@ Process:
 
     output_file = output_dir / f"{trace.session.id}.json"
 
-    with open(output_file, "w", encoding="utf-8") as f:
-        f.write(trace.to_json())
+    # The bytes that were hashed (and are uploaded); a2a-0.3 payloads
+    # carry no root, so it goes into a sidecar file
+    persist_payload(trace.payload(), output_file, hashing=trace.hashing.model_dump(mode="json"))
 
     print(f"\n=== Trace saved to: {output_file} ===")
 
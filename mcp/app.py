@@ -20,13 +20,15 @@ from dotenv import load_dotenv
 # Import MCP components
 from .logger import get_logger
 from .mcp_client import MCPClient
-from .mcp_trace_builder import MCPTraceBuilder
+from .mcp_trace_builder import MCPTraceBuilder, LIVE_ROOT_ALGORITHM
 
 # Import A2A anchor components
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from a2a_anchor.anchor_service import create_anchor_service
+from a2a_anchor.ipfs_cache import CIDCache
+from a2a_anchor.pipeline import persist_payload
 
 # Load environment variables
 load_dotenv()
@@ -39,7 +41,8 @@ class MCPChatApp:
         """Initialize the application."""
         self.logger = get_logger()
         self.mcp_client = MCPClient(
-            server_url=os.getenv("MCP_SERVER_URL", "http://localhost:8000")
+            server_url=os.getenv("MCP_SERVER_URL", "http://localhost:8000"),
+            logger=self.logger
         )
 
         # Check if MCP server is running
@@ -50,6 +53,12 @@ class MCPChatApp:
         # Initialize anchor service (lazy loading)
         self._anchor_service = None
 
+        # Anchored content never changes, so verifying the same anchor
+        # again reads its trace from this cache instead of IPFS
+        self.ipfs_cache = CIDCache(
+            directory=os.getenv("IPFS_CACHE_DIR", str(Path("traces") / ".ipfs_cache"))
+        )
+
     def get_anchor_service(self):
         """Get or create anchor service."""
         if self._anchor_service is None:
@@ -248,6 +257,9 @@ class MCPChatApp:
         if stats['tools_used']:
             lines.append(f"- Tools Used: {', '.join(stats['tools_used'])}")
 
+        if stats.get('merkle_root'):
+            lines.append(f"- Live Merkle Root: `{stats['merkle_root'][:16]}...`")
+
         return "\n".join(lines)
 
     def anchor_session(
@@ -273,20 +285,25 @@ class MCPChatApp:
             if not logs:
                 return "❌ No logs found for this session!"
 
-            # Build A2A trace
+            # Build A2A trace (logs come from our own logger); hashed like
+            # the live root in the session statistics, so the two match
             trace = MCPTraceBuilder.from_jsonl_logs(
                 logs,
                 model_name=model_name,
-                provider="anthropic"
+                provider="anthropic",
+                algorithm=LIVE_ROOT_ALGORITHM,
+                trusted=True
             )
 
-            # Save local copy
+            # Save local copy (the same bytes that are hashed and uploaded);
+            # a2a-0.3 payloads carry no root, so it goes into a sidecar file
             traces_dir = Path("traces")
             traces_dir.mkdir(exist_ok=True)
-            trace_file = traces_dir / f"{session_id}.json"
-
-            with open(trace_file, "w", encoding="utf-8") as f:
-                f.write(trace.to_json())
+            trace_file = persist_payload(
+                trace.payload(),
+                traces_dir / f"{session_id}.json",
+                hashing=trace.hashing.model_dump(mode="json")
+            )
 
             # Progress tracking
             progress_output = [
@@ -360,7 +377,7 @@ class MCPChatApp:
                 network="testnet"
             )
             ipfs_client = create_ipfs_client()
-            verifier = TraceVerifier(xrpl_client, ipfs_client)
+            verifier = TraceVerifier(xrpl_client, ipfs_client, cache=self.ipfs_cache)
 
             # Verify
             output = [
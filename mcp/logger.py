@@ -9,10 +9,17 @@ All logs are appended to logs/events.jsonl in JSONL format.
 
 import json
 import uuid
+from collections import OrderedDict
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Dict, List, Any, Optional
 
+from .mcp_trace_builder import LiveSessionRoot
+
+# Sessions whose running root is kept in memory; older ones are rebuilt
+# from the log file if they are asked for again
+MAX_LIVE_SESSIONS = 64
+
 
 class MCPLogger:
     """Logger for MCP tool invocations with hybrid JSON-RPC + A2A format."""
@@ -26,6 +33,61 @@ class MCPLogger:
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(exist_ok=True)
         self.log_file = self.log_dir / "events.jsonl"
+        # Running "events" mode roots of the sessions asked for, most
+        # recently used last; each is loaded from the log file on first use
+        self._live_roots: "OrderedDict[str, LiveSessionRoot]" = OrderedDict()
+
+    def _live_root(self, session_id: str) -> LiveSessionRoot:
+        """Get a session's running root, replaying only its logs on first use."""
+        live_root = self._live_roots.get(session_id)
+        if live_root is None:
+            live_root = LiveSessionRoot(session_id)
+            for log in self.get_session_logs(session_id):
+                live_root.add_log(log)
+            self._live_roots[session_id] = live_root
+            if len(self._live_roots) > MAX_LIVE_SESSIONS:
+                self._live_roots.popitem(last=False)
+        else:
+            self._live_roots.move_to_end(session_id)
+        return live_root
+
+    def _write_event(self, event: Dict[str, Any]) -> None:
+        """Append an event to the JSONL file and to its session's running root.
+
+        Args:
+            event: Log event with a session_id
+        """
+        with open(self.log_file, "a", encoding="utf-8") as f:
+            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+
+        # Sessions not loaded yet read this event from the file later
+        live_root = self._live_roots.get(event["session_id"])
+        if live_root is not None:
+            live_root.add_log(event)
+
+    def get_session_root(
+        self,
+        session_id: str,
+        model_name: str = "claude-3-5-sonnet-20241022",
+        provider: str = "anthropic"
+    ) -> Optional[str]:
+        """Get the Merkle root the session would be anchored with.
+
+        This is the "events" mode root of the trace that
+        MCPTraceBuilder.from_jsonl_logs() builds from the session's logs
+        (algorithm LIVE_ROOT_ALGORITHM). It is maintained incrementally
+        (O(log n) per logged event), so it can be read after every message
+        without re-reading the log.
+
+        Args:
+            session_id: Session identifier
+            model_name: LLM model name of the trace
+            provider: LLM provider of the trace
+
+        Returns:
+            Hex root digest, or None if the session has no events
+        """
+        return self._live_root(session_id).root(model_name, provider)
 
     def log_tool_call(
         self,
@@ -67,8 +129,7 @@ class MCPLogger:
         }
 
         # Append to JSONL file
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._write_event(event)
 
         return event_id
 
@@ -103,8 +164,7 @@ class MCPLogger:
             "latency_ms": 0
         }
 
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._write_event(event)
 
         return event_id
 
@@ -139,8 +199,7 @@ class MCPLogger:
             "latency_ms": 0
         }
 
-        with open(self.log_file, "a", encoding="utf-8") as f:
-            f.write(json.dumps(event, ensure_ascii=False) + "\n")
+        self._write_event(event)
 
         return event_id
 
@@ -219,7 +278,8 @@ class MCPLogger:
                 "event_count": 0,
                 "tool_calls": 0,
                 "errors": 0,
-                "total_latency_ms": 0
+                "total_latency_ms": 0,
+                "merkle_root": None
             }
 
         tool_calls = [log for log in logs if log.get("channel") == "mcp_tool"]
@@ -243,7 +303,8 @@ class MCPLogger:
             "total_latency_ms": round(total_latency, 2),
             "tools_used": sorted(list(tools_used)),
             "first_event": logs[0].get("timestamp") if logs else None,
-            "last_event": logs[-1].get("timestamp") if logs else None
+            "last_event": logs[-1].get("timestamp") if logs else None,
+            "merkle_root": self.get_session_root(session_id)
         }
 
     def clear_session_logs(self, session_id: str) -> int:
@@ -276,6 +337,8 @@ class MCPLogger:
 
         removed_count = len(all_events) - len(filtered_events)
 
+        self._live_roots.pop(session_id, None)
+
         # Rewrite file
         with open(self.log_file, "w", encoding="utf-8") as f:
             for event in filtered_events:
@@ -299,6 +362,7 @@ class MCPLogger:
 
         # Clear file
         self.log_file.unlink()
+        self._live_roots.clear()
 
         return count
 
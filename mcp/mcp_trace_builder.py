@@ -4,7 +4,8 @@ This module converts MCP tool invocation logs (JSON-RPC format)
 to A2A trace format with Merkle Root verification.
 """
 
-from typing import List, Dict, Any
+import time
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
 from datetime import datetime
 
 import sys
@@ -13,8 +14,185 @@ from pathlib import Path
 # Add parent directory to path for importing a2a_anchor
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from a2a_anchor.trace_schema import TraceJSON, Session, Model, Event, Usage, Hashing
-from a2a_anchor.merkle import compute_trace_merkle
+from a2a_anchor.trace_schema import TraceJSON, Session, Model, Event, EventRecord, Usage, Hashing
+from a2a_anchor.merkle import (
+    compute_trace_merkle, compute_trace_digests, compute_event_merkle, trace_version_for,
+    parse_algorithm, resolve_algorithm, json_encoder_for, event_metadata, event_tree_root,
+    leaf_hash, MerkleAccumulator, DEFAULT_ALGORITHM
+)
+from a2a_anchor.cdc import cdc_sizes
+from a2a_anchor.pipeline import PIPELINE_STATS
+from a2a_anchor.bulk import bulk_build, BulkResult
+
+# Hashing of MCP session traces that have a running root (see LiveSessionRoot)
+LIVE_ROOT_ALGORITHM = "sha256-events"
+
+
+def _events_from_log(log: Dict[str, Any], make_event: Any) -> Tuple[List[Any], Optional[str]]:
+    """Map one log entry to the trace events it stands for.
+
+    Args:
+        log: Log event from MCPLogger
+        make_event: Event or EventRecord
+
+    Returns:
+        Tuple of (events, tool actor or None)
+    """
+    timestamp = log.get("timestamp")
+    channel = log.get("channel")
+    event_type = log.get("event_type")
+
+    # User message
+    if event_type == "user_message":
+        return [make_event(
+            type="human_message",
+            ts=timestamp,
+            content=log.get("content", "")
+        )], None
+
+    # AI message
+    if event_type == "ai_message":
+        return [make_event(
+            type="ai_message",
+            ts=timestamp,
+            content=log.get("content", "")
+        )], None
+
+    # MCP tool call
+    if channel == "mcp_tool":
+        request = log.get("jsonrpc_request", {})
+        response = log.get("jsonrpc_response", {})
+
+        params = request.get("params", {})
+        tool_name = params.get("name")
+        arguments = params.get("arguments", {})
+        tool_call_id = str(request.get("id", ""))
+
+        # Tool call event
+        events = [make_event(
+            type="ai_tool_call",
+            ts=timestamp,
+            tool=tool_name,
+            args=arguments,
+            tool_call_id=tool_call_id
+        )]
+
+        # Tool result event
+        result = response.get("result", {})
+        error = response.get("error")
+
+        if error:
+            # Error result
+            content = f"Error: {error.get('message', 'Unknown error')}"
+        else:
+            # Success result
+            result_content = result.get("content", [])
+            if result_content and isinstance(result_content, list):
+                content = result_content[0].get("text", "")
+            else:
+                content = str(result)
+
+        events.append(make_event(
+            type="tool_result",
+            ts=timestamp,
+            tool_call_id=tool_call_id,
+            content=content
+        ))
+        return events, f"tool:{tool_name}" if tool_name else None
+
+    return [], None
+
+
+def _session_trace(
+    session_id: str,
+    created_at: Optional[str],
+    actors: Iterable[str],
+    model_name: str,
+    provider: str,
+    algorithm: str,
+    events: List[Any],
+    trusted: bool
+) -> TraceJSON:
+    """Build the (not yet hashed) trace of a session."""
+    build_trace = TraceJSON.construct_trusted if trusted else TraceJSON
+    return build_trace(
+        traceVersion=trace_version_for(algorithm),
+        session=Session(
+            id=session_id,
+            createdAt=created_at,
+            actors=sorted(list(actors))
+        ),
+        model=Model(
+            name=model_name,
+            provider=provider
+        ),
+        events=events,
+        usage=[],  # Token usage not available from MCP logs
+        hashing=Hashing(algorithm=algorithm)
+    )
+
+
+class LiveSessionRoot:
+    """Running "events" mode root of a session's logs.
+
+    Each log is folded in as it is written (O(log n)), and root() equals
+    the chunkMerkleRoot of MCPTraceBuilder.from_jsonl_logs() over the same
+    logs with the same algorithm, so it can be shown before anchoring.
+    """
+
+    def __init__(self, session_id: str, algorithm: str = LIVE_ROOT_ALGORITHM):
+        """
+        Args:
+            session_id: Session identifier
+            algorithm: "events" mode hashing algorithm
+        """
+        hash_name, mode = parse_algorithm(algorithm)
+        if mode != "events":
+            raise ValueError(f"Live session roots need an events mode algorithm: {algorithm}")
+        self.session_id = session_id
+        self.algorithm = algorithm
+        self.hash_name = hash_name
+        self._encode = json_encoder_for(trace_version_for(algorithm))
+        self.accumulator = MerkleAccumulator(hash_name)
+        self.actors = set(["user", "assistant"])
+        self.created_at: Optional[str] = None
+        self.log_count = 0
+
+    def add_log(self, log: Dict[str, Any]) -> None:
+        """Fold one log entry into the root"""
+        if not self.log_count:
+            self.created_at = log.get("timestamp")
+        self.log_count += 1
+
+        events, tool_actor = _events_from_log(log, EventRecord)
+        for event in events:
+            self.accumulator.append(self._encode(event.to_dict()))
+        if tool_actor:
+            self.actors.add(tool_actor)
+
+    def root(
+        self,
+        model_name: str = "claude-3-5-sonnet-20241022",
+        provider: str = "anthropic"
+    ) -> Optional[str]:
+        """Get the root the session would be anchored with.
+
+        Args:
+            model_name: LLM model name of the trace
+            provider: LLM provider of the trace
+
+        Returns:
+            Hex root digest, or None if no logs were added
+        """
+        if not self.log_count:
+            return None
+        trace = _session_trace(
+            self.session_id, self.created_at, self.actors,
+            model_name, provider, self.algorithm, [], trusted=True
+        )
+        metadata = event_metadata(trace.model_dump(mode="json"))
+        metadata_leaf = leaf_hash(self._encode(metadata), self.hash_name)
+        return event_tree_root(self.accumulator.root(), metadata_leaf, self.hash_name).hex()
 
 
 class MCPTraceBuilder:
@@ -24,7 +202,9 @@ class MCPTraceBuilder:
     def from_jsonl_logs(
         logs: List[Dict[str, Any]],
         model_name: str = "claude-3-5-sonnet-20241022",
-        provider: str = "anthropic"
+        provider: str = "anthropic",
+        algorithm: str = DEFAULT_ALGORITHM,
+        trusted: bool = False
     ) -> TraceJSON:
         """Build A2A trace from JSONL log entries.
 
@@ -32,6 +212,9 @@ class MCPTraceBuilder:
             logs: List of log events from logger
             model_name: LLM model name used
             provider: LLM provider name
+            algorithm: Hashing algorithm ("sha256" builds an a2a-0.1 trace,
+                "auto" uses the fastest hash function on this host)
+            trusted: Skip per-event validation; only for logs written by MCPLogger
 
         Returns:
             TraceJSON object with Merkle Root computed
@@ -41,6 +224,7 @@ class MCPTraceBuilder:
         """
         if not logs:
             raise ValueError("No logs provided")
+        algorithm = resolve_algorithm(algorithm)
 
         # Extract session metadata
         session_id = logs[0].get("session_id")
@@ -53,102 +237,63 @@ class MCPTraceBuilder:
         actors = set(["user", "assistant"])  # Default actors
 
         # Build events list
-        events: List[Event] = []
+        events: List[Any] = []
+        make_event = EventRecord if trusted else Event
 
         for log in logs:
-            timestamp = log.get("timestamp")
-            channel = log.get("channel")
-            event_type = log.get("event_type")
-
-            # User message
-            if event_type == "user_message":
-                events.append(Event(
-                    type="human_message",
-                    ts=timestamp,
-                    content=log.get("content", "")
-                ))
-
-            # AI message
-            elif event_type == "ai_message":
-                events.append(Event(
-                    type="ai_message",
-                    ts=timestamp,
-                    content=log.get("content", "")
-                ))
-
-            # MCP tool call
-            elif channel == "mcp_tool":
-                request = log.get("jsonrpc_request", {})
-                response = log.get("jsonrpc_response", {})
-
-                params = request.get("params", {})
-                tool_name = params.get("name")
-                arguments = params.get("arguments", {})
-                tool_call_id = str(request.get("id", ""))
-
-                # Add tool actor
-                if tool_name:
-                    actors.add(f"tool:{tool_name}")
-
-                # Tool call event
-                events.append(Event(
-                    type="ai_tool_call",
-                    ts=timestamp,
-                    tool=tool_name,
-                    args=arguments,
-                    tool_call_id=tool_call_id
-                ))
-
-                # Tool result event
-                result = response.get("result", {})
-                error = response.get("error")
-
-                if error:
-                    # Error result
-                    content = f"Error: {error.get('message', 'Unknown error')}"
-                else:
-                    # Success result
-                    result_content = result.get("content", [])
-                    if result_content and isinstance(result_content, list):
-                        content = result_content[0].get("text", "")
-                    else:
-                        content = str(result)
-
-                events.append(Event(
-                    type="tool_result",
-                    ts=timestamp,
-                    tool_call_id=tool_call_id,
-                    content=content
-                ))
+            log_events, tool_actor = _events_from_log(log, make_event)
+            events.extend(log_events)
+            if tool_actor:
+                actors.add(tool_actor)
 
         # Build trace without hashing first
-        trace = TraceJSON(
-            session=Session(
-                id=session_id,
-                createdAt=created_at,
-                actors=sorted(list(actors))
-            ),
-            model=Model(
-                name=model_name,
-                provider=provider
-            ),
-            events=events,
-            usage=[],  # Token usage not available from MCP logs
-            hashing=Hashing()
+        trace = _session_trace(
+            session_id, created_at, actors, model_name, provider, algorithm, events, trusted
         )
 
         # Compute Merkle Root
+        mode = parse_algorithm(algorithm)[1]
+
+        if mode == "events":
+            # Event leaves are hashed from the parsed trace, no JSON cache needed
+            merkle_root, event_hashes, _ = compute_event_merkle(
+                trace.model_dump(mode="json"), algorithm
+            )
+            trace.hashing.chunkMerkleRoot = merkle_root
+            trace.hashing.chunkDigests = event_hashes
+            return trace
+
+        if mode == "cdc":
+            trace.hashing.min_chunk_size, _, trace.hashing.max_chunk_size = cdc_sizes(
+                trace.hashing.chunk_size
+            )
+
+        if mode != "legacy":
+            # a2a-0.3: the root covers the canonical bytes of the parsed
+            # trace; they are serialized once and kept as the payload
+            started = time.perf_counter()
+            payload = trace.hashed_bytes()
+            merkle_root, trace.hashing.chunkDigests = compute_trace_digests(
+                payload, trace.hashing.chunk_size, algorithm,
+                min_chunk_size=trace.hashing.min_chunk_size,
+                max_chunk_size=trace.hashing.max_chunk_size
+            )
+            trace.hashing.chunkMerkleRoot = merkle_root
+            PIPELINE_STATS.record_stage("hash", payload, started)
+            return trace
+
         # Convert to JSON (without hashing fields populated)
+        PIPELINE_STATS.count_serialization()
         trace_json = trace.model_dump_json(
             indent=2,
-            exclude={"hashing": {"chunkMerkleRoot", "chunks"}}
+            exclude={"hashing": {"chunkMerkleRoot", "chunks", "chunkDigests"}}
         )
 
-        merkle_root, chunk_hashes = compute_trace_merkle(trace_json)
-
         # Update hashing information
+        merkle_root, trace.hashing.chunks = compute_trace_merkle(
+            trace_json, trace.hashing.chunk_size, algorithm
+        )
         trace.hashing.chunkMerkleRoot = merkle_root
-        trace.hashing.chunks = chunk_hashes
 
         # Cache the JSON for later verification
         trace._merkle_json_cache = trace_json
@@ -160,7 +305,9 @@ class MCPTraceBuilder:
         log_file: Path,
         session_id: str,
         model_name: str = "claude-3-5-sonnet-20241022",
-        provider: str = "anthropic"
+        provider: str = "anthropic",
+        algorithm: str = DEFAULT_ALGORITHM,
+        trusted: bool = False
     ) -> TraceJSON:
         """Build trace from a session in a JSONL log file.
 
@@ -169,6 +316,8 @@ class MCPTraceBuilder:
             session_id: Session ID to extract
             model_name: LLM model name
             provider: LLM provider
+            algorithm: Hashing algorithm
+            trusted: Skip per-event validation (file written by MCPLogger)
 
         Returns:
             TraceJSON object
@@ -200,8 +349,42 @@ class MCPTraceBuilder:
         return MCPTraceBuilder.from_jsonl_logs(
             session_logs,
             model_name=model_name,
-            provider=provider
+            provider=provider,
+            algorithm=algorithm,
+            trusted=trusted
+        )
+
+    @staticmethod
+    def bulk_from_jsonl_logs(
+        sessions: Iterable[List[Dict[str, Any]]],
+        model_name: str = "claude-3-5-sonnet-20241022",
+        provider: str = "anthropic",
+        algorithm: str = DEFAULT_ALGORITHM,
+        trusted: bool = False,
+        **bulk_kwargs: Any
+    ) -> Iterator[BulkResult]:
+        """Build traces from the logs of many sessions on a process pool.
+
+        Args:
+            sessions: Log events of each session (see from_jsonl_logs)
+            model_name: LLM model name used
+            provider: LLM provider name
+            algorithm: Hashing algorithm
+            trusted: Skip per-event validation; only for logs written by MCPLogger
+            **bulk_kwargs: Further bulk_build() arguments (workers,
+                max_in_flight, ordered, serialize)
+
+        Returns:
+            Iterator over the built traces
+        """
+        # Resolved here so that the workers do not each run the benchmark
+        algorithm = resolve_algorithm(algorithm)
+        jobs = (
+            {"logs": logs, "model_name": model_name, "provider": provider,
+             "algorithm": algorithm, "trusted": trusted}
+            for logs in sessions
         )
+        return bulk_build(MCPTraceBuilder.from_jsonl_logs, jobs, **bulk_kwargs)
 
     @staticmethod
     def get_session_summary(logs: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -79,7 +79,7 @@ def test_basic_flow():
         print(f"       - Events: {len(trace.events)}")
         print(f"       - Actors: {trace.session.actors}")
         print(f"       - Merkle Root: {trace.hashing.chunkMerkleRoot[:16]}...")
-        print(f"       - Chunks: {len(trace.hashing.chunks)}")
+        print(f"       - Chunks: {len(trace.hashing.chunkDigests or trace.hashing.chunks)}")
     except Exception as e:
         print(f"    ❌ Failed to build trace: {e}")
 
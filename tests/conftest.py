@@ -0,0 +1,101 @@
+"""
+Shared test doubles and factories
+
+FakeIPFS and FakeXRPL stand in for an IPFS node and the XRP Ledger, so
+anchoring and verification can be tested without either.
+"""
+
+import hashlib
+
+import pytest
+
+from a2a_anchor.payload import compress_payload
+from a2a_anchor.trace_builder import TraceBuilder
+from langchain_core.messages import HumanMessage, AIMessage
+
+
+class FakeIPFS:
+    """In-memory IPFS node; CIDs are derived from the content"""
+
+    def __init__(self):
+        self.blocks = {}
+        self.reads = 0
+        self.closed = False
+
+    def add_bytes(self, data):
+        # bytes(data) is data itself for bytes, so stored buffers can be compared by identity
+        data = bytes(data)
+        cid = "Qm" + hashlib.sha256(data).hexdigest()[:44]
+        self.blocks[cid] = data
+        return cid
+
+    def add_json_str(self, json_str, compression=None, level=None):
+        data = json_str.encode("utf-8")
+        if compression is not None:
+            data = compress_payload(data, compression, level)
+        return self.add_bytes(data)
+
+    def get_bytes(self, cid):
+        self.reads += 1
+        return self.blocks[cid]
+
+    def cat_stream(self, cid):
+        self.reads += 1
+        return iter([self.blocks[cid]])
+
+    def pin(self, cid):
+        return None
+
+    def close(self):
+        self.closed = True
+
+
+class FakeXRPL:
+    """XRP Ledger holding one memo, returned for any transaction hash"""
+
+    def __init__(self, memo=None):
+        self.memo = memo
+
+    def anchor_memo(self, cid, merkle_root, session_id, model, timestamp, version, algorithm):
+        self.memo = {
+            "cid": cid, "root": merkle_root, "sid": session_id, "model": model,
+            "ts": timestamp, "v": version, "alg": algorithm
+        }
+        return {"tx_hash": "tx", "ledger_index": 1, "memo_data": self.memo, "network": "testnet"}
+
+    def get_transaction(self, tx_hash):
+        return {"ledger_index": 1}
+
+    def get_memo_from_transaction(self, tx_hash):
+        return self.memo
+
+    def close(self):
+        pass
+
+
+@pytest.fixture
+def ipfs():
+    return FakeIPFS()
+
+
+@pytest.fixture
+def xrpl():
+    return FakeXRPL()
+
+
+@pytest.fixture
+def build_trace():
+    """
+    Factory of built traces.
+
+    build_trace(messages=None, session_id="test-session", **kwargs) adds
+    the messages (default: one question and answer) to a TraceBuilder
+    created with kwargs and returns the built trace.
+    """
+    def build(messages=None, session_id="test-session", **kwargs):
+        builder = TraceBuilder(session_id=session_id, **kwargs)
+        if messages is None:
+            messages = [HumanMessage(content="What is the ledger height?"), AIMessage(content="It is 42.")]
+        builder.add_messages(messages)
+        return builder.build()
+    return build
@@ -0,0 +1,224 @@
+"""
+Tests for the async IPFS client
+
+A stand-in for the Kubo HTTP API is served through httpx.MockTransport.
+"""
+
+import asyncio
+import hashlib
+import json
+
+import pytest
+
+httpx = pytest.importorskip("httpx")
+
+from a2a_anchor.async_ipfs_client import AsyncIPFSClient, api_base_url
+from a2a_anchor.payload import decompress_payload
+
+
+class _FakeKubo:
+    """Minimal /api/v0 handler: add, cat, pin/add, pin/rm and version"""
+
+    def __init__(self, delay: float = 0.0):
+        self.blocks = {}
+        self.pins = set()
+        self.requests = []
+        self.delay = delay
+
+    async def __call__(self, request):
+        command = request.url.path.split("/api/v0/", 1)[1]
+        self.requests.append((request.method, command))
+        if self.delay:
+            await asyncio.sleep(self.delay)
+        if request.method != "POST":
+            return httpx.Response(405, text="405 - Method Not Allowed")
+
+        cid = request.url.params.get("arg")
+        if command == "add":
+            body = await request.aread()
+            boundary = request.headers["content-type"].split("boundary=")[1].encode()
+            part = body.split(b"--" + boundary)[1]
+            data = part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n", 1)[0]
+            cid = "Qm" + hashlib.sha256(data).hexdigest()[:44]
+            self.blocks[cid] = data
+            return httpx.Response(200, text=json.dumps({"Name": "trace", "Hash": cid}) + "\n")
+        if command == "cat":
+            if cid not in self.blocks:
+                return httpx.Response(500, json={"Message": "block was not found locally", "Code": 0})
+            return httpx.Response(200, content=self.blocks[cid])
+        if command == "pin/add":
+            self.pins.add(cid)
+            return httpx.Response(200, json={"Pins": [cid]})
+        if command == "pin/rm":
+            self.pins.discard(cid)
+            return httpx.Response(200, json={"Pins": [cid]})
+        if command == "version":
+            return httpx.Response(200, json={"Version": "0.29.0"})
+        return httpx.Response(404, text="404 page not found")
+
+
+def _client(kubo, **kwargs):
+    return AsyncIPFSClient(transport=httpx.MockTransport(kubo), **kwargs)
+
+
+def test_api_base_url():
+    """Multiaddrs and URLs map to the /api/v0 base URL"""
+    assert api_base_url("/ip4/127.0.0.1/tcp/5001/http") == "http://127.0.0.1:5001/api/v0"
+    assert api_base_url("/dns/ipfs.example.com/tcp/443/https") == "https://ipfs.example.com:443/api/v0"
+    assert api_base_url("/ip6/::1/tcp/5001") == "http://[::1]:5001/api/v0"
+    assert api_base_url("http://localhost:5001/") == "http://localhost:5001/api/v0"
+    with pytest.raises(ValueError):
+        api_base_url("/unix/tmp/ipfs.sock")
+
+
+def test_round_trip_preserves_exact_string():
+    """add_json_str stores the string as given; get_json_str returns it unchanged"""
+    kubo = _FakeKubo()
+    json_str = '{"b": 1,   "a": "ü"}'
+
+    async def run():
+        async with _client(kubo) as ipfs:
+            cid = await ipfs.add_json_str(json_str)
+            return cid, await ipfs.get_json_str(cid), await ipfs.get_json(cid)
+
+    cid, text, data = asyncio.run(run())
+    assert text == json_str
+    assert data == {"b": 1, "a": "ü"}
+    assert kubo.blocks[cid] == json_str.encode("utf-8")
+    assert all(method == "POST" for method, _ in kubo.requests)
+
+
+def test_compressed_payload_round_trip():
+    """Compressed uploads are decompressed on read"""
+    kubo = _FakeKubo()
+    json_str = json.dumps({"events": ["x" * 100] * 50})
+
+    async def run():
+        async with _client(kubo) as ipfs:
+            cid = await ipfs.add_json_str(json_str, compression="zlib")
+            blocks = [block async for block in ipfs.cat_stream(cid)]
+            return cid, b"".join(blocks), await ipfs.get_json_str(cid)
+
+    cid, raw, text = asyncio.run(run())
+    assert len(raw) < len(json_str)
+    assert decompress_payload(raw)[1] == json_str.encode("utf-8")
+    assert text == json_str
+
+
+def test_invalid_input():
+    """Invalid JSON and empty CIDs raise ValueError before any request"""
+    kubo = _FakeKubo()
+
+    async def run():
+        async with _client(kubo) as ipfs:
+            with pytest.raises(ValueError):
+                await ipfs.add_json_str("{not json")
+            with pytest.raises(ValueError):
+                await ipfs.get_bytes("")
+            with pytest.raises(ValueError):
+                await ipfs.add_json(["not", "a", "dict"])
+
+    asyncio.run(run())
+    assert kubo.requests == []
+
+
+def test_api_errors_are_wrapped():
+    """Errors of the node surface as 'Failed ...' exceptions"""
+    kubo = _FakeKubo()
+
+    async def run():
+        async with _client(kubo) as ipfs:
+            with pytest.raises(Exception, match="Failed to get content from IPFS.*not found"):
+                await ipfs.get_bytes("QmMissing")
+
+    asyncio.run(run())
+
+
+def test_pin_version_and_online():
+    """pin/unpin, version and is_online use the matching API commands"""
+    kubo = _FakeKubo()
+
+    async def run():
+        async with _client(kubo) as ipfs:
+            cid = await ipfs.add_bytes(b"trace")
+            await ipfs.pin(cid)
+            pinned = cid in kubo.pins
+            await ipfs.unpin(cid)
+            return pinned, cid in kubo.pins, await ipfs.get_version(), await ipfs.is_online()
+
+    pinned, still_pinned, version, online = asyncio.run(run())
+    assert pinned and not still_pinned
+    assert version["Version"] == "0.29.0"
+    assert online
+
+
+def test_concurrent_calls_share_one_client():
+    """Concurrent uploads go through the same pooled client"""
+    kubo = _FakeKubo()
+
+    async def run():
+        async with _client(kubo, max_connections=4) as ipfs:
+            http = ipfs.http
+            cids = await asyncio.gather(*(
+                ipfs.add_json_str(json.dumps({"i": i})) for i in range(20)
+            ))
+            assert ipfs.http is http
+            return cids
+
+    cids = asyncio.run(run())
+    assert len(set(cids)) == 20
+
+
+def test_timeout_is_reported():
+    """A call exceeding its timeout fails and is_online reports False"""
+    kubo = _FakeKubo(delay=1.0)
+
+    class _SlowTransport(httpx.AsyncBaseTransport):
+        async def handle_async_request(self, request):
+            timeout = request.extensions["timeout"]["read"]
+            try:
+                return await asyncio.wait_for(kubo(request), timeout)
+            except asyncio.TimeoutError:
+                raise httpx.ReadTimeout("timed out", request=request)
+
+    async def run():
+        async with AsyncIPFSClient(transport=_SlowTransport(), timeout=0.05) as ipfs:
+            with pytest.raises(Exception, match="Failed to get IPFS version"):
+                await ipfs.get_version()
+            return await ipfs.is_online()
+
+    assert asyncio.run(run()) is False
+
+
+def test_timeout_bounds_trickling_response():
+    """A response arriving in slow pieces cannot run past the call's deadline"""
+    async def trickle():
+        for _ in range(10):
+            await asyncio.sleep(0.03)
+            yield b"x"
+
+    def handler(request):
+        return httpx.Response(200, content=trickle())
+
+    async def run():
+        async with AsyncIPFSClient(transport=httpx.MockTransport(handler), timeout=5.0) as ipfs:
+            assert await ipfs.get_bytes("Qm" + "x" * 44) == b"x" * 10
+            with pytest.raises(Exception, match="Failed to get content"):
+                await ipfs.get_bytes("Qm" + "x" * 44, timeout=0.1)
+
+    asyncio.run(run())
+
+
+def test_cancellation_propagates():
+    """Cancelling a call raises CancelledError, not a wrapped exception"""
+    kubo = _FakeKubo(delay=10.0)
+
+    async def run():
+        async with _client(kubo) as ipfs:
+            task = asyncio.create_task(ipfs.add_bytes(b"slow"))
+            await asyncio.sleep(0.01)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+
+    asyncio.run(run())
@@ -0,0 +1,94 @@
+"""
+Tests for content-addressed attachments of large event fields
+"""
+
+import json
+
+import pytest
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+
+from a2a_anchor.anchor_service import AnchorService
+from a2a_anchor.attachments import (
+    LocalBlobStore, expand_attachments, load_attachment, verify_attachments
+)
+from a2a_anchor.verify import verify_trace, verify_trace_from_json
+
+
+DOCUMENT = "lorem ipsum dolor sit amet\n" * 500
+ARGS = {"paths": [f"/data/file-{i}.txt" for i in range(300)]}
+
+
+MESSAGES = [
+    HumanMessage(content="Summarize the files"),
+    AIMessage(content="", tool_calls=[{"name": "read", "args": ARGS, "id": "call_1"}]),
+    ToolMessage(content=DOCUMENT, name="read", tool_call_id="call_1"),
+    AIMessage(content="A short summary"),
+]
+
+
+@pytest.fixture
+def build_attached(build_trace):
+    def build(store, algorithm="sha256-chunks"):
+        return build_trace(MESSAGES, "attach", algorithm=algorithm,
+                           attachment_store=store, attachment_threshold=1024)
+    return build
+
+
+@pytest.mark.parametrize("algorithm", ["sha256-chunks", "sha256-events", "sha256"])
+def test_large_fields_offloaded(tmp_path, algorithm, build_attached):
+    """Test that large fields become attachments and the core trace verifies."""
+    store = LocalBlobStore(tmp_path)
+    trace = build_attached(store, algorithm)
+
+    assert [(a.event, a.field) for a in trace.attachments] == [(1, "args"), (2, "content")]
+    assert trace.events[1].args is None and trace.events[2].content is None
+    assert trace.events[0].content == "Summarize the files"
+    assert len(trace.payload()) < len(DOCUMENT)
+
+    result = verify_trace_from_json(trace.payload().decode(), trace.hashing.chunkMerkleRoot)
+    assert result.verified, result.error
+
+
+def test_expand_and_verify_blobs(tmp_path, build_attached):
+    """Test lazy loading, expansion and blob checks."""
+    store = LocalBlobStore(tmp_path)
+    trace = build_attached(store)
+    data = json.loads(trace.payload())
+
+    assert load_attachment(trace.attachments[1], store) == DOCUMENT
+    assert all(error is None for error in verify_attachments(data, store).values())
+
+    expanded = expand_attachments(data, store)
+    assert "attachments" not in expanded
+    assert expanded["events"][1]["args"] == ARGS
+    assert expanded["events"][2]["content"] == DOCUMENT
+    assert data["events"][2]["content"] is None
+
+    # A tampered blob is detected
+    blob = store._path(trace.attachments[1].cid)
+    blob.write_bytes(blob.read_bytes().replace(b"lorem", b"LOREM"))
+    errors = verify_attachments(data, store)
+    assert errors[(1, "args")] is None
+    assert "digest" in errors[(2, "content")]
+
+
+def test_small_traces_unchanged(tmp_path, build_trace):
+    """Test that traces without large fields have no attachments section."""
+    trace = build_trace(attachment_store=LocalBlobStore(tmp_path))
+    assert "attachments" not in json.loads(trace.to_json())
+
+
+def test_attachments_on_ipfs(ipfs, xrpl, build_attached):
+    """Test that blobs on IPFS are checked on demand by verify_trace."""
+    trace = build_attached(ipfs)
+    AnchorService(ipfs, xrpl).anchor_trace(trace)
+
+    assert verify_trace("tx", xrpl, ipfs).details["attachments_checked"] is False
+    result = verify_trace("tx", xrpl, ipfs, attachment_store=ipfs)
+    assert result.verified, result.error
+    assert result.details["attachments"] == 2
+
+    ipfs.blocks[trace.attachments[0].cid] = b"{}"
+    result = verify_trace("tx", xrpl, ipfs, attachment_store=ipfs)
+    assert not result.verified
+    assert "attachment" in result.error
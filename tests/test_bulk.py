@@ -0,0 +1,87 @@
+"""
+Tests for bulk trace building on a process pool
+"""
+
+import pytest
+from langchain_core.messages import HumanMessage, AIMessage
+
+from a2a_anchor.bulk import SerializedTrace, bulk_build, build_langchain_traces
+from a2a_anchor.trace_builder import TraceBuilder
+from a2a_anchor.verify import verify_trace_from_json
+from mcp.logger import MCPLogger
+from mcp.mcp_trace_builder import MCPTraceBuilder
+
+
+def _results(n):
+    for i in range(n):
+        yield {"messages": [
+            HumanMessage(content=f"Question {i}"),
+            AIMessage(content=f"Answer {i} " * (i + 1)),
+        ]}
+
+
+def test_ordered_results_verify():
+    """Test that traces come back in input order and verify."""
+    ids = [f"bulk-{i}" for i in range(12)]
+    traces = list(build_langchain_traces(
+        _results(12), session_ids=ids, algorithm="sha256-chunks", workers=2
+    ))
+
+    assert [t.session.id for t in traces] == ids
+    for trace in traces:
+        result = verify_trace_from_json(trace.payload().decode(), trace.hashing.chunkMerkleRoot)
+        assert result.verified, result.error
+
+
+def test_serialized_as_completed():
+    """Test that serialized results carry a verifiable payload."""
+    results = list(build_langchain_traces(
+        _results(8), algorithm="sha256-events", workers=2, ordered=False, serialize=True
+    ))
+
+    assert len({r.session_id for r in results}) == 8
+    for result in results:
+        assert isinstance(result, SerializedTrace)
+        assert result.to_dict()["payload_bytes"] == len(result.payload)
+        assert verify_trace_from_json(result.payload.decode(), result.merkle_root).verified
+
+
+def test_in_flight_is_bounded():
+    """Test that jobs are only taken from the input as results are consumed."""
+    taken = []
+
+    def jobs():
+        for i, result in enumerate(_results(20)):
+            taken.append(i)
+            yield {"result": result, "algorithm": "sha256-chunks"}
+
+    results = bulk_build(TraceBuilder.from_langchain_result, jobs(), workers=2, max_in_flight=3)
+    for consumed, _ in enumerate(results, start=1):
+        assert len(taken) <= consumed + 3
+    assert consumed == 20
+
+
+def test_failed_job_raises():
+    """Test that a failing build raises when its result is due."""
+    sessions = [[], [{"session_id": None}]]
+    with pytest.raises(ValueError):
+        list(MCPTraceBuilder.bulk_from_jsonl_logs(sessions, workers=1))
+
+    with pytest.raises(ValueError):
+        bulk_build(TraceBuilder.from_langchain_result, [], workers=0)
+
+
+def test_mcp_sessions(tmp_path):
+    """Test bulk conversion of MCP logger sessions."""
+    logger = MCPLogger(tmp_path)
+    for sid in ("a", "b", "c"):
+        logger.log_user_message(sid, f"hello from {sid}")
+        logger.log_ai_message(sid, f"hi {sid}")
+
+    sessions = [logger.get_session_logs(sid) for sid in ("a", "b", "c")]
+    traces = list(MCPTraceBuilder.bulk_from_jsonl_logs(
+        sessions, algorithm="sha256-chunks", trusted=True, workers=2
+    ))
+
+    assert [t.session.id for t in traces] == ["a", "b", "c"]
+    assert all(len(t.events) == 2 for t in traces)
@@ -0,0 +1,79 @@
+"""
+Tests for live traces built from LangChain callbacks
+"""
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.tools import tool
+
+from a2a_anchor.callbacks import TraceCallbackHandler
+from a2a_anchor.trace_builder import TraceBuilder
+from a2a_anchor.verify import verify_trace_from_json
+
+
+@tool
+def count_lines(text: str) -> str:
+    """Count the lines of a text."""
+    return str(len(text.splitlines()))
+
+
+def _run_agent(handler):
+    """Run a two-step tool-using loop with the handler attached"""
+    model = FakeMessagesListChatModel(responses=[
+        AIMessage(content="", tool_calls=[
+            {"name": "count_lines", "args": {"text": "a\nb\nc"}, "id": "call_1"}
+        ]),
+        AIMessage(content="It has 3 lines."),
+    ])
+    config = {"callbacks": [handler]}
+    messages = [HumanMessage(content="How many lines?")]
+
+    messages.append(model.invoke(messages, config=config))
+    tool_call = messages[-1].tool_calls[0]
+    messages.append(count_lines.invoke({**tool_call, "type": "tool_call"}, config=config))
+    messages.append(model.invoke(messages, config=config))
+    return messages
+
+
+def test_live_trace_matches_post_processing():
+    """Test that the live trace has the events of the post-processed one."""
+    handler = TraceCallbackHandler(session_id="live-session")
+    messages = _run_agent(handler)
+    trace = handler.build()
+
+    def strip(events):
+        dicts = [e.to_dict() if hasattr(e, "to_dict") else e.model_dump() for e in events]
+        return [{k: v for k, v in d.items() if k != "ts"} for d in dicts]
+
+    expected = TraceBuilder.from_langchain_result(
+        {"messages": messages}, session_id="live-session", algorithm="sha256-events"
+    )
+    assert strip(trace.events) == strip(expected.events)
+    assert [e.type for e in trace.events] == [
+        "human_message", "ai_tool_call", "tool_result", "ai_message"
+    ]
+    assert "tool:count_lines" in trace.session.actors
+
+    result = verify_trace_from_json(trace.to_json(), trace.hashing.chunkMerkleRoot)
+    assert result.verified, result.error
+
+
+def test_step_timings_recorded():
+    """Test that every LLM and tool call is timed."""
+    handler = TraceCallbackHandler()
+    _run_agent(handler)
+
+    timings = handler.timings()
+    assert [t["kind"] for t in timings] == ["llm", "tool", "llm"]
+    assert timings[1]["name"] == "count_lines"
+    assert all(t["seconds"] >= 0 and t["error"] is None for t in timings)
+
+
+def test_root_tracks_events():
+    """Test that the running root is updated as events arrive."""
+    handler = TraceCallbackHandler()
+    empty_root = handler.current_root()
+    _run_agent(handler)
+
+    assert handler.current_root() != empty_root
+    assert len(handler.builder.event_hashes) == 4
@@ -0,0 +1,86 @@
+"""
+Tests for canonical JSON serialization (a2a-0.3 hashing)
+"""
+
+import json
+
+import pytest
+
+from a2a_anchor.canonical import canonicalize, format_number
+from a2a_anchor.merkle import compute_trace_merkle
+from a2a_anchor.verify import verify_trace_from_json
+from langchain_core.messages import HumanMessage, AIMessage
+
+
+@pytest.mark.parametrize("value, expected", [
+    (0.0, "0"),
+    (-0.0, "0"),
+    (1.0, "1"),
+    (0.1, "0.1"),
+    (1e21, "1e+21"),
+    (1e20, "100000000000000000000"),
+    (1e-7, "1e-7"),
+    (0.000001, "0.000001"),
+    (-3.25e-10, "-3.25e-10"),
+    (5e-324, "5e-324"),
+    (333333333.3333333, "333333333.3333333"),
+    (42, "42"),
+])
+def test_number_formatting(value, expected):
+    """Test ECMAScript number formatting."""
+    assert format_number(value) == expected
+
+
+def test_canonical_encoding():
+    """Test key order, whitespace and string escaping."""
+    value = {"b": [1, 2.0, True, None], "a": "é\n\"", "\U0001F600": 1, "דּ": 2}
+
+    assert canonicalize(value) == \
+        '{"a":"é\\n\\"","b":[1,2,true,null],"\U0001F600":1,"דּ":2}'.encode("utf-8")
+    assert canonicalize(json.loads(json.dumps(value, indent=4))) == canonicalize(value)
+
+    with pytest.raises(ValueError):
+        canonicalize({"x": float("nan")})
+    with pytest.raises(TypeError):
+        canonicalize({1: "x"})
+
+
+MESSAGES = [
+    HumanMessage(content="please write a poem."),
+    AIMessage(content="", tool_calls=[
+        {"name": "score", "args": {"temperature": 1.0, "lines": 3}, "id": "call_1"}
+    ]),
+    AIMessage(content="Field lamps cut the dusk"),
+]
+
+
+@pytest.mark.parametrize("algorithm", ["sha256-chunks", "blake2b-cdc", "sha256-events"])
+def test_root_independent_of_formatting(algorithm, build_trace):
+    """Test that a2a-0.3 roots verify after any re-serialization."""
+    trace = build_trace(MESSAGES, algorithm=algorithm)
+    root = trace.hashing.chunkMerkleRoot
+    trace_dict = json.loads(trace.to_json())
+
+    assert trace.traceVersion == "a2a-0.3"
+    assert trace._merkle_json_cache == ""
+    # anchor_trace_from_dict re-serializes with json.dumps(indent=2)
+    assert verify_trace_from_json(json.dumps(trace_dict, ensure_ascii=False, indent=2), root).verified
+    assert verify_trace_from_json(json.dumps(trace_dict), root).verified
+
+    trace_dict["events"][0]["content"] = "tampered"
+    assert not verify_trace_from_json(json.dumps(trace_dict), root).verified
+
+
+def test_a2a_02_traces_still_verify(build_trace):
+    """Test that a2a-0.2 byte engine roots still cover the stored JSON."""
+    trace = build_trace(MESSAGES, algorithm="sha256-chunks")
+    trace_dict = json.loads(trace.to_json())
+    trace_dict["traceVersion"] = "a2a-0.2"
+    # As stored: the root was computed before the results were filled in
+    del trace_dict["hashing"]["chunkDigests"]
+    trace_dict["hashing"]["chunkMerkleRoot"] = None
+    trace_json = json.dumps(trace_dict, indent=2)
+    root, _ = compute_trace_merkle(trace_json, 4096, "sha256-chunks")
+
+    assert verify_trace_from_json(trace_json, root).verified
+    assert not verify_trace_from_json(json.dumps(trace_dict), root).verified
@@ -0,0 +1,117 @@
+"""
+Tests for binary (CBOR) trace payloads
+"""
+
+import pytest
+
+from a2a_anchor import cbor
+from a2a_anchor.payload import (
+    decode_trace, detect_encoding, encode_trace, parse_payload_version, payload_version
+)
+from a2a_anchor.trace_schema import TraceJSON
+from a2a_anchor.verify import verify_trace, verify_trace_from_cid
+from langchain_core.messages import HumanMessage, AIMessage
+
+
+@pytest.mark.parametrize("value, encoded", [
+    # Examples from RFC 8949 Appendix A
+    (0, "00"),
+    (23, "17"),
+    (24, "1818"),
+    (1000, "1903e8"),
+    (18446744073709551615, "1bffffffffffffffff"),
+    (18446744073709551616, "c249010000000000000000"),
+    (-1000, "3903e7"),
+    (0.0, "f90000"),
+    (1.5, "f93e00"),
+    (100000.0, "fa47c35000"),
+    (1.1, "fb3ff199999999999a"),
+    (float("inf"), "f97c00"),
+    (False, "f4"),
+    (None, "f6"),
+    ("ü", "62c3bc"),
+    ([1, [2, 3], [4, 5]], "8301820203820405"),
+    ({"a": 1, "b": [2, 3]}, "a26161016162820203"),
+])
+def test_rfc8949_examples(value, encoded):
+    """Test encoding against RFC 8949 examples and decoding them back."""
+    assert cbor.dumps(value).hex() == encoded
+    assert cbor.loads(bytes.fromhex(encoded)) == value
+
+
+def test_deterministic_map_order():
+    """Test that map keys are sorted by encoding (shorter keys first)."""
+    data = cbor.dumps({"bb": 1, "c": 2, "a": 3})
+
+    assert data == cbor.dumps({"a": 3, "c": 2, "bb": 1})
+    assert list(cbor.loads(data)) == ["a", "c", "bb"]
+
+
+def test_invalid_cbor_rejected():
+    """Test that truncated data, trailing bytes and non-string keys fail."""
+    with pytest.raises(ValueError):
+        cbor.loads(bytes.fromhex("8301"))
+    with pytest.raises(ValueError):
+        cbor.loads(bytes.fromhex("0000"))
+    with pytest.raises(TypeError):
+        cbor.dumps({1: "a"})
+
+
+def test_payload_version():
+    """Test the memo "v" encoding marker."""
+    assert payload_version("a2a-0.3") == "a2a-0.3"
+    assert payload_version("a2a-0.3", "cbor") == "a2a-0.3+cbor"
+    assert parse_payload_version("a2a-0.3+cbor") == ("a2a-0.3", "cbor", None)
+    assert parse_payload_version("a2a-0.1") == ("a2a-0.1", "json", None)
+    with pytest.raises(ValueError):
+        parse_payload_version("a2a-0.3+xml")
+
+
+MESSAGES = [
+    HumanMessage(content="Write a haiku about ledgers"),
+    AIMessage(content="", tool_calls=[
+        {"name": "search", "args": {"q": "ledger", "score": 0.5}, "id": "call_1"}
+    ]),
+    AIMessage(content="Blocks fall like snow"),
+]
+
+
+@pytest.mark.parametrize("algorithm", ["sha256-chunks", "blake2b-events", "sha256-cdc"])
+def test_cbor_payload_round_trip(algorithm, build_trace):
+    """Test that a CBOR payload is smaller and decodes to the same trace."""
+    trace = build_trace(MESSAGES, algorithm=algorithm)
+    payload = encode_trace(trace, "cbor")
+
+    assert len(payload) < len(encode_trace(trace, "json"))
+    assert detect_encoding(payload) == "cbor"
+    assert encode_trace(TraceJSON.from_cbor(payload), "cbor") == payload
+
+    trace_json, trace_data = decode_trace(payload)
+    assert trace_json is None
+    assert trace_data["events"] == trace.model_dump(mode="json")["events"]
+
+
+def test_legacy_trace_cannot_be_cbor(build_trace):
+    """Test that a2a-0.1 traces, whose root covers the JSON text, stay JSON."""
+    with pytest.raises(ValueError):
+        encode_trace(build_trace(MESSAGES, algorithm="sha256"), "cbor")
+
+
+@pytest.mark.parametrize("algorithm", ["sha256-chunks", "sha256-events"])
+def test_verify_trace_decodes_cbor(algorithm, ipfs, xrpl, build_trace):
+    """Test that verify_trace reads the encoding from the memo and verifies."""
+    trace = build_trace(MESSAGES, algorithm=algorithm)
+    cid = ipfs.add_bytes(encode_trace(trace, "cbor"))
+    xrpl.memo = {
+        "cid": cid,
+        "root": trace.hashing.chunkMerkleRoot,
+        "sid": trace.session.id,
+        "v": payload_version(trace.traceVersion, "cbor"),
+        "alg": algorithm,
+    }
+
+    result = verify_trace("tx", xrpl, ipfs)
+    assert result.verified, result.error
+    assert result.details["encoding"] == "cbor"
+
+    assert verify_trace_from_cid(cid, trace.hashing.chunkMerkleRoot, ipfs).verified
@@ -0,0 +1,113 @@
+"""
+Tests for content-defined chunking ("cdc" mode)
+"""
+
+import json
+import random
+
+import pytest
+
+from a2a_anchor import cdc
+from a2a_anchor.cdc import chunk_cdc, cdc_sizes, iter_cdc_chunks, LeafHashCache
+from a2a_anchor.merkle import compute_trace_digests, leaf_hash
+from a2a_anchor.trace_builder import TraceBuilder
+from a2a_anchor.verify import verify_trace_from_json
+from langchain_core.messages import HumanMessage, AIMessage
+
+
+def _random_bytes(size, seed=0):
+    return random.Random(seed).randbytes(size)
+
+
+def test_chunk_sizes_within_bounds():
+    """Test that chunks respect min/max and cover the input exactly."""
+    data = _random_bytes(200_000)
+    chunks = chunk_cdc(data, 1024, 256, 4096)
+
+    assert b"".join(chunks) == data
+    assert all(256 <= len(chunk) <= 4096 for chunk in chunks[:-1])
+    assert 0.5 < len(data) / len(chunks) / 1024 < 2
+
+    with pytest.raises(ValueError):
+        cdc_sizes(1024, 2048, 4096)
+
+
+@pytest.mark.parametrize("sizes", [(256, 1024, 4096), (1, 2, 4), (64, 64, 64), (100, 128, 200)])
+def test_vectorized_scan_matches_byte_loop(monkeypatch, sizes):
+    """Test that the numpy boundary scan finds the boundaries of the byte loop."""
+    pytest.importorskip("numpy")
+    data = _random_bytes(30_000) + b"\0" * 20_000 + b"abc" * 5_000
+    fast = cdc.cdc_boundaries(data, *sizes)
+
+    monkeypatch.setattr(cdc, "numpy", None)
+    assert cdc.cdc_boundaries(data, *sizes) == fast
+
+
+def test_insertion_only_changes_nearby_chunks():
+    """Test that chunks after an insertion resynchronize."""
+    data = _random_bytes(200_000)
+    edited = data[:100_000] + b"inserted event" + data[100_000:]
+
+    before = {bytes(chunk) for chunk in chunk_cdc(data, 1024)}
+    after = [bytes(chunk) for chunk in chunk_cdc(edited, 1024)]
+
+    assert len([chunk for chunk in after if chunk not in before]) <= 3
+
+
+def test_stream_chunks_match_in_memory():
+    """Test that re-cut stream blocks give the same chunks."""
+    data = _random_bytes(50_000)
+    blocks = (data[i:i + 333] for i in range(0, len(data), 333))
+
+    assert list(iter_cdc_chunks(blocks, 512)) == [bytes(chunk) for chunk in chunk_cdc(data, 512)]
+
+
+def test_leaf_cache_matches_full_rehash():
+    """Test that cached digests equal a full rehash and skip unchanged bytes."""
+    cache = LeafHashCache()
+    data = _random_bytes(100_000)
+    cache.digests("session", data, 1024)
+
+    edited = data[:50_000] + b"new" + data[50_200:]
+    hashed_before = cache.hashed_bytes
+    digests = cache.digests("session", edited, 1024)
+
+    assert digests.tobytes() == b"".join(leaf_hash(chunk) for chunk in chunk_cdc(edited, 1024))
+    assert cache.hashed_bytes - hashed_before < 20_000
+    assert cache.reused_chunks > 0
+
+
+def test_leaf_cache_is_bounded_by_bytes():
+    """Test that the least recently used traces are evicted to fit the byte budget."""
+    cache = LeafHashCache(max_bytes=25_000)
+    for key in ("a", "b", "c"):
+        cache.digests(key, _random_bytes(10_000, seed=ord(key)), 1024)
+
+    assert len(cache) == 2
+    assert cache.cached_bytes <= 25_000
+    cache.digests("big", _random_bytes(30_000), 1024)
+    assert len(cache) == 2 and cache.cached_bytes <= 25_000
+
+    with pytest.raises(ValueError):
+        LeafHashCache(max_bytes=-1)
+
+
+def test_builder_reuses_leaves_for_updated_session():
+    """Test re-anchoring a grown session with a shared leaf cache."""
+    cache = LeafHashCache()
+    builder = TraceBuilder("test-session-cdc", algorithm="sha256-cdc", chunk_size=512,
+                           leaf_cache=cache)
+    builder.add_messages([HumanMessage(content="line\n" * 2000), AIMessage(content="ok")])
+    builder.build()
+
+    builder.add_message(HumanMessage(content="one more question"))
+    hashed_before = cache.hashed_bytes
+    trace = builder.build()
+
+    assert trace.hashing.min_chunk_size == 128
+    assert trace.hashing.max_chunk_size == 4096
+    assert cache.hashed_bytes - hashed_before < len(trace.canonical_bytes()) // 2
+    assert trace.hashing.chunkMerkleRoot == compute_trace_digests(
+        trace.canonical_bytes(), 512, "sha256-cdc")[0]
+    assert verify_trace_from_json(trace.get_merkle_json(), trace.hashing.chunkMerkleRoot).verified
+    assert json.loads(trace.to_json())["hashing"]["min_chunk_size"] == 128
@@ -0,0 +1,158 @@
+"""
+Tests for compressed trace payloads
+"""
+
+import pytest
+
+from a2a_anchor.ipfs_client import IPFSClient
+from a2a_anchor.payload import (
+    compress_payload, decode_trace, decompress_payload, encode_trace, iter_decompressed,
+    parse_payload_version, payload_version
+)
+from a2a_anchor.verify import verify_trace, verify_trace_stream
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+
+
+MESSAGES = [
+    message
+    for i in range(30)
+    for message in (
+        HumanMessage(content=f"Question {i}"),
+        AIMessage(content="", tool_calls=[{"name": "search", "args": {"q": "x"}, "id": f"c{i}"}]),
+        ToolMessage(content="same tool output " * 40, tool_call_id=f"c{i}", name="search"),
+    )
+]
+
+
+@pytest.mark.parametrize("compression", ["zlib", "lzma"])
+def test_compress_round_trip(compression):
+    """Test that payloads decompress to the original bytes, in one piece or streamed."""
+    data = b'{"events": []}' * 1000
+    payload = compress_payload(data, compression, level=9)
+
+    assert len(payload) < len(data) // 10
+    assert decompress_payload(payload) == (compression, data)
+
+    blocks = [payload[i:i + 7] for i in range(0, len(payload), 7)]
+    assert b"".join(iter_decompressed(blocks)) == data
+
+
+def test_uncompressed_and_invalid_payloads():
+    """Test pass-through of plain payloads and rejection of broken ones."""
+    assert decompress_payload(b"{}") == (None, b"{}")
+    assert b"".join(iter_decompressed([b"{", b"}"])) == b"{}"
+
+    payload = compress_payload(b"{}" * 100, "zlib")
+    with pytest.raises(ValueError):
+        decompress_payload(payload[:-4])
+    with pytest.raises(ValueError):
+        compress_payload(b"{}", "gzip")
+    with pytest.raises(ValueError):
+        compress_payload(b"{}", "zlib", level=12)
+
+
+@pytest.mark.parametrize("compression", ["zlib", "lzma"])
+def test_decompressed_size_is_limited(compression):
+    """Test that payloads expanding past max_output_size are rejected."""
+    data = bytes(5 * 1024 * 1024)
+    payload = compress_payload(data, compression, level=9)
+
+    assert decompress_payload(payload, max_output_size=len(data)) == (compression, data)
+    pieces = list(iter_decompressed([payload]))
+    assert b"".join(pieces) == data
+    assert max(len(piece) for piece in pieces) <= 1024 * 1024
+
+    with pytest.raises(ValueError):
+        decompress_payload(payload, max_output_size=len(data) - 1)
+    with pytest.raises(ValueError):
+        b"".join(iter_decompressed([payload], max_output_size=100_000))
+
+
+def test_payload_version_with_compression():
+    """Test the memo "v" markers for compressed payloads."""
+    assert payload_version("a2a-0.3", "cbor", "zlib") == "a2a-0.3+cbor+zlib"
+    assert payload_version("a2a-0.1", compression="lzma") == "a2a-0.1+lzma"
+    assert parse_payload_version("a2a-0.3+cbor+zlib") == ("a2a-0.3", "cbor", "zlib")
+    assert parse_payload_version("a2a-0.1+lzma") == ("a2a-0.1", "json", "lzma")
+
+
+class _FakeNode:
+    """Stand-in for the ipfshttpclient client"""
+
+    def __init__(self):
+        self.blocks = {}
+
+    def add_bytes(self, data):
+        cid = f"cid-{len(self.blocks)}"
+        self.blocks[cid] = data
+        return cid
+
+    def add_str(self, text):
+        return self.add_bytes(text.encode("utf-8"))
+
+    def cat(self, cid, stream=False):
+        data = self.blocks[cid]
+        if stream:
+            return iter([data[i:i + 5] for i in range(0, len(data), 5)])
+        return data
+
+
+def _ipfs_client():
+    client = IPFSClient.__new__(IPFSClient)
+    client.client = _FakeNode()
+    return client
+
+
+def test_get_json_str_decompresses_stream():
+    """Test that compressed JSON comes back with its exact formatting."""
+    ipfs = _ipfs_client()
+    json_str = '{\n  "text": "こんにちは 🌍"\n}'
+
+    cid = ipfs.add_json_str(json_str, compression="zlib")
+    assert ipfs.client.blocks[cid] != json_str.encode("utf-8")
+    assert ipfs.get_json_str(cid) == json_str
+    assert ipfs.get_json(cid) == {"text": "こんにちは 🌍"}
+
+
+@pytest.mark.parametrize("algorithm, encoding, compression", [
+    ("sha256", "json", "zlib"),
+    ("sha256-chunks", "json", "lzma"),
+    ("sha256-events", "cbor", "zlib"),
+])
+def test_verify_compressed_trace(algorithm, encoding, compression, xrpl, build_trace):
+    """Test that the root of a compressed trace is that of the uncompressed one."""
+    trace = build_trace(MESSAGES, algorithm=algorithm)
+    ipfs = _ipfs_client()
+    payload = encode_trace(trace, encoding, compression)
+    cid = ipfs.client.add_bytes(payload)
+
+    assert len(payload) < len(encode_trace(trace, encoding)) // 4
+    assert decode_trace(payload)[1]["events"] == trace.model_dump(mode="json")["events"]
+
+    xrpl.memo = memo = {
+        "cid": cid,
+        "root": trace.hashing.chunkMerkleRoot,
+        "sid": trace.session.id,
+        "v": payload_version(trace.traceVersion, encoding, compression),
+        "alg": algorithm,
+    }
+    result = verify_trace("tx", xrpl, ipfs)
+    assert result.verified, result.error
+    assert result.details["compression"] == compression
+
+    # The envelope names the compression, but it has to match the memo
+    other = "lzma" if compression == "zlib" else "zlib"
+    memo["v"] = payload_version(trace.traceVersion, encoding, other)
+    assert not verify_trace("tx", xrpl, ipfs).verified
+
+
+def test_stream_verification_of_compressed_legacy_trace(build_trace):
+    """Test that a2a-0.1 traces can be stream-verified through decompression."""
+    trace = build_trace(MESSAGES, algorithm="sha256")
+    payload = encode_trace(trace, compression="zlib")
+    blocks = [payload[i:i + 1000] for i in range(0, len(payload), 1000)]
+
+    result = verify_trace_stream(
+        iter_decompressed(blocks), trace.hashing.chunkMerkleRoot, algorithm="sha256"
+    )
+    assert result.verified, result.error
@@ -0,0 +1,100 @@
+"""
+Tests for per-call instrumentation of traces and latency reports
+"""
+
+import json
+
+import pytest
+from langchain_core.language_models.fake_chat_models import (
+    FakeMessagesListChatModel, GenericFakeChatModel
+)
+from langchain_core.messages import HumanMessage, AIMessage
+
+from a2a_anchor.callbacks import TraceCallbackHandler
+from a2a_anchor.instrumentation import latency_report
+from a2a_anchor.pipeline import persist_payload
+from a2a_anchor.verify import verify_trace_from_json
+
+
+def _instrumented_trace(algorithm="sha256-events", hashed=False):
+    handler = TraceCallbackHandler(
+        algorithm=algorithm, instrument=True, hash_instrumentation=hashed
+    )
+    config = {"callbacks": [handler]}
+
+    streaming = GenericFakeChatModel(messages=iter([AIMessage(content="streamed reply")]))
+    for _ in streaming.stream([HumanMessage(content="first")], config=config):
+        pass
+
+    model = FakeMessagesListChatModel(responses=[AIMessage(
+        content="counted reply",
+        usage_metadata={"input_tokens": 4, "output_tokens": 8, "total_tokens": 12}
+    )])
+    model.invoke([HumanMessage(content="first"), HumanMessage(content="second")], config=config)
+    return handler.build()
+
+
+def test_steps_are_recorded():
+    """Test time to first token, token counts and event positions."""
+    trace = _instrumented_trace()
+    streamed, counted = trace.instrumentation.steps
+
+    assert streamed.first_token_seconds is not None
+    assert streamed.first_token_seconds <= streamed.seconds
+    assert counted.output_tokens == 8 and counted.tokens_per_second > 0
+    assert trace.events[streamed.event].content == "streamed reply"
+    assert trace.events[counted.event].content == "counted reply"
+
+
+def test_uninstrumented_traces_unchanged():
+    """Test that traces without instrumentation serialize without the field."""
+    handler = TraceCallbackHandler()
+    FakeMessagesListChatModel(responses=[AIMessage(content="hi")]).invoke(
+        "hello", config={"callbacks": [handler]}
+    )
+    assert "instrumentation" not in json.loads(handler.build().to_json())
+
+
+@pytest.mark.parametrize("algorithm", ["sha256-events", "sha256-chunks"])
+def test_unhashed_instrumentation_outside_root(algorithm):
+    """Test that timings are stored but can change without breaking the root."""
+    trace = _instrumented_trace(algorithm)
+    payload = json.loads(trace.payload())
+    assert payload["instrumentation"]["steps"]
+
+    payload["instrumentation"]["steps"][0]["seconds"] = 99.0
+    result = verify_trace_from_json(json.dumps(payload), trace.hashing.chunkMerkleRoot)
+    assert result.verified, result.error
+
+
+@pytest.mark.parametrize("algorithm", ["sha256-events", "sha256-chunks"])
+def test_hashed_instrumentation_in_root(algorithm):
+    """Test that hashed timings cannot be changed."""
+    trace = _instrumented_trace(algorithm, hashed=True)
+    payload = json.loads(trace.payload())
+    assert verify_trace_from_json(json.dumps(payload), trace.hashing.chunkMerkleRoot).verified
+
+    payload["instrumentation"]["steps"][0]["seconds"] = 99.0
+    assert not verify_trace_from_json(json.dumps(payload), trace.hashing.chunkMerkleRoot).verified
+
+
+def test_latency_report(tmp_path):
+    """Test aggregation over a directory of stored traces."""
+    for i in range(3):
+        trace = _instrumented_trace(hashed=i == 0)
+        persist_payload(trace.payload(), tmp_path / f"trace-{i}.json", trace.hashing.model_dump(mode="json"))
+    handler = TraceCallbackHandler()
+    persist_payload(handler.build().payload(), tmp_path / "plain.json")
+    (tmp_path / "broken.json").write_text("{not json")
+
+    report = latency_report(tmp_path)
+
+    assert report["traces"] == 4
+    assert report["instrumented"] == 3
+    assert report["hashed"] == 1
+    assert report["skipped"] == [str(tmp_path / "broken.json")]
+    llm = report["by_kind"]["llm"]
+    assert llm["count"] == 6 and llm["errors"] == 0
+    assert llm["output_tokens"] == 24
+    assert llm["p50_seconds"] <= llm["p95_seconds"] <= llm["max_seconds"]
+    assert report["by_name"]["llm:GenericFakeChatModel"]["mean_first_token_seconds"] is not None
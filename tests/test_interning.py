@@ -0,0 +1,109 @@
+"""
+Tests for interning repeated event payloads
+"""
+
+import json
+
+import pytest
+from langchain_core.messages import HumanMessage, AIMessage, ToolMessage
+
+from a2a_anchor.interning import expand_interned, is_intern_ref
+from a2a_anchor.verify import verify_trace_from_json
+
+
+DRAFT = "Autumn stadium lights\nthe crowd holds its breath as one\na ball arcs through mist"
+
+
+def _retry_loop(rounds):
+    """Messages of a haiku check loop that repeats the same tool call"""
+    messages = [HumanMessage(content="please write a poem.")]
+    for i in range(rounds):
+        messages += [
+            AIMessage(content="", tool_calls=[
+                {"name": "check_haiku_lines", "args": {"text": DRAFT}, "id": f"call_{i}"}
+            ]),
+            ToolMessage(content="expected 3 lines, but got 4 " * 8,
+                        name="check_haiku_lines", tool_call_id=f"call_{i}"),
+        ]
+    messages.append(AIMessage(content=DRAFT))
+    return messages
+
+
+@pytest.fixture
+def build_loop(build_trace):
+    def build(algorithm, intern):
+        return build_trace(_retry_loop(20), "intern", algorithm=algorithm,
+                           intern=intern, intern_min_size=32)
+    return build
+
+
+@pytest.mark.parametrize("algorithm", ["sha256-chunks", "sha256-events", "sha256"])
+def test_interned_trace_verifies_and_shrinks(algorithm, build_loop):
+    """Test that repeated payloads are stored once and the trace verifies."""
+    trace = build_loop(algorithm, intern=True)
+    plain = build_loop(algorithm, intern=False)
+
+    # The draft args and the result; the final answer occurs once
+    assert len(trace.interned.entries) == 2
+    events = json.loads(trace.payload())["events"]
+    assert sum(is_intern_ref(e[field]) for e in events for field in ("content", "args")) == 40
+    assert events[-1]["content"] == DRAFT
+    assert len(trace.payload()) < len(plain.payload()) * 0.7
+
+    result = verify_trace_from_json(trace.payload().decode(), trace.hashing.chunkMerkleRoot)
+    assert result.verified, result.error
+
+
+def test_expansion_is_lossless(build_loop):
+    """Test that expansion gives back the events of the plain trace."""
+    trace = build_loop("sha256-chunks", intern=True)
+    plain = build_loop("sha256-chunks", intern=False)
+
+    expanded = expand_interned(json.loads(trace.payload()))
+    plain_data = json.loads(plain.payload())
+
+    strip = lambda events: [{k: v for k, v in e.items() if k != "ts"} for e in events]
+    assert strip(expanded["events"]) == strip(plain_data["events"])
+    assert "interned" not in expanded
+
+
+def test_short_values_stay_inline(build_trace):
+    """Test that values below the minimum size are not interned."""
+    trace = build_trace([HumanMessage(content="hi"), AIMessage(content="hi")], intern=True)
+
+    assert trace.interned is None
+    assert "interned" not in json.loads(trace.to_json())
+
+
+def test_unique_values_stay_inline(build_trace):
+    """Test that a trace without repeats is not interned and does not grow."""
+    messages = [HumanMessage(content=f"message {i} " * 20) for i in range(10)]
+    trace = build_trace(messages, "unique", intern=True, intern_min_size=32)
+    plain = build_trace(messages, "unique", intern=False)
+
+    assert trace.interned is None
+    assert len(trace.payload()) == len(plain.payload())
+
+
+def test_reference_shaped_args_roundtrip(build_trace):
+    """Test that args that look like a reference are interned, not misread."""
+    messages = [
+        AIMessage(content="", tool_calls=[{"name": "lookup", "args": {"$ref": 0}, "id": "call_0"}]),
+        ToolMessage(content="found " * 10, name="lookup", tool_call_id="call_0"),
+        ToolMessage(content="found " * 10, name="lookup", tool_call_id="call_0"),
+    ]
+    trace = build_trace(messages, "refs", algorithm="sha256-events", intern=True, intern_min_size=32)
+    plain = build_trace(messages, "refs", algorithm="sha256-events", intern=False)
+
+    expanded = expand_interned(json.loads(trace.payload()))
+    strip = lambda events: [{k: v for k, v in e.items() if k != "ts"} for e in events]
+    assert strip(expanded["events"]) == strip(json.loads(plain.payload())["events"])
+    assert expanded["events"][0]["args"] == {"$ref": 0}
+
+
+def test_invalid_reference_rejected(build_loop):
+    """Test that references to missing entries are rejected."""
+    data = json.loads(build_loop("sha256-chunks", intern=True).payload())
+    data["events"][1]["args"] = {"$ref": 99}
+    with pytest.raises(ValueError):
+        expand_interned(data)
@@ -217,3 +217,13 @@ def test_ipfs_unicode_content(ipfs_client):
     retrieved = ipfs_client.get_json(cid)
 
     assert retrieved["events"][0]["content"] == "こんにちは、世界！ 🌍 Testing unicode: émojis 中文 العربية"
+
+
+def test_ipfs_cat_stream(ipfs_client):
+    """Test streaming content back block by block."""
+    json_str = json.dumps(SAMPLE_TRACE, indent=2)
+    cid = ipfs_client.add_json_str(json_str)
+
+    streamed = b"".join(ipfs_client.cat_stream(cid))
+
+    assert streamed.decode("utf-8") == json_str
@@ -0,0 +1,183 @@
+"""
+Tests for the CID-keyed IPFS read cache
+"""
+
+import hashlib
+import json
+import os
+
+import pytest
+
+from a2a_anchor.anchor_service import AnchorService
+from a2a_anchor.ipfs_cache import CachingIPFSClient, CIDCache
+from a2a_anchor.verify import TraceVerifier
+
+
+def _cid(data):
+    return "Qm" + hashlib.sha256(data).hexdigest()[:44]
+
+
+def test_memory_tier_is_lru_by_bytes():
+    """The memory tier evicts least recently used entries to fit its budget"""
+    cache = CIDCache(max_memory_bytes=250)
+    blobs = {_cid(bytes([i]) * 100): bytes([i]) * 100 for i in range(3)}
+    first, second, third = blobs
+
+    cache.put(first, blobs[first])
+    cache.put(second, blobs[second])
+    assert cache.get(first) == blobs[first]
+    cache.put(third, blobs[third])
+
+    assert cache.memory_bytes == 200
+    assert cache.get(second) is None
+    assert cache.get(first) == blobs[first]
+    assert cache.stats.memory_evictions == 1
+    assert cache.stats.to_dict()["memory_hits"] == 2
+    assert cache.stats.misses == 1
+
+
+def test_oversized_items_skip_memory():
+    """Items larger than the memory budget are not kept in memory"""
+    cache = CIDCache(max_memory_bytes=10)
+    cache.put(_cid(b"x" * 11), b"x" * 11)
+    assert cache.memory_bytes == 0
+    assert cache.get(_cid(b"x" * 11)) is None
+
+
+def test_disk_tier_survives_restart(tmp_path):
+    """A new cache on the same directory serves earlier content from disk"""
+    data = b'{"events": []}'
+    cid = _cid(data)
+    CIDCache(directory=tmp_path).put(cid, data)
+
+    cache = CIDCache(directory=tmp_path)
+    assert cache.disk_bytes == len(data)
+    assert cid in cache
+    assert cache.get(cid) == data
+    assert cache.get(cid) == data
+    assert cache.stats.disk_hits == 1
+    assert cache.stats.memory_hits == 1
+
+
+def test_disk_tier_evicts_by_size(tmp_path):
+    """The disk tier removes the least recently used files beyond its budget"""
+    cache = CIDCache(max_memory_bytes=0, directory=tmp_path, max_disk_bytes=250)
+    cids = []
+    for i in range(3):
+        data = bytes([i]) * 100
+        cids.append(_cid(data))
+        cache.put(cids[-1], data)
+        # Distinct modification times regardless of file system resolution
+        path = tmp_path / cids[-1][-2:] / cids[-1]
+        os.utime(path, (i, i))
+
+    assert cache.disk_bytes <= 250
+    assert cache.stats.disk_evictions == 1
+    assert cache.get(cids[0]) is None
+    assert cache.get(cids[2]) == bytes([2]) * 100
+
+
+def test_path_like_ids_stay_in_memory(tmp_path):
+    """IDs that are not plain CID strings never reach the disk tier"""
+    cache = CIDCache(directory=tmp_path)
+    cache.put("../escape", b"data")
+    assert cache.get("../escape") == b"data"
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_caching_client_reads_once(ipfs):
+    """Repeated reads of a CID hit the node only once"""
+    json_str = json.dumps({"a": 1})
+    cid = ipfs.add_bytes(json_str.encode())
+    client = CachingIPFSClient(ipfs)
+
+    assert client.get_json_str(cid) == json_str
+    assert client.get_json(cid) == {"a": 1}
+    assert b"".join(client.cat_stream(cid)) == json_str.encode()
+    assert ipfs.reads == 1
+    assert client.cache.stats.bytes_fetched == len(json_str)
+
+    with pytest.raises(ValueError):
+        client.get_bytes("")
+
+
+def test_reverification_uses_disk_cache(tmp_path, ipfs, xrpl, build_trace):
+    """Re-verifying an anchor through a fresh verifier reads the trace from disk"""
+    trace = build_trace(algorithm="sha256-chunks")
+    AnchorService(ipfs, xrpl).anchor_trace(trace, compression="zlib")
+
+    first = TraceVerifier(xrpl, ipfs, cache=CIDCache(directory=tmp_path))
+    assert first.verify("tx").verified
+    assert ipfs.reads == 1
+
+    # A new process would start with an empty memory tier
+    cache = CIDCache(directory=tmp_path)
+    second = TraceVerifier(xrpl, ipfs, cache=cache)
+    assert second.verify("tx").verified
+    assert ipfs.reads == 1
+    assert cache.stats.disk_hits == 1
+
+    second.close()
+    assert ipfs.closed
+
+
+def test_disk_usage_includes_other_processes(tmp_path):
+    """Disk usage is read from the shared directory, not counted per process"""
+    first = CIDCache(max_memory_bytes=0, directory=tmp_path, max_disk_bytes=250,
+                     disk_rescan_interval=0)
+    second = CIDCache(max_memory_bytes=0, directory=tmp_path, max_disk_bytes=250,
+                      disk_rescan_interval=0)
+    first.put(_cid(b"a" * 100), b"a" * 100)
+    second.put(_cid(b"b" * 100), b"b" * 100)
+
+    assert first.disk_bytes == second.disk_bytes == 200
+    assert first.evict(_cid(b"b" * 100))
+    assert not first.evict(_cid(b"b" * 100))
+    assert second.disk_bytes == 100
+
+    first.put(_cid(b"c" * 100), b"c" * 100)
+    second.put(_cid(b"d" * 100), b"d" * 100)
+    assert first.disk_bytes <= 250
+
+
+
+def test_disk_tier_is_scanned_only_over_budget(tmp_path, monkeypatch):
+    """Writes within the budget count the usage instead of reading the directory"""
+    cache = CIDCache(max_memory_bytes=0, directory=tmp_path, max_disk_bytes=250)
+    scans = []
+    disk_usage = cache._disk_usage
+    monkeypatch.setattr(cache, "_disk_usage", lambda: scans.append(1) or disk_usage())
+
+    cache.put(_cid(b"a" * 100), b"a" * 100)
+    cache.put(_cid(b"b" * 100), b"b" * 100)
+    assert scans == []
+
+    cache.put(_cid(b"c" * 100), b"c" * 100)
+    assert len(scans) == 1
+    assert cache.stats.disk_evictions == 1
+    assert sum(1 for _ in cache._disk_files()) == 2
+
+def test_corrupted_cache_entry_is_evicted_and_refetched(tmp_path, ipfs, xrpl, build_trace):
+    """A tampered cache file is evicted after a failed verification and fetched again"""
+    trace = build_trace(algorithm="sha256-chunks")
+    cid = AnchorService(ipfs, xrpl).anchor_trace(trace)["cid"]
+    cache = CIDCache(directory=tmp_path)
+    verifier = TraceVerifier(xrpl, ipfs, cache=cache)
+    assert verifier.verify("tx").verified
+
+    path = tmp_path / cid[-2:] / cid
+    path.write_bytes(path.read_bytes().replace(b"ledger", b"LEDGER"))
+    cache = CIDCache(directory=tmp_path)
+    verifier = TraceVerifier(xrpl, ipfs, cache=cache)
+
+    assert verifier.verify("tx").verified
+    assert ipfs.reads == 2
+    assert path.read_bytes() == ipfs.blocks[cid]
+    assert verifier.verify_cid(cid, trace.hashing.chunkMerkleRoot).verified
+    assert ipfs.reads == 2
+
+    # Failures of freshly fetched content are reported without a retry
+    ipfs.blocks[cid] = b"{}"
+    cache.evict(cid)
+    assert not verifier.verify("tx").verified
+    assert ipfs.reads == 3
@@ -0,0 +1,71 @@
+"""
+Tests for the MCP hybrid log writer
+
+These tests write to a temporary log directory and need no MCP server.
+"""
+
+from mcp.logger import MCPLogger
+from mcp.mcp_trace_builder import MCPTraceBuilder, LIVE_ROOT_ALGORITHM
+
+
+def anchored_root(logger, session_id, **kwargs):
+    """Root of the trace that would be anchored for the session."""
+    trace = MCPTraceBuilder.from_jsonl_logs(
+        logger.get_session_logs(session_id), algorithm=LIVE_ROOT_ALGORITHM, **kwargs
+    )
+    return trace.hashing.chunkMerkleRoot
+
+
+def test_session_root_updates_per_event(tmp_path):
+    """Test that the session root changes with every logged event."""
+    logger = MCPLogger(tmp_path)
+
+    assert logger.get_session_root("s1") is None
+
+    logger.log_user_message("s1", "hello")
+    first_root = logger.get_session_root("s1")
+    logger.log_ai_message("s1", "hi")
+    logger.log_user_message("s2", "other session")
+
+    assert first_root is not None
+    assert logger.get_session_root("s1") != first_root
+    assert logger.get_session_stats("s1")["merkle_root"] == logger.get_session_root("s1")
+    assert logger.get_session_root("s1") == anchored_root(logger, "s1")
+
+
+def test_session_root_survives_restart(tmp_path):
+    """Test that a new logger rebuilds the same roots from the log file."""
+    logger = MCPLogger(tmp_path)
+    logger.log_user_message("s1", "こんにちは")
+    logger.log_tool_call(
+        "s1",
+        {"jsonrpc": "2.0", "id": 1, "method": "tools/call", "params": {"name": "calculate"}},
+        {"jsonrpc": "2.0", "id": 1, "result": {"content": [{"type": "text", "text": "4"}]}},
+        latency_ms=1.5
+    )
+
+    reloaded = MCPLogger(tmp_path)
+    assert reloaded.get_session_root("s1") == logger.get_session_root("s1")
+    assert reloaded.get_session_root("s1") == anchored_root(logger, "s1")
+    assert reloaded.get_session_root("s1", model_name="other", provider="openai") == \
+        anchored_root(logger, "s1", model_name="other", provider="openai")
+
+    reloaded.log_ai_message("s1", "done")
+    assert MCPLogger(tmp_path).get_session_root("s1") == reloaded.get_session_root("s1")
+
+    reloaded.clear_session_logs("s1")
+    assert reloaded.get_session_root("s1") is None
+
+
+def test_session_roots_load_lazily(tmp_path):
+    """Test that writing events loads no roots and reads load only their session."""
+    logger = MCPLogger(tmp_path)
+    logger.log_user_message("s1", "hello")
+    logger.log_user_message("s2", "other session")
+    assert not logger._live_roots
+
+    root = logger.get_session_root("s2")
+    assert list(logger._live_roots) == ["s2"]
+    logger.log_ai_message("s2", "hi")
+    assert logger.get_session_root("s2") != root
+    assert logger.get_session_root("s2") == anchored_root(logger, "s2")
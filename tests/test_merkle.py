@@ -0,0 +1,508 @@
+"""
+Tests for Merkle Tree computation
+"""
+
+import hashlib
+import json
+
+import pytest
+
+from a2a_anchor import merkle
+from a2a_anchor.merkle import (
+    compute_trace_merkle,
+    compute_trace_digests,
+    compute_merkle_root,
+    compute_merkle_root_bytes,
+    compute_merkle_root_stream,
+    chunk_data,
+    chunk_bytes,
+    leaf_hash,
+    node_hash,
+    merkle_root_from_digests,
+    MerkleAccumulator,
+    compute_event_merkle,
+    event_inclusion_proof,
+    consistency_proof,
+    event_consistency_proof,
+    event_tree_root,
+    hash_leaf,
+    inclusion_proof,
+    parse_algorithm,
+    register_hash_function,
+    fastest_algorithm,
+    resolve_algorithm,
+    trace_version_for,
+    DigestArray,
+)
+from a2a_anchor.canonical import canonicalize
+from a2a_anchor.trace_builder import TraceBuilder
+from a2a_anchor.trace_schema import TraceJSON
+from a2a_anchor.verify import (
+    verify_trace_from_json, verify_trace_stream, verify_inclusion, verify_consistency
+)
+from langchain_core.messages import HumanMessage, AIMessage
+
+
+SAMPLE_JSON = '{"content": "こんにちは、世界！ 🌍"}' * 300
+
+
+def test_legacy_engine_unchanged():
+    """Test that "sha256" still reproduces the a2a-0.1 root."""
+    chunks = chunk_data(SAMPLE_JSON, 4096)
+    expected_root, expected_chunks = compute_merkle_root(chunks)
+
+    root, chunk_hashes = compute_trace_merkle(SAMPLE_JSON, 4096, "sha256")
+
+    assert root == expected_root
+    assert chunk_hashes == expected_chunks
+
+
+def test_chunk_bytes_is_zero_copy():
+    """Test that byte chunks are views over the original buffer."""
+    data = SAMPLE_JSON.encode("utf-8")
+    chunks = chunk_bytes(data, 1000)
+
+    assert all(isinstance(chunk, memoryview) for chunk in chunks)
+    assert chunks[0].obj is data
+    assert b"".join(chunks) == data
+    assert all(len(chunk) == 1000 for chunk in chunks[:-1])
+
+
+def test_bytes_engine_matches_manual_tree():
+    """Test the byte engine against a hand-built three-leaf tree."""
+    data = b"a" * 10
+    root, leaves = compute_merkle_root_bytes(chunk_bytes(data, 4))
+
+    a = hashlib.sha256(b"\x00aaaa").digest()
+    c = hashlib.sha256(b"\x00aa").digest()
+    ab = hashlib.sha256(b"\x01" + a + a).digest()
+
+    assert list(leaves) == [a, a, c]
+    assert root == node_hash(ab, c)
+
+
+def test_bytes_engine_accepts_str_and_bytes():
+    """Test that str input is hashed as its UTF-8 bytes."""
+    from_str = compute_trace_merkle(SAMPLE_JSON, 4096, "sha256-chunks")
+    from_bytes = compute_trace_merkle(SAMPLE_JSON.encode("utf-8"), 4096, "sha256-chunks")
+
+    assert from_str == from_bytes
+    assert from_str[0] != compute_trace_merkle(SAMPLE_JSON, 4096, "sha256")[0]
+
+
+def test_empty_trace_root():
+    """Test that an empty input hashes to the empty-string digest."""
+    root, chunks = compute_trace_merkle("", algorithm="sha256-chunks")
+
+    assert root == hashlib.sha256(b"").hexdigest()
+    assert chunks == []
+
+
+def test_parse_algorithm():
+    """Test algorithm names and their trace versions."""
+    assert parse_algorithm("sha256") == ("sha256", "legacy")
+    assert parse_algorithm("sha256-chunks") == ("sha256", "chunks")
+    assert trace_version_for("sha256") == "a2a-0.1"
+    assert trace_version_for("sha256-chunks") == "a2a-0.3"
+
+    assert parse_algorithm("blake2b-events") == ("blake2b", "events")
+
+    with pytest.raises(ValueError):
+        parse_algorithm("md5-chunks")
+    with pytest.raises(ValueError):
+        parse_algorithm("blake2b")
+
+
+def test_hash_registry():
+    """Test that the hash function is selected by name and 32 bytes wide."""
+    data = b"trace" * 1000
+    sha_root, _ = compute_trace_merkle(data, 1024, "sha256-chunks")
+    blake_root, _ = compute_trace_merkle(data, 1024, "blake2b-chunks")
+
+    assert sha_root != blake_root
+    assert len(bytes.fromhex(blake_root)) == 32
+    assert leaf_hash(b"x", "blake2b") == hashlib.blake2b(b"\x00x", digest_size=32).digest()
+
+    with pytest.raises(ValueError):
+        register_hash_function("sha512", hashlib.sha512)
+    assert fastest_algorithm("events").endswith("-events")
+
+
+@pytest.mark.parametrize(
+    "algorithm", ["sha256", "sha256-chunks", "blake2b-chunks", "blake2b-events", "sha256-cdc"]
+)
+def test_builder_round_trip(algorithm):
+    """Test that verification picks the engine recorded in the trace."""
+    builder = TraceBuilder("test-session-merkle", algorithm=algorithm)
+    builder.add_messages([
+        HumanMessage(content="please write a poem."),
+        AIMessage(content="Field lamps cut the dusk\n" * 400),
+    ])
+    trace = builder.build()
+
+    assert trace.hashing.algorithm == algorithm
+    assert trace.traceVersion == trace_version_for(algorithm)
+
+    result = verify_trace_from_json(trace.get_merkle_json(), trace.hashing.chunkMerkleRoot)
+    assert result.verified
+    assert result.details["chunks"] == len(trace.hashing.chunkDigests or trace.hashing.chunks)
+
+
+@pytest.mark.parametrize("algorithm, mode", [("auto", "chunks"), ("auto-events", "events")])
+def test_builder_resolves_auto_algorithm(algorithm, mode, build_trace):
+    """Test that "auto" records the benchmarked hash function in the trace."""
+    trace = build_trace(algorithm=algorithm)
+
+    assert trace.hashing.algorithm == resolve_algorithm(algorithm) == fastest_algorithm(mode)
+    assert verify_trace_from_json(trace.get_merkle_json(), trace.hashing.chunkMerkleRoot).verified
+    assert resolve_algorithm("sha256") == "sha256"
+    with pytest.raises(ValueError):
+        resolve_algorithm("auto-legacy")
+
+
+def test_accumulator_matches_full_tree():
+    """Test that the running root equals a from-scratch root at every size."""
+    accumulator = MerkleAccumulator()
+    digests = []
+
+    assert accumulator.root() == hashlib.sha256(b"").digest()
+
+    for i in range(40):
+        digests.append(accumulator.append(f"event-{i}".encode("utf-8")))
+        assert accumulator.size == i + 1
+        assert accumulator.root() == merkle_root_from_digests(digests)
+
+
+def test_builder_current_root_tracks_events():
+    """Test that TraceBuilder keeps a per-event running root."""
+    builder = TraceBuilder("test-session-live")
+    builder.add_message(HumanMessage(content="hello"))
+    # Outside "events" mode nothing is hashed until the root is asked for
+    assert len(builder.event_hashes) == 0
+    first_root = builder.current_root()
+    builder.add_message(AIMessage(content="hi there"))
+
+    leaves = [leaf_hash(canonicalize(event.model_dump())) for event in builder.events]
+
+    assert builder.current_root() != first_root
+    assert builder.current_root() == merkle_root_from_digests(leaves).hex()
+
+
+@pytest.mark.parametrize("algorithm", ["sha256", "sha256-chunks"])
+def test_inclusion_proof_for_every_leaf(algorithm):
+    """Test that every leaf of odd and even sized trees has a valid proof."""
+    for size in (1, 2, 5, 8, 13):
+        data = "".join(f"chunk-{i:04d}|" for i in range(size))
+        root, chunk_hashes = compute_trace_merkle(data, 10, algorithm)
+
+        for index in range(size):
+            proof = inclusion_proof(chunk_hashes, index, algorithm)
+            leaf = hash_leaf(data[index * 10:(index + 1) * 10], algorithm)
+
+            assert proof["root"] == root
+            assert proof["leaf"] == leaf
+            assert len(proof["path"]) <= size.bit_length()
+            assert verify_inclusion(leaf, proof, root)
+
+
+def test_inclusion_proof_rejects_wrong_leaf():
+    """Test that a proof does not verify for tampered data or roots."""
+    data = b"x" * 5000
+    root, chunk_hashes = compute_trace_merkle(data, 1000, "sha256-chunks")
+    proof = inclusion_proof(chunk_hashes, 2, "sha256-chunks")
+
+    assert not verify_inclusion(hash_leaf(b"y" * 1000), proof, root)
+    assert not verify_inclusion(proof["leaf"], proof, chunk_hashes[0])
+    assert not verify_inclusion(proof["leaf"], {"path": [{"hash": "zz", "position": "up"}]}, root)
+
+    with pytest.raises(IndexError):
+        inclusion_proof(chunk_hashes, 5)
+
+
+def _build_event_trace(messages):
+    builder = TraceBuilder("test-session-events", algorithm="sha256-events")
+    builder.add_messages(messages)
+    return builder.build()
+
+
+def test_event_mode_round_trip_and_formatting():
+    """Test that "events" roots verify regardless of JSON formatting."""
+    trace = _build_event_trace([
+        HumanMessage(content="please write a poem."),
+        AIMessage(content="Field lamps cut the dusk"),
+    ])
+    root = trace.hashing.chunkMerkleRoot
+
+    assert trace.traceVersion == "a2a-0.3"
+    assert len(trace.hashing.chunkDigests) == 2
+    assert verify_trace_from_json(trace.to_json(), root).verified
+    assert verify_trace_from_json(json.dumps(json.loads(trace.to_json())), root).verified
+
+    tampered = json.loads(trace.to_json())
+    tampered["model"]["name"] = "other-model"
+    assert not verify_trace_from_json(json.dumps(tampered), root).verified
+
+
+def test_event_mode_reuses_leaves_when_appending():
+    """Test that appending an event keeps all earlier event leaf hashes."""
+    messages = [HumanMessage(content=f"message {i}") for i in range(5)]
+    shorter = _build_event_trace(messages)
+    longer = _build_event_trace(messages + [AIMessage(content="reply")])
+
+    # Timestamps differ between builds, so compare leaf counts and recompute
+    assert len(longer.hashing.chunkDigests) == len(shorter.hashing.chunkDigests) + 1
+
+    trace_data = json.loads(longer.to_json())
+    root, event_hashes, _ = compute_event_merkle(trace_data)
+    trace_data["events"] = trace_data["events"][:-1]
+    _, prefix_hashes, _ = compute_event_merkle(trace_data)
+
+    assert root == longer.hashing.chunkMerkleRoot
+    assert event_hashes[:-1] == prefix_hashes
+
+
+def test_event_inclusion_proof():
+    """Test proving a single tool call against an "events" root."""
+    trace = _build_event_trace([
+        HumanMessage(content="please write a poem."),
+        AIMessage(content="", tool_calls=[
+            {"name": "check_haiku_lines", "args": {"text": "a\nb\nc"}, "id": "call_1"}
+        ]),
+        AIMessage(content="done"),
+    ])
+    trace_data = json.loads(trace.to_json())
+    root, event_hashes, metadata_hash = compute_event_merkle(trace_data)
+
+    proof = event_inclusion_proof(event_hashes, metadata_hash, 1)
+    leaf = hash_leaf(canonicalize(trace_data["events"][1]), "sha256-events")
+
+    assert proof["root"] == root == trace.hashing.chunkMerkleRoot
+    assert verify_inclusion(leaf, proof, root)
+    assert not verify_inclusion(event_hashes[0].hex(), proof, root)
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 64, 100, 257])
+def test_parallel_root_matches_serial(size):
+    """Test that thread-pool hashing gives the serial root for any leaf count."""
+    data = bytes(range(256)) * size * 4
+    chunks = chunk_bytes(data, 1024)
+
+    serial = compute_merkle_root_bytes(chunks, workers=1)
+    parallel = compute_merkle_root_bytes(chunks, workers=4, parallel_threshold=0)
+
+    assert parallel == serial
+    assert compute_trace_merkle(data, 1024, "sha256-chunks", workers=8, parallel_threshold=0) == \
+        compute_trace_merkle(data, 1024, "sha256-chunks", workers=1)
+
+
+@pytest.mark.parametrize("algorithm", ["sha256", "sha256-chunks", "sha256-cdc"])
+def test_stream_root_matches_in_memory(tmp_path, algorithm):
+    """Test streaming from blocks, buffers and files against the in-memory root."""
+    data = SAMPLE_JSON.encode("utf-8")
+    expected_root, chunk_hashes = compute_trace_merkle(data, 100, algorithm)
+
+    # Uneven blocks that split chunks and multi-byte characters
+    blocks = (data[i:i + 37] for i in range(0, len(data), 37))
+    assert compute_merkle_root_stream(blocks, 100, algorithm) == (expected_root, len(chunk_hashes))
+    assert compute_merkle_root_stream(data, 100, algorithm)[0] == expected_root
+
+    trace_file = tmp_path / "trace.json"
+    trace_file.write_bytes(data)
+    assert compute_merkle_root_stream(trace_file, 100, algorithm)[0] == expected_root
+    assert verify_trace_stream(str(trace_file), expected_root, algorithm, 100).verified
+
+
+def test_archived_formatted_trace_verifies(tmp_path, build_trace):
+    """Test that a2a-0.1 traces saved with to_json() verify despite their hashing results."""
+    trace = build_trace([HumanMessage(content="q"), AIMessage(content="answer\n" * 2000)],
+                        algorithm="sha256")
+    root = trace.hashing.chunkMerkleRoot
+    archive = trace.to_json()
+    assert root in archive
+
+    trace_file = tmp_path / "trace.json"
+    trace_file.write_text(archive, encoding="utf-8")
+    data = archive.encode("utf-8")
+    blocks = (data[i:i + 7] for i in range(0, len(data), 7))
+
+    assert verify_trace_from_json(archive, root).verified
+    assert verify_trace_stream(trace_file, root, "sha256").verified
+    assert verify_trace_stream(blocks, root, "sha256").verified
+    assert verify_trace_stream(trace.payload(), root, "sha256").verified
+
+    tampered = archive.replace("answer", "ANSWER", 1)
+    assert not verify_trace_from_json(tampered, root).verified
+    assert not verify_trace_stream(tampered.encode("utf-8"), root, "sha256").verified
+
+
+@pytest.mark.parametrize("algorithm", ["sha256", "sha256-chunks", "sha256-cdc"])
+def test_stream_reads_buffers_in_blocks(monkeypatch, algorithm):
+    """Test that buffers are streamed in blocks rather than as one piece."""
+    data = SAMPLE_JSON.encode("utf-8") * 4
+    expected_root = compute_merkle_root_stream(data, 100, algorithm)
+
+    monkeypatch.setattr(merkle, "STREAM_BLOCK_SIZE", 1000)
+    assert max(len(block) for block in merkle._iter_blocks(data)) == 1000
+    assert compute_merkle_root_stream(memoryview(data), 100, algorithm) == expected_root
+
+
+@pytest.mark.parametrize("algorithm", ["sha256-chunks", "sha256-cdc", "blake2b-events"])
+@pytest.mark.parametrize("instrument", [False, True])
+def test_stream_verifies_canonical_traces(tmp_path, build_trace, algorithm, instrument):
+    """Test that a2a-0.3 payloads and to_json() copies stream-verify from their header."""
+    trace = build_trace([HumanMessage(content="q"), AIMessage(content="answer\n" * 2000)],
+                        algorithm=algorithm, instrument=instrument)
+    root = trace.hashing.chunkMerkleRoot
+    archive = tmp_path / "archive.json"
+    archive.write_text(trace.to_json(), encoding="utf-8")
+    payload = tmp_path / "payload.json"
+    payload.write_bytes(trace.payload())
+
+    for source in (archive, payload, trace.to_json().encode("utf-8")):
+        result = verify_trace_stream(source, root)
+        assert result.verified, result.error
+        assert result.details["trace_events"] == len(trace.events)
+
+    tampered = trace.to_json().replace("answer", "ANSWER", 1).encode("utf-8")
+    assert not verify_trace_stream(tampered, root).verified
+
+
+def test_stream_reports_unverifiable_one_shot_streams(build_trace):
+    """Test that one-shot streams of formatted a2a-0.3 traces fail with an error."""
+    trace = build_trace(algorithm="sha256-chunks")
+    root = trace.hashing.chunkMerkleRoot
+    assert verify_trace_stream(iter([trace.payload()]), root).verified
+
+    result = verify_trace_stream(iter([trace.to_json().encode("utf-8")]), root)
+    assert not result.verified
+    assert "path or buffer" in result.error
+
+    events_trace = build_trace(algorithm="sha256-events")
+    assert verify_trace_stream(
+        iter([events_trace.payload()]), events_trace.hashing.chunkMerkleRoot, "sha256-events"
+    ).verified
+
+
+def test_stream_empty_input():
+    """Test that an empty stream has the empty root."""
+    assert compute_merkle_root_stream(iter([]), algorithm="sha256-chunks") == \
+        (hashlib.sha256(b"").hexdigest(), 0)
+    assert compute_merkle_root_stream(iter([]), algorithm="sha256") == \
+        (compute_merkle_root([])[0], 0)
+
+
+def test_digest_array_layout():
+    """Test that digests are stored back to back in one bytes buffer."""
+    root, digests = compute_trace_digests(b"x" * 10000, 100, "sha256-chunks")
+
+    assert len(digests) == 100
+    assert len(digests.tobytes()) == 100 * 32
+    assert digests.hex_list() == compute_trace_merkle(b"x" * 10000, 100, "sha256-chunks")[1]
+    assert DigestArray.from_hex_list(digests.hex_list()) == digests
+    assert DigestArray.from_base64(digests.to_base64()) == digests
+    assert digests[1:3] == DigestArray(digests.tobytes()[32:96])
+
+    with pytest.raises(ValueError):
+        DigestArray(b"\x00" * 33)
+    with pytest.raises(ValueError):
+        compute_trace_digests(b"x", algorithm="sha256")
+
+
+def test_digest_array_trace_serialization():
+    """Test that chunkDigests round-trips as base64 and is left out of the hashed JSON."""
+    builder = TraceBuilder("test-session-digests", algorithm="blake2b-chunks")
+    builder.add_message(HumanMessage(content="hello"))
+    trace = builder.build()
+
+    data = json.loads(trace.to_json())
+    assert isinstance(data["hashing"]["chunkDigests"], str)
+    assert data["hashing"]["chunks"] == []
+    assert TraceJSON.model_validate(data).hashing.chunkDigests == trace.hashing.chunkDigests
+
+    # a2a-0.1 output is unchanged and the fallback JSON never carries digests
+    legacy = TraceBuilder("test-session-digests", algorithm="sha256").build()
+    assert "chunkDigests" not in json.loads(legacy.to_json())["hashing"]
+    trace._merkle_json_cache = ""
+    assert "chunkDigests" not in json.loads(trace.get_merkle_json())["hashing"]
+
+
+def test_consistency_proof_for_every_prefix():
+    """Test consistency proofs between all prefixes of a growing event tree."""
+    leaves = [leaf_hash(f"event-{i}".encode("utf-8")) for i in range(21)]
+    metadata = leaf_hash(b"metadata").hex()
+
+    for new_size in range(1, len(leaves) + 1):
+        digests = DigestArray(b"".join(leaves[:new_size]))
+        for old_size in range(1, new_size + 1):
+            proof = event_consistency_proof(digests, old_size, metadata, metadata)
+            old_root = event_tree_root(
+                merkle_root_from_digests(leaves[:old_size]), bytes.fromhex(metadata)
+            ).hex()
+
+            assert proof["old_root"] == old_root
+            assert len(proof["path"]) <= 2 * new_size.bit_length()
+            assert verify_consistency(old_root, proof["new_root"], proof)
+
+
+def test_consistency_proof_detects_rewritten_history():
+    """Test that a changed earlier leaf or a wrong root is rejected."""
+    leaves = [leaf_hash(f"event-{i}".encode("utf-8")) for i in range(10)]
+    metadata = leaf_hash(b"metadata").hex()
+    proof = event_consistency_proof(DigestArray(b"".join(leaves)), 6, metadata, metadata)
+
+    rewritten = leaves[:6]
+    rewritten[2] = leaf_hash(b"rewritten")
+    rewritten_root = event_tree_root(
+        merkle_root_from_digests(rewritten), bytes.fromhex(metadata)
+    ).hex()
+
+    assert not verify_consistency(rewritten_root, proof["new_root"], proof)
+    assert not verify_consistency(proof["old_root"], proof["old_root"], proof)
+    assert not verify_consistency(proof["old_root"], proof["new_root"], {"path": []})
+
+    with pytest.raises(IndexError):
+        consistency_proof(leaves, 11)
+    with pytest.raises(ValueError):
+        consistency_proof(["00" * 32], 1, "sha256")
+
+
+@pytest.mark.parametrize("algorithm", ["sha256-chunks", "sha256-cdc"])
+def test_consistency_proof_rejects_serialized_modes(algorithm):
+    """Test that versions hashed over serialized bytes get no consistency proof."""
+    builder = TraceBuilder("test-session-chunks", algorithm=algorithm, chunk_size=64)
+    builder.add_messages([HumanMessage(content=f"message {i}") for i in range(5)])
+    older = builder.build()
+    builder.add_messages([AIMessage(content="reply")])
+    newer = builder.build()
+
+    # Two real versions do not share a leaf prefix in this mode
+    old_root, old_leaves = compute_trace_merkle(older.hashed_bytes(), 64, algorithm)
+    new_root, new_leaves = compute_trace_merkle(newer.hashed_bytes(), 64, algorithm)
+    assert (old_root, new_root) == (older.hashing.chunkMerkleRoot, newer.hashing.chunkMerkleRoot)
+    assert list(new_leaves)[:len(old_leaves)] != list(old_leaves)
+
+    with pytest.raises(ValueError):
+        consistency_proof(new_leaves, len(old_leaves), algorithm)
+
+    # A proof forged in another mode's format is not accepted either
+    forged = {"algorithm": algorithm, "old_size": 1, "new_size": 2, "path": ["00" * 32]}
+    assert not verify_consistency(older.hashing.chunkMerkleRoot, newer.hashing.chunkMerkleRoot, forged)
+
+
+def test_event_consistency_between_anchored_versions():
+    """Test proving that a grown "events" session extends its earlier anchor."""
+    builder = TraceBuilder("test-session-grow", algorithm="sha256-events")
+    builder.add_messages([HumanMessage(content=f"message {i}") for i in range(5)])
+    older = builder.build()
+    _, _, old_metadata = compute_event_merkle(json.loads(older.to_json()))
+
+    builder.add_messages([AIMessage(content="reply"), HumanMessage(content="thanks")])
+    newer = builder.build()
+    _, event_hashes, new_metadata = compute_event_merkle(json.loads(newer.to_json()))
+
+    proof = event_consistency_proof(event_hashes, len(older.events), old_metadata, new_metadata)
+
+    assert proof["old_root"] == older.hashing.chunkMerkleRoot
+    assert proof["new_root"] == newer.hashing.chunkMerkleRoot
+    assert verify_consistency(older.hashing.chunkMerkleRoot, newer.hashing.chunkMerkleRoot, proof)
+    assert not verify_consistency(newer.hashing.chunkMerkleRoot, newer.hashing.chunkMerkleRoot, proof)
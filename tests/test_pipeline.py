@@ -0,0 +1,62 @@
+"""
+Tests for the shared serialized trace buffer
+"""
+
+import json
+
+import pytest
+
+from a2a_anchor.anchor_service import AnchorService
+from a2a_anchor.pipeline import PIPELINE_STATS, persist_payload
+from a2a_anchor.verify import verify_trace
+
+
+@pytest.mark.parametrize("algorithm", ["sha256-chunks", "sha256-events", "sha256"])
+def test_single_buffer_through_pipeline(algorithm, tmp_path, ipfs, xrpl, build_trace):
+    """Test that hashing, persistence, upload and reporting share one buffer."""
+    PIPELINE_STATS.reset()
+    trace = build_trace(algorithm=algorithm)
+    path = persist_payload(trace.payload(), tmp_path / "trace.json")
+
+    result = AnchorService(ipfs, xrpl).anchor_trace(trace)
+
+    assert PIPELINE_STATS.serializations == 1
+    assert PIPELINE_STATS.parses == 0
+    stages = ["persist", "upload", "report"]
+    # Events-mode roots are built from per-event leaves, not the buffer
+    if algorithm == "sha256-chunks":
+        stages.append("hash")
+    assert PIPELINE_STATS.shared_buffer(stages)
+    assert ipfs.blocks[result["cid"]] is trace.payload()
+    assert path.read_bytes() == trace.payload()
+    assert result["payload_bytes"] == len(trace.payload())
+
+    assert verify_trace("tx", xrpl, ipfs).verified
+
+
+def test_compressed_upload_shares_buffer(ipfs, xrpl, build_trace):
+    """Test that compression reads the shared buffer and still verifies."""
+    PIPELINE_STATS.reset()
+    trace = build_trace(algorithm="sha256-chunks")
+    result = AnchorService(ipfs, xrpl).anchor_trace(trace, compression="zlib")
+
+    assert PIPELINE_STATS.serializations == 1
+    assert PIPELINE_STATS.shared_buffer(["hash", "compress"])
+    # The compressed object is what was uploaded and reported
+    assert PIPELINE_STATS.shared_buffer(["upload", "report"])
+    assert not PIPELINE_STATS.shared_buffer(["hash", "upload"])
+    assert ipfs.blocks[result["cid"]] is not trace.payload()
+    assert result["payload_bytes"] == len(ipfs.blocks[result["cid"]]) < len(trace.payload())
+    assert verify_trace("tx", xrpl, ipfs).verified
+
+
+def test_persist_keeps_hashing_beside_payload(tmp_path, build_trace):
+    """Test that the hashing section can be kept next to a canonical payload."""
+    trace = build_trace(algorithm="sha256-chunks")
+    path = persist_payload(
+        trace.payload(), tmp_path / "trace.json", hashing=trace.hashing.model_dump(mode="json")
+    )
+
+    assert "chunkMerkleRoot" not in json.loads(path.read_bytes())["hashing"]
+    sidecar = json.loads((tmp_path / "trace.hashing.json").read_text())
+    assert sidecar["chunkMerkleRoot"] == trace.hashing.chunkMerkleRoot
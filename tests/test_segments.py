@@ -0,0 +1,148 @@
+"""
+Tests for segmented traces, manifests and root-of-roots
+"""
+
+import json
+
+import pytest
+
+from a2a_anchor.anchor_service import AnchorService
+from a2a_anchor.merkle import (
+    compute_root_of_roots, manifest_consistency_proof, MANIFEST_VERSION
+)
+from a2a_anchor.segments import SegmentedTraceBuilder
+from a2a_anchor.trace_schema import TraceManifest
+from a2a_anchor.verify import verify_trace, verify_consistency, verify_trace_from_json
+from langchain_core.messages import HumanMessage, AIMessage
+
+
+def _messages(n):
+    for i in range(n):
+        yield HumanMessage(content=f"Question {i}")
+        yield AIMessage(content=f"Answer {i}")
+
+
+def test_segments_are_bounded_and_verify_alone():
+    """Test that a long session is cut into segments that verify on their own."""
+    finalized = []
+    builder = SegmentedTraceBuilder(
+        session_id="seg-session", segment_events=10, on_segment=finalized.append
+    )
+    builder.add_messages(_messages(24))
+
+    # Full segments are finalized while the session is still running
+    assert [len(s.events) for s in finalized] == [10, 10, 10, 10]
+
+    manifest = builder.build_manifest()
+    assert [entry.events for entry in manifest.segments] == [10, 10, 10, 10, 8]
+    assert [s.segment.firstEvent for s in builder.segments] == [0, 10, 20, 30, 40]
+
+    for segment in builder.segments:
+        result = verify_trace_from_json(segment.to_json(), segment.hashing.chunkMerkleRoot)
+        assert result.verified, result.error
+        assert segment.session.id == "seg-session"
+
+
+def test_unsegmented_traces_unchanged(build_trace):
+    """Test that traces without a segment serialize without the field."""
+    assert "segment" not in json.loads(build_trace().to_json())
+
+
+def test_root_of_roots_and_consistency():
+    """Test the manifest root and consistency between manifests of one session."""
+    builder = SegmentedTraceBuilder(session_id="grow", segment_events=4)
+    builder.add_messages(_messages(4))
+    old = builder.build_manifest()
+    builder.add_messages(_messages(6))
+    new = builder.build_manifest()
+
+    roots = [entry.root for entry in new.segments]
+    assert new.rootOfRoots == compute_root_of_roots(roots, new.algorithm)
+    assert [entry.root for entry in old.segments] == roots[:len(old.segments)]
+
+    proof = manifest_consistency_proof(old, new)
+    assert verify_consistency(old.rootOfRoots, new.rootOfRoots, proof)
+    assert not verify_consistency(new.rootOfRoots, new.rootOfRoots, proof)
+
+    other = SegmentedTraceBuilder(session_id="other", segment_events=4)
+    other.add_messages(_messages(4))
+    with pytest.raises(ValueError):
+        manifest_consistency_proof(other.build_manifest(), new)
+
+
+def test_manifest_rejects_mixed_segments():
+    """Test that segments of different sessions cannot share a manifest."""
+    first = SegmentedTraceBuilder(session_id="a", segment_events=2)
+    first.add_messages(_messages(2))
+    second = SegmentedTraceBuilder(session_id="b", segment_events=2)
+    second.add_messages(_messages(2))
+
+    with pytest.raises(ValueError):
+        TraceManifest.from_segments([first.segments[0], second.segments[1]])
+    with pytest.raises(ValueError):
+        TraceManifest.from_segments([])
+
+
+@pytest.mark.parametrize("algorithm, encoding", [
+    ("sha256", "json"),
+    ("sha256-chunks", "cbor"),
+    ("blake2b-events", "json"),
+])
+def test_anchor_and_verify_segmented_trace(algorithm, encoding, ipfs, xrpl):
+    """Test anchoring a manifest and verifying every segment through it."""
+    builder = SegmentedTraceBuilder(session_id="anchored", algorithm=algorithm, segment_events=6)
+    builder.add_messages(_messages(10))
+    builder.finalize_segment()
+
+    result = AnchorService(ipfs, xrpl).anchor_segmented_trace(builder.segments, encoding)
+    assert result["segments"] == 4
+    assert xrpl.memo["v"] == MANIFEST_VERSION
+
+    verification = verify_trace("tx", xrpl, ipfs)
+    assert verification.verified, verification.error
+    assert verification.details["trace_events"] == 20
+
+    # Tampering with one stored segment is reported for that segment only
+    manifest = json.loads(ipfs.blocks[xrpl.memo["cid"]])
+    tampered = manifest["segments"][2]["cid"]
+    ipfs.blocks[tampered] = ipfs.blocks[tampered].replace(b"Answer", b"answer")
+
+    verification = verify_trace("tx", xrpl, ipfs)
+    assert not verification.verified
+    assert list(verification.details["segment_errors"]) == [2]
+
+
+def _anchored_manifest(ipfs, xrpl):
+    builder = SegmentedTraceBuilder(session_id="counted", segment_events=4)
+    builder.add_messages(_messages(5))
+    builder.finalize_segment()
+    AnchorService(ipfs, xrpl).anchor_segmented_trace(builder.segments)
+    return json.loads(ipfs.blocks[xrpl.memo["cid"]])
+
+
+def _reanchor(ipfs, xrpl, manifest):
+    """Store an edited manifest under the anchored memo (roots unchanged)"""
+    xrpl.memo["cid"] = ipfs.add_bytes(json.dumps(manifest).encode("utf-8"))
+
+
+def test_uncommitted_manifest_counts_are_checked(ipfs, xrpl):
+    """Test that event counts, which rootOfRoots does not cover, must match the segments."""
+    manifest = _anchored_manifest(ipfs, xrpl)
+    manifest["segments"][0]["events"] += 3
+    _reanchor(ipfs, xrpl, manifest)
+
+    verification = verify_trace("tx", xrpl, ipfs)
+    assert not verification.verified
+    assert "events" in verification.details["segment_errors"][0]
+    # The following segment no longer starts where the manifest says
+    assert "starts at event" in verification.details["segment_errors"][1]
+
+
+def test_manifest_session_must_match_memo(ipfs, xrpl):
+    """Test that a manifest of another session does not verify under a memo."""
+    _anchored_manifest(ipfs, xrpl)
+    xrpl.memo["sid"] = "someone-else"
+
+    verification = verify_trace("tx", xrpl, ipfs)
+    assert not verification.verified
+    assert "session" in verification.error
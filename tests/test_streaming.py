@@ -0,0 +1,108 @@
+"""
+Tests for async trace capture from astream_events
+"""
+
+import asyncio
+
+from langchain_core.language_models.fake_chat_models import FakeMessagesListChatModel
+from langchain_core.messages import HumanMessage, AIMessage
+from langchain_core.runnables import RunnableLambda
+from langchain_core.tools import tool
+
+from a2a_anchor.streaming import AsyncTraceBuilder, capture_sessions
+from a2a_anchor.verify import verify_trace_from_json
+
+
+@tool
+def count_lines(text: str) -> str:
+    """Count the lines of a text."""
+    return str(len(text.splitlines()))
+
+
+def _agent(question):
+    """A two-step tool-using runnable"""
+    model = FakeMessagesListChatModel(responses=[
+        AIMessage(content="", tool_calls=[
+            {"name": "count_lines", "args": {"text": question}, "id": "call_1"}
+        ]),
+        AIMessage(content=f"Answer to {question}"),
+    ])
+
+    async def run(messages):
+        reply = await model.ainvoke(messages)
+        result = await count_lines.ainvoke({**reply.tool_calls[0], "type": "tool_call"})
+        final = await model.ainvoke(messages + [reply, result])
+        return {"messages": messages + [reply, result, final]}
+
+    return RunnableLambda(run)
+
+
+def _events(question):
+    return _agent(question).astream_events([HumanMessage(content=question)], version="v2")
+
+
+def test_stream_records_events():
+    """Test that a passed-through stream is recorded into a verifiable trace."""
+    async def run():
+        builder = AsyncTraceBuilder(session_id="async-session")
+        seen = [event["event"] async for event in builder.stream(_events("a\nb"))]
+        return seen, builder
+
+    seen, builder = asyncio.run(run())
+    trace = builder.build()
+
+    assert "on_chain_end" in seen
+    assert [e.type for e in trace.events] == [
+        "human_message", "ai_tool_call", "tool_result", "ai_message"
+    ]
+    assert trace.events[2].content == "2"
+    assert [t["kind"] for t in builder.timings()] == ["llm", "tool", "llm"]
+    assert verify_trace_from_json(trace.to_json(), trace.hashing.chunkMerkleRoot).verified
+
+
+def test_concurrent_sessions():
+    """Test that many sessions on one loop get separate traces."""
+    questions = {f"s-{i}": f"question {i}" for i in range(20)}
+    traces = asyncio.run(capture_sessions(
+        {sid: _events(q) for sid, q in questions.items()}, max_concurrency=5
+    ))
+
+    assert list(traces) == list(questions)
+    for sid, trace in traces.items():
+        assert trace.session.id == sid
+        assert trace.events[0].content == questions[sid]
+        assert trace.events[-1].content == f"Answer to {questions[sid]}"
+
+
+def test_checkpoints():
+    """Test that partial traces are checkpointed and verify on their own."""
+    checkpoints = []
+
+    async def save(trace):
+        checkpoints.append(trace)
+
+    builder = AsyncTraceBuilder(checkpoint_events=2, on_checkpoint=save)
+    final = asyncio.run(builder.consume(_events("x")))
+
+    assert [len(t.events) for t in checkpoints] == [2, 4]
+    assert checkpoints[0].hashing.chunkMerkleRoot != final.hashing.chunkMerkleRoot
+    for trace in checkpoints:
+        assert verify_trace_from_json(trace.to_json(), trace.hashing.chunkMerkleRoot).verified
+
+
+def test_checkpoint_before_first_reply_keeps_model():
+    """Test that a checkpoint before any model output does not fix the model as unknown."""
+    model = FakeMessagesListChatModel(responses=[
+        AIMessage(content="Hello", response_metadata={"model_name": "gpt-x", "model_provider": "openai"}),
+    ])
+    checkpoints = []
+    builder = AsyncTraceBuilder(checkpoint_events=1, on_checkpoint=checkpoints.append)
+
+    async def run(messages):
+        return {"messages": messages + [await model.ainvoke(messages)]}
+
+    stream = RunnableLambda(run).astream_events([HumanMessage(content="Hi")], version="v2")
+    final = asyncio.run(builder.consume(stream))
+
+    assert checkpoints[0].model.name == "unknown"
+    assert final.model.name == "gpt-x"
@@ -0,0 +1,126 @@
+"""
+Tests for the lazy streaming trace reader
+"""
+
+import json
+import mmap
+
+import pytest
+
+from a2a_anchor import trace_reader
+from a2a_anchor.payload import compress_payload
+from a2a_anchor.trace_builder import TraceBuilder
+from a2a_anchor.trace_reader import TraceReader
+from a2a_anchor.trace_schema import Event
+from a2a_anchor.verify import verify_trace_stream
+from langchain_core.messages import HumanMessage, AIMessage
+
+
+def _trace_json(n_turns=50):
+    builder = TraceBuilder(session_id="reader-session", algorithm="sha256")
+    for i in range(n_turns):
+        builder.add_messages([
+            HumanMessage(content=f"Question {i} ünïcödé 🌍"),
+            AIMessage(content="", tool_calls=[
+                {"name": "calc", "args": {"x": i, "y": i / 3, "big": 10 ** 20}, "id": f"c{i}"}
+            ]),
+        ])
+    trace = builder.build()
+    return trace, trace.get_merkle_json()
+
+
+def _blocks(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("block_size", [1, 7, 4096])
+def test_reader_matches_json_loads(block_size):
+    """Test that streamed header and events equal a full parse, for any block size."""
+    _, trace_json = _trace_json()
+    data = trace_json.encode("utf-8")
+    expected = json.loads(trace_json)
+
+    reader = TraceReader(iter(_blocks(data, block_size)))
+    events = list(reader.iter_events())
+
+    assert events == expected.pop("events")
+    assert reader.header == expected
+    assert reader.event_count == len(events)
+    assert reader.session_id == "reader-session"
+
+
+def test_replayable_sources(tmp_path):
+    """Test paths and mmaps: header first, then events any number of times."""
+    _, trace_json = _trace_json()
+    path = tmp_path / "trace.json"
+    path.write_text(trace_json, encoding="utf-8")
+
+    reader = TraceReader(path)
+    assert reader.event_count == 100
+    assert reader.trace_version == "a2a-0.1"
+    assert len(list(reader.iter_events())) == len(list(reader.iter_events())) == 100
+
+    with open(path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        typed = list(TraceReader(mm).iter_typed_events())
+    assert isinstance(typed[0], Event)
+    assert typed[1].args["big"] == 10 ** 20
+
+
+def test_one_shot_stream_is_read_once():
+    """Test that a consumed one-shot stream cannot be iterated again."""
+    _, trace_json = _trace_json(2)
+    reader = TraceReader(iter([trace_json.encode("utf-8")]))
+
+    assert reader.summary()["event_types"] == {"human_message": 2, "ai_tool_call": 2}
+    with pytest.raises(ValueError):
+        list(reader.iter_events())
+
+
+def test_compressed_and_malformed_input():
+    """Test transparent decompression and errors for broken JSON."""
+    _, trace_json = _trace_json(3)
+    payload = compress_payload(trace_json.encode("utf-8"), "zlib")
+    assert TraceReader(payload).event_count == 6
+
+    with pytest.raises(ValueError):
+        TraceReader(b'{"events": [{"type": "x"} {"type": "y"}]}').event_count
+    with pytest.raises(ValueError):
+        TraceReader(b'{"session": {"id": "s"}').header
+
+
+@pytest.mark.parametrize("piece_size", [2, 3, 5, 64, 1 << 16])
+def test_header_skips_canonical_events(monkeypatch, piece_size):
+    """Test that skipping the events of a canonical trace finds the header after them."""
+    monkeypatch.setattr(trace_reader, "_SKIP_BLOCK_SIZE", piece_size)
+    builder = TraceBuilder(session_id="skip-session", algorithm="sha256-events")
+    for i in range(20):
+        builder.add_messages([
+            HumanMessage(content=f'say "[{{{i}}}]", ok \\ \\" \\\\ {"\\" * i} 🌍'),
+            AIMessage(content="", tool_calls=[
+                {"name": "calc", "args": {"l": [[], {}, [-1.5e3, None, True]], "s": "}]"}, "id": f"c{i}"}
+            ]),
+        ])
+    data = builder.build().payload()
+    assert data.startswith(b'{"events":[')
+    expected = json.loads(data)
+
+    reader = TraceReader(data)
+    assert reader.event_count == len(expected.pop("events")) == 40
+    assert reader.header == expected
+    assert reader.trace_version == "a2a-0.3"
+
+    for broken in (b'{"events": [{}, ]}', b'{"events": [1, 2]}', b'{"events": [{"a": "]"}'):
+        with pytest.raises(ValueError):
+            TraceReader(broken).header
+
+
+def test_stream_verification_reports_session(tmp_path):
+    """Test that stream verification of a file reports the session and event count."""
+    trace, trace_json = _trace_json()
+    path = tmp_path / "trace.json"
+    path.write_bytes(trace_json.encode("utf-8"))
+
+    result = verify_trace_stream(path, trace.hashing.chunkMerkleRoot, algorithm="sha256")
+    assert result.verified, result.error
+    assert result.session_id == "reader-session"
+    assert result.details["trace_events"] == 100
@@ -0,0 +1,84 @@
+"""
+Tests for trace schema models and trusted construction
+"""
+
+import json
+
+import pytest
+
+from a2a_anchor.trace_schema import TraceJSON, Session, Model, Event, EventRecord
+from a2a_anchor.trace_builder import TraceBuilder
+from a2a_anchor.verify import verify_trace_from_json
+from mcp.mcp_trace_builder import MCPTraceBuilder
+from langchain_core.messages import HumanMessage, AIMessage
+
+
+def _fields():
+    return [
+        {"type": "human_message", "ts": "2025-01-01T00:00:00+00:00", "content": "hello"},
+        {"type": "ai_tool_call", "ts": "2025-01-01T00:00:01+00:00", "tool": "search",
+         "args": {"q": "haiku", "limit": 2.5}, "tool_call_id": "call_1"},
+        {"type": "tool_result", "ts": "2025-01-01T00:00:02+00:00", "content": "ok",
+         "tool_call_id": "call_1"},
+    ]
+
+
+def test_event_record_matches_event():
+    """Test that records dump, compare and convert like validated events."""
+    for fields in _fields():
+        record, event = EventRecord(**fields), Event(**fields)
+
+        assert record.to_dict() == event.model_dump()
+        assert record == event
+        assert record.to_event() == event
+
+
+def test_construct_trusted_serializes_like_validated():
+    """Test that a trusted trace has the same JSON and hash bytes."""
+    common = {
+        "traceVersion": "a2a-0.3",
+        "session": Session(id="s", createdAt="2025-01-01T00:00:00+00:00", actors=["user"]),
+        "model": Model(name="m", provider="p"),
+    }
+    validated = TraceJSON(events=[Event(**f) for f in _fields()], **common)
+    trusted = TraceJSON.construct_trusted([EventRecord(**f) for f in _fields()], **common)
+
+    assert trusted.to_json() == validated.to_json()
+    assert trusted.canonical_bytes() == validated.canonical_bytes()
+    assert TraceJSON.model_validate_json(trusted.to_json()).events == validated.events
+    assert "events" in json.dumps(TraceJSON.model_json_schema())
+
+
+def _logs():
+    logs = []
+    for i in range(20):
+        ts = f"2025-01-01T00:00:{i:02d}+00:00"
+        logs.append({"session_id": "s", "timestamp": ts, "event_type": "user_message",
+                     "content": f"message {i}"})
+        logs.append({
+            "session_id": "s", "timestamp": ts, "channel": "mcp_tool",
+            "jsonrpc_request": {"id": i, "params": {"name": "t", "arguments": {"i": i}}},
+            "jsonrpc_response": {"result": {"content": [{"text": f"result {i}"}]}},
+        })
+    return logs
+
+
+@pytest.mark.parametrize("algorithm", ["sha256", "sha256-chunks", "sha256-events"])
+def test_trusted_mcp_trace_has_same_root(algorithm):
+    """Test that trusted MCP conversion gives the validated trace and root."""
+    validated = MCPTraceBuilder.from_jsonl_logs(_logs(), algorithm=algorithm)
+    trusted = MCPTraceBuilder.from_jsonl_logs(_logs(), algorithm=algorithm, trusted=True)
+
+    assert trusted.hashing.chunkMerkleRoot == validated.hashing.chunkMerkleRoot
+    assert trusted.get_merkle_json() == validated.get_merkle_json()
+    assert verify_trace_from_json(trusted.get_merkle_json(), trusted.hashing.chunkMerkleRoot).verified
+
+
+def test_trusted_trace_builder():
+    """Test that a trusted TraceBuilder keeps records and verifies."""
+    builder = TraceBuilder("test-session-trusted", algorithm="sha256-events", trusted=True)
+    builder.add_messages([HumanMessage(content="hello"), AIMessage(content="hi")])
+    trace = builder.build()
+
+    assert all(isinstance(event, EventRecord) for event in trace.events)
+    assert verify_trace_from_json(trace.to_json(), trace.hashing.chunkMerkleRoot).verified
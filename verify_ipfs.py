@@ -8,8 +8,23 @@ Simple script to verify IPFS content by CID
 import sys
 import json
 from a2a_anchor.ipfs_client import create_ipfs_client
+from a2a_anchor.trace_reader import TraceReader
 
-def verify_cid(cid: str):
+
+def print_trace_summary(cid: str, client) -> None:
+    """Stream an A2A trace and print its summary without loading it as a whole"""
+    summary = TraceReader(client.cat_stream(cid)).summary()
+
+    print(f"\n📋 A2A Trace (version: {summary['traceVersion']})")
+    print(f"   Session ID: {summary['session_id']}")
+    print(f"   Model: {summary['model']}")
+    print(f"   Events: {summary['events']}")
+    for event_type, count in sorted(summary['event_types'].items()):
+        print(f"     {event_type}: {count}")
+    print(f"   Merkle Root: {(summary['merkle_root'] or 'N/A')[:50]}...")
+
+
+def verify_cid(cid: str, summary_only: bool = False):
     """Verify and display content from IPFS by CID"""
 
     print(f"🔍 Verifying CID: {cid}\n")
@@ -27,6 +42,13 @@ def verify_cid(cid: str):
 
         print("✓ Connected to IPFS node")
 
+        if summary_only:
+            # Events are parsed one at a time, so huge traces stay cheap
+            print(f"\n📥 Streaming trace from CID...")
+            print_trace_summary(cid, client)
+            client.close()
+            return True
+
         # Fetch content
         print(f"\n📥 Fetching content from CID...")
         content = client.get_json(cid)
@@ -77,12 +99,14 @@ def verify_cid(cid: str):
 
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python verify_ipfs.py <CID>")
+    args = [arg for arg in sys.argv[1:] if arg != "--summary"]
+    if len(args) < 1:
+        print("Usage: python verify_ipfs.py <CID> [--summary]")
+        print("\n  --summary  Stream the trace and print only its summary (for large traces)")
         print("\nExample:")
         print("  python verify_ipfs.py QmNnr7tpaejPtQmwHXC4ffEYTPiwvncnetAFfRds8Upsti")
         sys.exit(1)
 
-    cid = sys.argv[1]
-    success = verify_cid(cid)
+    cid = args[0]
+    success = verify_cid(cid, summary_only="--summary" in sys.argv)
     sys.exit(0 if success else 1)